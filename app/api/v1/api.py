@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 from app.api.v1.endpoints import entities, users, sessions, knowledge, chat
 from app.api.v1.endpoints import specialties, doctors, timeslots, appointments
+from app.api.v1.endpoints import system
 
 api_router = APIRouter()
 api_router.include_router(entities.router, tags=["entities", "instances"])
@@ -14,3 +15,5 @@ api_router.include_router(specialties.router, prefix="/specialties", tags=["spec
 api_router.include_router(doctors.router, prefix="/doctors", tags=["doctors"])
 api_router.include_router(timeslots.router, prefix="/timeslots", tags=["timeslots"])
 api_router.include_router(appointments.router, prefix="/appointments", tags=["appointments"])
+
+api_router.include_router(system.router, prefix="/system", tags=["system"])
@@ -1,11 +1,16 @@
 from typing import Any, List, Optional
 from uuid import UUID
 from datetime import date
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy import select
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, AsyncSessionLocal
+from app.core.pagination import (
+    NEXT_CURSOR_HEADER, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursorError, PageParams, paginate
+)
 from app.crud import crud_appointment
 from app.models.appointment import Appointment
 from app.models.doctor import Doctor
@@ -33,21 +38,24 @@ async def create_appointment(
 
 @router.get("/", response_model=List[schemas.AppointmentResponse])
 async def read_appointments(
+    response: Response,
     db: AsyncSession = Depends(get_db),
     doctor_id: Optional[UUID] = None,
     target_date: Optional[date] = Query(None, alias="date"),
-    skip: int = 0,
-    limit: int = 100
+    page: PageParams = Depends()
 ) -> Any:
     """Retrieve appointments with optional filters."""
     if doctor_id and target_date:
-        return await crud_appointment.appointment.get_by_doctor_and_date(
-            db=db, doctor_id=doctor_id, date=target_date
+        result = await crud_appointment.appointment.get_by_doctor_and_date(
+            db=db, doctor_id=doctor_id, date=target_date, cursor=page.cursor, limit=page.limit
         )
     elif doctor_id:
-        return await crud_appointment.appointment.get_by_doctor_id(db=db, doctor_id=doctor_id)
+        result = await crud_appointment.appointment.get_by_doctor_id(
+            db=db, doctor_id=doctor_id, cursor=page.cursor, limit=page.limit
+        )
     else:
-        return await crud_appointment.appointment.get_multi(db=db, skip=skip, limit=limit)
+        result = await crud_appointment.appointment.get_page(db=db, cursor=page.cursor, limit=page.limit)
+    return paginate(response, result)
 
 
 @router.get("/available", response_model=List[AvailableSlot])
@@ -68,6 +76,86 @@ async def get_available_slots(
     )
 
 
+@router.get("/available/range", response_model=List[AvailableSlot])
+async def get_available_slots_range(
+    response: Response,
+    entity_id: UUID,
+    date_from: date = Query(..., alias="from"),
+    date_to: date = Query(..., alias="to"),
+    specialty_id: Optional[UUID] = None,
+    doctor_id: Optional[UUID] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """Get one page of available slots over a date range, in chronological order.
+
+    When more slots exist, the token for the next page is returned in the X-Next-Cursor header.
+    """
+    after = _parse_range(date_from, date_to, cursor)
+
+    slots = []
+    async for slot in appointment_service.iter_available_slots(
+        db,
+        entity_id=entity_id,
+        start_date=date_from,
+        end_date=date_to,
+        specialty_id=specialty_id,
+        doctor_id=doctor_id,
+        after=after
+    ):
+        if len(slots) == limit:
+            response.headers[NEXT_CURSOR_HEADER] = appointment_service.encode_slot_cursor(slots[-1])
+            break
+        slots.append(slot)
+    return slots
+
+
+@router.get("/available/stream")
+async def stream_available_slots(
+    entity_id: UUID,
+    date_from: date = Query(..., alias="from"),
+    date_to: date = Query(..., alias="to"),
+    specialty_id: Optional[UUID] = None,
+    doctor_id: Optional[UUID] = None,
+    cursor: Optional[str] = None
+) -> Any:
+    """Stream every available slot of a date range as NDJSON, in chronological order."""
+    after = _parse_range(date_from, date_to, cursor)
+
+    async def generate():
+        # The stream outlives the request dependencies, so it owns its DB session
+        async with AsyncSessionLocal() as db:
+            async for slot in appointment_service.iter_available_slots(
+                db,
+                entity_id=entity_id,
+                start_date=date_from,
+                end_date=date_to,
+                specialty_id=specialty_id,
+                doctor_id=doctor_id,
+                after=after
+            ):
+                yield slot.model_dump_json() + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+def _parse_range(date_from: date, date_to: date, cursor: Optional[str]):
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="'to' must be on or after 'from'")
+    if (date_to - date_from).days >= settings.AVAILABILITY_MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date range limited to {settings.AVAILABILITY_MAX_RANGE_DAYS} days"
+        )
+    if not cursor:
+        return None
+    try:
+        return appointment_service.decode_slot_cursor(cursor)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.post("/book", response_model=schemas.BookAppointmentResponse)
 async def book_appointment(
     request: schemas.BookAppointmentRequest,
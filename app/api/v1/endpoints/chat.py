@@ -1,47 +1,42 @@
+import asyncio
 import json
+import re
 from uuid import UUID
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Sequence, Tuple
 from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Body
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.core.database import get_db
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.crud import crud_chat, crud_entity
-from app.models.chat import Session, Message, Speaker
+from app.crud import crud_chat
+from app.models.chat import Message, Speaker
 from app.schemas import chat as schemas
+from app.services.audio import AudioUploadError
+from app.services.container import services
+from app.services.metadata_cache import metadata_cache
+from app.services.openai_client import UNAVAILABLE_ERRORS
+from app.services.session_service import session_service
 
 router = APIRouter()
 
+# Degraded mode (upstream circuit open or failing)
+DEGRADED_PREFIX = "Je fonctionne en mode réduit pour le moment. Voici ce que j'ai trouvé dans nos informations : "
+DEGRADED_UNAVAILABLE = "Désolé, je suis momentanément indisponible. Merci de réessayer dans quelques instants."
+DEGRADED_STT = "Désolé, je n'arrive pas à comprendre les messages vocaux pour le moment. Merci d'écrire votre question."
+NO_SPEECH = "Je n'ai rien entendu. Pouvez-vous répéter votre question ?"
+
+# Recent LLM answers to stateless questions, reused while the LLM is unavailable
+_answer_cache: TTLCache[str] = TTLCache(ttl=settings.DEGRADED_ANSWER_CACHE_SECONDS, maxsize=5000)
+
+# Audio stored once a streamed synthesis ends (references kept until then)
+_storage_tasks = set()
+
 # Fixed speaker ID for demo/testing purposes
 DEFAULT_SPEAKER_ID = None
 FIXED_SPEAKER_UUID = UUID("11111111-1111-1111-1111-111111111111")
 
-# Lazy-loaded services
-_audio_service = None
-_rag_service = None
-_llm_service = None
-
-def get_audio_service() -> "AudioService":
-    global _audio_service
-    if _audio_service is None:
-        from app.services.audio import AudioService
-        _audio_service = AudioService(settings.UPLOAD_DIR)
-    return _audio_service
-
-def get_rag_service() -> "RAGService":
-    global _rag_service
-    if _rag_service is None:
-        from app.services.rag import RAGService
-        _rag_service = RAGService()
-    return _rag_service
-
-def get_llm_service() -> "LLMService":
-    global _llm_service
-    if _llm_service is None:
-        from app.services.llm import LLMService
-        _llm_service = LLMService()
-    return _llm_service
-
 async def get_or_create_default_speaker(db: AsyncSession) -> UUID:
     """Get or create a fixed default speaker for all users"""
     global DEFAULT_SPEAKER_ID
@@ -73,7 +68,7 @@ async def execute_appointment_function(
     func_args: dict
 ) -> dict:
     """Execute an appointment-related function call"""
-    from datetime import datetime
+    from datetime import datetime, timedelta
     from app.services.appointment_service import appointment_service
     from app.schemas.appointment import BookAppointmentRequest
     from uuid import UUID
@@ -93,36 +88,47 @@ async def execute_appointment_function(
         
         elif func_name == "get_available_slots":
             date_str = func_args.get("date")
+            date_end_str = func_args.get("date_end")
             doctor_id = func_args.get("doctor_id")
             specialty = func_args.get("specialty")
             
-            if date_str:
-                parsed_date_str = parse_natural_date(date_str)
+            target_date = _parse_tool_date(date_str)
+            end_date = _parse_tool_date(date_end_str)
+            if end_date and not target_date:
+                target_date = datetime.now().date()
+            if end_date:
+                # Same bound as the HTTP range endpoint: a far date_end with no free slots
+                # would otherwise scan window after window inside the chat turn
+                end_date = min(end_date, target_date + timedelta(days=settings.AVAILABILITY_MAX_RANGE_DAYS - 1))
+            
+            after = None
+            if func_args.get("cursor"):
                 try:
-                    target_date = datetime.strptime(parsed_date_str, "%Y-%m-%d").date()
-                except:
-                    # If date parsing fails, ignore date and search generic
-                    target_date = None
-            else:
-                target_date = None
+                    after = appointment_service.decode_slot_cursor(func_args["cursor"])
+                except ValueError:
+                    after = None
             
             specialty_id = None
             if specialty and not doctor_id:
-                from app.crud.crud_appointment import specialty as specialty_crud
-                spec = await specialty_crud.get_by_name(db=db, name=specialty)
+                spec = await metadata_cache.find_specialty(db, specialty)
                 if spec:
                     specialty_id = spec.specialty_id
             
+            # Ask for one extra slot to know whether a next page exists
+            limit = settings.AVAILABILITY_SUGGESTION_LIMIT
             slots = await appointment_service.get_available_slots(
                 db=db,
                 entity_id=entity_id,
                 target_date=target_date,
                 specialty_id=specialty_id,
-                doctor_id=UUID(doctor_id) if doctor_id else None
+                doctor_id=UUID(doctor_id) if doctor_id else None,
+                end_date=end_date,
+                limit=limit + 1,
+                after=after
             )
             
             if slots:
-                return {
+                result = {
                     "success": True, 
                     "slots": [
                         {
@@ -133,9 +139,12 @@ async def execute_appointment_function(
                             "start_time": s.start_time.strftime("%H:%M"),
                             "end_time": s.end_time.strftime("%H:%M")
                         }
-                        for s in slots
+                        for s in slots[:limit]
                     ]
                 }
+                if len(slots) > limit:
+                    result["next_cursor"] = appointment_service.encode_slot_cursor(slots[limit - 1])
+                return result
             else:
                 return {"success": False, "message": "Aucun créneau trouvé dans les prochains jours."}
         
@@ -185,40 +194,39 @@ async def process_chat_request(
     db: AsyncSession,
     instance_id: str,
     user_input: str,
-    audio_path: Optional[str] = None
+    audio_path: Optional[str] = None,
+    session_id: Optional[str] = None,
+    stream_audio: bool = False
 ) -> dict:
     """
     Common logic for processing both text and voice chat requests.
     Handles RAG, History, LLM, Tools, and Persistence.
+    `session_id` is the id returned by the previous turn of this kiosk conversation, if any.
+    With `stream_audio`, the answer is returned as soon as speech synthesis has
+    started, with a URL streaming the audio while it is generated.
     """
     # Services
-    rag_service = get_rag_service()
-    llm_service = get_llm_service()
-    audio_service = get_audio_service()
+    rag_service = services.rag
+    llm_service = services.llm
+    audio_service = services.audio
 
     # 1. Setup Session
     speaker_uuid = await get_or_create_default_speaker(db)
-    instance = await crud_entity.instance.get(db=db, id=instance_id)
+    instance = await metadata_cache.get_instance(db, instance_id)
     if not instance:
         raise HTTPException(status_code=404, detail="Instance not found")
 
-    stmt = select(Session).filter(
-        Session.entity_id == instance.entity_id,
-        Session.speaker_id == speaker_uuid,
-        Session.is_active == True
-    ).order_by(Session.created_at.desc())
-    result = await db.execute(stmt)
-    session = result.scalars().first()
-
-    if not session:
-        session = Session(entity_id=instance.entity_id, speaker_id=speaker_uuid, is_active=True)
-        db.add(session)
-        await db.commit()
-        await db.refresh(session)
+    current_session_id = await session_service.resolve(
+        db,
+        entity_id=instance.entity_id,
+        instance_id=instance.instance_id,
+        speaker_id=speaker_uuid,
+        session_id=_parse_session_id(session_id)
+    )
 
-    # 2. Save User Message
+    # 2. Save User Message (also persists a newly opened session)
     user_msg = Message(
-        session_id=session.session_id,
+        session_id=current_session_id,
         instance_id=instance_id,
         role="user",
         content=user_input,
@@ -227,21 +235,31 @@ async def process_chat_request(
     db.add(user_msg)
     await db.commit()
 
+    # Upstream operations that failed and were replaced by a fallback this turn
+    degraded = []
+
     # 3. RAG Context
-    query_embedding = await rag_service.embed_text(user_input)
-    chunks = await rag_service.search_kb(db, instance.entity_id, query_embedding)
+    try:
+        query_embedding = await rag_service.embed_text(user_input)
+        chunks = await rag_service.search_kb(db, instance.entity_id, query_embedding)
+    except UNAVAILABLE_ERRORS as e:
+        print(f"⚠ Embeddings unavailable, using keyword search: {e}")
+        degraded.append("embeddings")
+        chunks = await rag_service.search_kb_text(db, instance.entity_id, user_input)
     
     context = ""
     if chunks:
-        context = "\n\n".join([f"Source: {chunk.document.title}\nContent: {chunk.content}" for chunk in chunks])
+        context = "\n\n".join([f"Source: {_chunk_source(chunk)}\nContent: {chunk.content}" for chunk in chunks])
     else:
         context = "Aucune information pertinente trouvée dans la base de connaissances."
 
     # 4. Build History (including previous tools outputs)
-    previous_messages = await crud_chat.message.get_by_session_id(db=db, session_id=session.session_id)
-    history = ""
     # Take last 15 messages to ensure we have enough context
-    for msg in previous_messages[-15:]:
+    previous_messages = await crud_chat.message.get_recent_by_session_id(
+        db=db, session_id=current_session_id, limit=15
+    )
+    history = ""
+    for msg in previous_messages:
         if msg.role == "user":
             history += f"User: {msg.content}\n"
         elif msg.role == "assistant":
@@ -278,63 +296,39 @@ async def process_chat_request(
     """
 
     # 6. LLM Interaction Loop (Handle Tools)
-    current_text = user_input
-    final_response_text = ""
-    
-    # Initial LLM call
-    llm_result = await llm_service.generate_response_with_tools(
-        system_instruction, context, history, current_text
-    )
-
-    # Max loops for nested tools
-    for _ in range(5):
-        if llm_result["type"] == "function_call":
-            func_name = llm_result["content"]["name"]
-            func_args = llm_result["content"]["args"]
-            
-            # Execute tool
-            print(f"🔧 Calling tool: {func_name} with {func_args}")
-            func_result = await execute_appointment_function(
-                db, instance.entity_id, session.session_id, func_name, func_args
-            )
-            print(f"✅ Tool result: {func_result}")
-            
-            func_result_str = json.dumps(func_result, ensure_ascii=False, default=str)
-
-            # PERSIST Tool Result in DB
-            tool_msg = Message(
-                session_id=session.session_id,
-                instance_id=instance_id,
-                role="tool",
-                content=f"Function: {func_name}\nResult: {func_result_str}",
-                audio_path=None
-            )
-            db.add(tool_msg)
-            await db.commit()
+    answer_key = (instance.entity_id, _normalize_question(user_input))
+    try:
+        final_response_text, used_tools = await _run_llm_turn(
+            db, llm_service, instance, current_session_id, system_instruction, context, history, user_input
+        )
+        if not used_tools and len(previous_messages) <= 1:
+            # Only first questions: their answer doesn't depend on a conversation
+            _answer_cache.set(answer_key, final_response_text)
+    except UNAVAILABLE_ERRORS as e:
+        print(f"⚠ LLM unavailable, answering in degraded mode: {e}")
+        degraded.append("chat")
+        final_response_text = _answer_cache.get(answer_key) or _extractive_answer(user_input, chunks)
 
-            # Append to history for current context
-            history += f"\nSystem (Tool Output for {func_name}): {func_result_str}\n"
-            
-            # Continue conversation
-            llm_result = await llm_service.continue_with_function_result(
-                system_instruction, # Passing the French system prompt
-                func_name,
-                func_result_str
-            )
+    # 7. Generate Audio Response (the text alone is still a usable answer)
+    speech = None
+    response_audio_path = None
+    response_audio_stream = None
+    try:
+        speech = audio_service.start_speech(final_response_text)
+        if stream_audio:
+            # The file at response_audio is complete only once the stream ends
+            await speech.started()
+            response_audio_stream = f"/api/v1/chat/tts/{speech.id}"
+            response_audio_path = speech.path
         else:
-            # Text response
-            final_response_text = llm_result["content"]
-            break
-    
-    if not final_response_text:
-        final_response_text = "Désolé, je rencontre une erreur technique."
-
-    # 7. Generate Audio Response
-    response_audio_path = await audio_service.text_to_speech(final_response_text)
+            response_audio_path = await speech.wait()
+    except UNAVAILABLE_ERRORS as e:
+        print(f"⚠ TTS unavailable, answering without audio: {e}")
+        degraded.append("tts")
 
     # 8. Save Assistant Response
     assistant_msg = Message(
-        session_id=session.session_id,
+        session_id=current_session_id,
         instance_id=instance_id,
         role="assistant",
         content=final_response_text,
@@ -343,40 +337,241 @@ async def process_chat_request(
     db.add(assistant_msg)
     await db.commit()
 
+    # 9. Keep this turn's audio (object storage if configured) and re-encode it to Opus
+    #    once the client has played the originals
+    audio_store = services.audio_store
+    if stream_audio and speech is not None and audio_store.enabled:
+        # Still being written: stored when the synthesis ends, the client plays the stream meanwhile
+        task = asyncio.ensure_future(_store_when_synthesized(speech, assistant_msg.message_id))
+        _storage_tasks.add(task)
+        task.add_done_callback(_storage_tasks.discard)
+        user_audio = await _store_audio(audio_path, user_msg.message_id, settings.AUDIO_STORAGE_BITRATE, degraded)
+        response_audio = None
+    else:
+        user_audio, response_audio = await asyncio.gather(
+            _store_audio(audio_path, user_msg.message_id, settings.AUDIO_STORAGE_BITRATE, degraded),
+            _store_audio(response_audio_path, assistant_msg.message_id, settings.TTS_BITRATE, degraded)
+        )
+
     return {
         "speaker_id": str(speaker_uuid),
-        "session_id": str(session.session_id),
+        "session_id": str(current_session_id),
         "transcription": user_input,
-        "user_audio": audio_path,
+        "user_audio": audio_store.url(user_audio),
         "response_text": final_response_text,
-        "response_audio": response_audio_path
+        "response_audio": audio_store.url(response_audio),
+        "response_audio_stream": response_audio_stream,
+        "degraded": degraded
     }
 
+async def _run_llm_turn(
+    db: AsyncSession,
+    llm_service,
+    instance,
+    session_id: UUID,
+    system_instruction: str,
+    context: str,
+    history: str,
+    user_input: str
+) -> Tuple[str, bool]:
+    """
+    Run the LLM with its tool loop; returns the final text and whether tools were used.
+    Raises UNAVAILABLE_ERRORS when the LLM cannot be reached.
+    """
+    used_tools = False
+
+    # Initial LLM call. The prompt holds the whole conversation, so identical
+    # concurrent prompts (same first question at several kiosks) can share one answer
+    llm_result = await llm_service.generate_response_with_tools(
+        system_instruction, context, history, user_input, coalesce=True
+    )
+
+    # Max loops for nested tools
+    for _ in range(5):
+        if llm_result["type"] != "function_call":
+            # Text response
+            return llm_result["content"] or "Désolé, je rencontre une erreur technique.", used_tools
+
+        used_tools = True
+        func_name = llm_result["content"]["name"]
+        func_args = llm_result["content"]["args"]
+
+        # Execute tool
+        print(f"🔧 Calling tool: {func_name} with {func_args}")
+        func_result = await execute_appointment_function(
+            db, instance.entity_id, session_id, func_name, func_args
+        )
+        print(f"✅ Tool result: {func_result}")
+
+        func_result_str = json.dumps(func_result, ensure_ascii=False, default=str)
+
+        # PERSIST Tool Result in DB
+        tool_msg = Message(
+            session_id=session_id,
+            instance_id=instance.instance_id,
+            role="tool",
+            content=f"Function: {func_name}\nResult: {func_result_str}",
+            audio_path=None
+        )
+        db.add(tool_msg)
+        await db.commit()
+
+        # Continue conversation
+        llm_result = await llm_service.continue_with_function_result(
+            system_instruction, # Passing the French system prompt
+            func_name,
+            func_result_str
+        )
+
+    return "Désolé, je rencontre une erreur technique.", used_tools
+
+async def _store_audio(path: Optional[str], message_id: UUID, bitrate: str, degraded: List[str]) -> Optional[str]:
+    """Move a saved turn's audio to object storage and queue its transcoding; returns its audio_path."""
+    if not path:
+        return None
+    transcoder = services.transcoder
+    try:
+        # The transcoder works on the local copy and replaces the object afterwards
+        audio_path = await services.audio_store.store(path, [message_id], keep_local=transcoder.enabled)
+    except Exception as e:
+        # Kept on local disk: the retention pass moves it to object storage later
+        print(f"⚠ Audio storage unavailable, keeping {path} locally: {e}")
+        if "storage" not in degraded:
+            degraded.append("storage")
+        audio_path = path
+    transcoder.submit(path, [message_id], bitrate, settings.TRANSCODE_DELAY_SECONDS, audio_path=audio_path)
+    return audio_path
+
+async def _store_when_synthesized(speech, message_id: UUID) -> None:
+    try:
+        path = await speech.wait()
+    except Exception:
+        # Failed synthesis: nothing was kept on disk
+        return
+    await _store_audio(path, message_id, settings.TTS_BITRATE, [])
+
+def _chunk_source(chunk) -> str:
+    """Document title, with the section and pages the chunk comes from when known."""
+    source = chunk.document.title
+    if chunk.heading:
+        source += f" - {chunk.heading}"
+    if chunk.page_start:
+        pages = chunk.page_start if chunk.page_end in (None, chunk.page_start) else f"{chunk.page_start}-{chunk.page_end}"
+        source += f" (p. {pages})"
+    return source
+
+def _normalize_question(text: str) -> str:
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+def _extractive_answer(question: str, chunks: Sequence, max_sentences: int = 2) -> str:
+    """Degraded answer: the knowledge base sentences sharing the most words with the question."""
+    words = {w for w in re.findall(r"\w+", question.lower()) if len(w) > 3}
+    sentences = [
+        s.strip()
+        for chunk in chunks
+        for s in re.split(r"(?<=[.!?])\s+", chunk.content)
+        if s.strip()
+    ]
+    scored = [
+        (len(words & set(re.findall(r"\w+", s.lower()))), i, s)
+        for i, s in enumerate(sentences)
+    ]
+    best = sorted((item for item in scored if item[0] > 0), key=lambda item: (-item[0], item[1]))[:max_sentences]
+    if not best:
+        return DEGRADED_UNAVAILABLE
+    # Keep the picked sentences in reading order
+    return DEGRADED_PREFIX + " ".join(s for _, _, s in sorted(best, key=lambda item: item[1]))
+
+def _parse_session_id(session_id: Optional[str]) -> Optional[UUID]:
+    """Client-supplied session id; anything unparseable just starts a new session"""
+    if not session_id:
+        return None
+    try:
+        return UUID(session_id)
+    except ValueError:
+        return None
+
 @router.post("/messages", response_model=dict)
 async def handle_voice_message(
     instance_id: str = Form(...),
     audio_file: UploadFile = File(...),
     speaker_id: Optional[str] = Form(None),
     metadata: Optional[str] = Form(None),
+    session_id: Optional[str] = Form(None),
+    stream_audio: bool = Form(False),
     db: AsyncSession = Depends(get_db)
 ):
-    audio_service = get_audio_service()
+    audio_service = services.audio
     
     # Save & Transcribe
-    audio_path = await audio_service.save_upload_file(audio_file)
-    transcription = await audio_service.transcribe(audio_path)
+    try:
+        saved = await audio_service.save_upload_file(audio_file)
+    except AudioUploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    audio_path = saved.path
+    try:
+        transcription = await audio_service.transcribe(audio_path)
+    except UNAVAILABLE_ERRORS as e:
+        print(f"⚠ STT unavailable: {e}")
+        # Nothing to answer without the question: ask the kiosk user to type it
+        return {
+            "speaker_id": None,
+            "session_id": session_id,
+            "transcription": "",
+            "user_audio": services.audio_store.url(audio_path),
+            "response_text": DEGRADED_STT,
+            "response_audio": None,
+            "response_audio_stream": None,
+            "degraded": ["stt"]
+        }
+
+    if not transcription.strip():
+        # Silent clip (STT was skipped): nothing to answer or to keep in the history
+        return {
+            "speaker_id": None,
+            "session_id": session_id,
+            "transcription": "",
+            "user_audio": services.audio_store.url(audio_path),
+            "response_text": NO_SPEECH,
+            "response_audio": None,
+            "response_audio_stream": None,
+            "degraded": []
+        }
     
     # Process
-    return await process_chat_request(db, instance_id, transcription, audio_path)
+    return await process_chat_request(db, instance_id, transcription, audio_path, session_id, stream_audio)
 
 @router.post("/text", response_model=dict)
 async def handle_text_message(
     instance_id: str = Body(...),
     text: str = Body(...),
+    session_id: Optional[str] = Body(None),
+    stream_audio: bool = Body(False),
     db: AsyncSession = Depends(get_db)
 ):
     # Process
-    return await process_chat_request(db, instance_id, text, None)
+    return await process_chat_request(db, instance_id, text, None, session_id, stream_audio)
+
+@router.get("/tts/{stream_id}")
+async def stream_speech(stream_id: str):
+    """Audio of an answer, from its first byte, while it is still being synthesized"""
+    speech = services.audio.get_speech(stream_id)
+    if speech is None:
+        # Expired streams: the finished file is served from response_audio
+        raise HTTPException(status_code=404, detail="Audio stream not found")
+    return StreamingResponse(speech.iter_bytes(), media_type=speech.content_type)
+
+def _parse_tool_date(date_str: Optional[str]):
+    """Parse a date argument from the LLM, returning None if absent or unparseable"""
+    from datetime import datetime
+
+    if not date_str:
+        return None
+    try:
+        return datetime.strptime(parse_natural_date(date_str), "%Y-%m-%d").date()
+    except ValueError:
+        # If date parsing fails, ignore date and search generic
+        return None
 
 def parse_natural_date(date_str: str) -> str:
     """Parse natural language dates to YYYY-MM-DD format"""
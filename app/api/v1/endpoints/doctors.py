@@ -2,12 +2,14 @@ import secrets
 import hashlib
 from typing import Any, List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy import select
 from app.core.database import get_db
-from app.crud import crud_appointment, crud_entity
+from app.core.pagination import PageParams, paginate
+from app.crud import crud_appointment
+from app.services.metadata_cache import metadata_cache
 from app.models.doctor import Doctor
 from app.schemas import doctor as schemas
 
@@ -44,7 +46,7 @@ async def create_doctor(
 ) -> Any:
     """Create new doctor and return credentials."""
     # Check entity exists
-    entity = await crud_entity.entity.get(db=db, id=doctor_in.entity_id)
+    entity = await metadata_cache.get_entity(db, doctor_in.entity_id)
     if not entity:
         raise HTTPException(status_code=404, detail="Entity not found")
     
@@ -75,19 +77,24 @@ async def create_doctor(
 
 @router.get("/", response_model=List[schemas.DoctorResponse])
 async def read_doctors(
+    response: Response,
     db: AsyncSession = Depends(get_db),
     entity_id: Optional[UUID] = None,
     specialty_id: Optional[UUID] = None,
-    skip: int = 0,
-    limit: int = 100
+    page: PageParams = Depends()
 ) -> Any:
     """Retrieve doctors with optional filters."""
     if entity_id and specialty_id:
-        return await crud_appointment.doctor.get_by_specialty(db=db, entity_id=entity_id, specialty_id=specialty_id)
+        result = await crud_appointment.doctor.get_by_specialty(
+            db=db, entity_id=entity_id, specialty_id=specialty_id, cursor=page.cursor, limit=page.limit
+        )
     elif entity_id:
-        return await crud_appointment.doctor.get_by_entity_id(db=db, entity_id=entity_id)
+        result = await crud_appointment.doctor.get_by_entity_id(
+            db=db, entity_id=entity_id, cursor=page.cursor, limit=page.limit
+        )
     else:
-        return await crud_appointment.doctor.get_multi(db=db, skip=skip, limit=limit)
+        result = await crud_appointment.doctor.get_page(db=db, cursor=page.cursor, limit=page.limit)
+    return paginate(response, result)
 
 
 @router.get("/{doctor_id}", response_model=schemas.DoctorWithSpecialty)
@@ -1,10 +1,12 @@
 from typing import Any, List
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
+from app.core.pagination import PageParams, paginate
 from app.crud import crud_entity
 from app.schemas import entity as schemas
+from app.services.metadata_cache import metadata_cache
 
 router = APIRouter()
 
@@ -22,14 +24,14 @@ async def create_entity(
 
 @router.get("/entities", response_model=List[schemas.EntityResponse])
 async def read_entities(
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100
+    page: PageParams = Depends()
 ) -> Any:
     """
     Retrieve entities.
     """
-    return await crud_entity.entity.get_multi(db=db, skip=skip, limit=limit)
+    return paginate(response, await crud_entity.entity.get_page(db=db, cursor=page.cursor, limit=page.limit))
 
 @router.get("/entities/{entity_id}", response_model=schemas.EntityResponse)
 async def read_entity(
@@ -39,7 +41,7 @@ async def read_entity(
     """
     Get entity by ID.
     """
-    entity = await crud_entity.entity.get(db=db, id=entity_id)
+    entity = await metadata_cache.get_entity(db, entity_id)
     if not entity:
         raise HTTPException(status_code=404, detail="Entity not found")
     return entity
@@ -56,7 +58,9 @@ async def update_entity(
     entity = await crud_entity.entity.get(db=db, id=entity_id)
     if not entity:
         raise HTTPException(status_code=404, detail="Entity not found")
-    return await crud_entity.entity.update(db=db, db_obj=entity, obj_in=entity_in)
+    entity = await crud_entity.entity.update(db=db, db_obj=entity, obj_in=entity_in)
+    await metadata_cache.invalidate_entity(entity_id)
+    return entity
 
 @router.delete("/entities/{entity_id}", response_model=schemas.EntityResponse)
 async def delete_entity(
@@ -69,7 +73,9 @@ async def delete_entity(
     entity = await crud_entity.entity.get(db=db, id=entity_id)
     if not entity:
         raise HTTPException(status_code=404, detail="Entity not found")
-    return await crud_entity.entity.remove(db=db, id=entity_id)
+    entity = await crud_entity.entity.remove(db=db, id=entity_id)
+    await metadata_cache.invalidate_entity(entity_id)
+    return entity
 
 # --- Instances ---
 @router.post("/instances", response_model=schemas.InstanceResponse)
@@ -82,7 +88,7 @@ async def create_instance(
     Create new instance.
     """
     # Check if entity exists
-    entity = await crud_entity.entity.get(db=db, id=instance_in.entity_id)
+    entity = await metadata_cache.get_entity(db, instance_in.entity_id)
     if not entity:
         raise HTTPException(status_code=404, detail="Entity not found")
     
@@ -115,14 +121,14 @@ async def create_instance(
 
 @router.get("/instances", response_model=List[schemas.InstanceResponse])
 async def read_instances(
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100
+    page: PageParams = Depends()
 ) -> Any:
     """
     Retrieve instances.
     """
-    return await crud_entity.instance.get_multi(db=db, skip=skip, limit=limit)
+    return paginate(response, await crud_entity.instance.get_page(db=db, cursor=page.cursor, limit=page.limit))
 
 @router.get("/instances/{instance_id}", response_model=schemas.InstanceResponse)
 async def read_instance(
@@ -132,7 +138,7 @@ async def read_instance(
     """
     Get instance by ID.
     """
-    instance = await crud_entity.instance.get(db=db, id=instance_id)
+    instance = await metadata_cache.get_instance(db, instance_id)
     if not instance:
         raise HTTPException(status_code=404, detail="Instance not found")
     return instance
@@ -149,7 +155,9 @@ async def update_instance(
     instance = await crud_entity.instance.get(db=db, id=instance_id)
     if not instance:
         raise HTTPException(status_code=404, detail="Instance not found")
-    return await crud_entity.instance.update(db=db, db_obj=instance, obj_in=instance_in)
+    instance = await crud_entity.instance.update(db=db, db_obj=instance, obj_in=instance_in)
+    await metadata_cache.invalidate_instance(instance_id)
+    return instance
 
 @router.delete("/instances/{instance_id}", response_model=schemas.InstanceResponse)
 async def delete_instance(
@@ -162,4 +170,6 @@ async def delete_instance(
     instance = await crud_entity.instance.get(db=db, id=instance_id)
     if not instance:
         raise HTTPException(status_code=404, detail="Instance not found")
-    return await crud_entity.instance.remove(db=db, id=instance_id)
+    instance = await crud_entity.instance.remove(db=db, id=instance_id)
+    await metadata_cache.invalidate_instance(instance_id)
+    return instance
@@ -1,23 +1,22 @@
-from typing import Any, List
+from typing import Any, AsyncIterator, List
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Response
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.pagination import PageParams, paginate
+from app.core.rate_limit import Priority
 from app.crud import crud_knowledge
+from app.models.knowledge import KBDocument
 from app.schemas import knowledge as schemas
+from app.services.chunking import Chunk, chunk_pages
+from app.services.container import services
+from app.services.extraction import DocumentTooLarge, ExtractedPage, ExtractionError
 
 router = APIRouter()
 
-# Lazy-loaded service
-_rag_service = None
-
-def get_rag_service():
-    global _rag_service
-    if _rag_service is None:
-        from app.services.rag import RAGService
-        _rag_service = RAGService()
-    return _rag_service
-
 @router.post("/upload", response_model=schemas.KBDocumentResponse)
 async def upload_document(
     entity_id: UUID = Form(...),
@@ -27,6 +26,7 @@ async def upload_document(
     """
     Upload a file as a KB document.
     """
+    _check_size(file)
     content = await file.read()
     # Simple text decoding for now.
     try:
@@ -54,86 +54,52 @@ async def create_document(
     """
     Create new KB document with content.
     """
-    # Upload to MinIO
-    from app.services.storage import storage_service
-    
-    file_content = await file.read()
-    file_name = f"{entity_id}/{file.filename}"
-    storage_service.upload_file(file_content, file_name, file.content_type or "application/octet-stream")
-    
-    # Extract text content
-    if file.content_type == "application/pdf":
-        try:
-            import pypdf
-            import io
-            pdf_file = io.BytesIO(file_content)
-            reader = pypdf.PdfReader(pdf_file)
-            text_content = ""
-            for page in reader.pages:
-                text_content += page.extract_text() + "\n"
-        except Exception as e:
-            print(f"Error extracting PDF: {e}")
-            text_content = f"[PDF Error] Could not extract text: {str(e)}"
-    else:
-        try:
-            text_content = file_content.decode("utf-8")
-        except:
-            text_content = f"[Binary Content] File: {file.filename}"
-
-    # Create document
-    doc_in = schemas.KBDocumentCreate(
-        title=title,
-        source=file_name, # Store MinIO path as source
-        entity_id=entity_id
-    )
-    document = await crud_knowledge.kb_document.create(db=db, obj_in=doc_in)
-    
-    # Get RAG Service (Singleton)
-    rag_service = get_rag_service()
-
-    if text_content and not text_content.startswith("[Binary Content]"):
-        chunk_size = 500
-        for i in range(0, len(text_content), chunk_size):
-            chunk_text = text_content[i:i+chunk_size]
-            
-            # Create Chunk
-            chunk_in = schemas.KBChunkCreate(
-                doc_id=document.doc_id,
-                chunk_index=i // chunk_size,
-                content=chunk_text
+    _check_size(file)
+    extractor = services.extractor
+    try:
+        # Spooled and inspected first: documents over the page limit are refused before being stored
+        async with extractor.open(file.file, file.content_type) as extraction:
+            # Upload to MinIO, streamed from the spooled upload (never held in memory whole)
+            file_name = f"{entity_id}/{file.filename}"
+            await services.storage.upload_stream(
+                file.file,
+                file_name,
+                file.content_type or "application/octet-stream",
+                length=extraction.size
             )
-            chunk = await crud_knowledge.kb_chunk.create(db=db, obj_in=chunk_in)
-            
-            # Generate Embedding
-            embedding_vector = await rag_service.embed_text(chunk_text)
-            
-            # Store Embedding
-            embedding_in = schemas.KBEmbeddingCreate(
-                chunk_id=chunk.chunk_id,
-                embedding=embedding_vector
+
+            # Create document
+            doc_in = schemas.KBDocumentCreate(
+                title=title,
+                source=file_name, # Store MinIO path as source
+                entity_id=entity_id
             )
-            await crud_knowledge.kb_embedding.create(db=db, obj_in=embedding_in)
-    
-    # Refresh document to load chunks for response
-    from sqlalchemy import select
-    from sqlalchemy.orm import selectinload
-    from app.models.knowledge import KBDocument
-    
-    query = select(KBDocument).options(selectinload(KBDocument.chunks)).filter(KBDocument.doc_id == document.doc_id)
-    result = await db.execute(query)
-    document = result.scalar_one()
+            document = await crud_knowledge.kb_document.create(db=db, obj_in=doc_in)
 
-    return document
+            # Pages are chunked (paragraphs and sentences, KB_CHUNK_TOKENS) and embedded as the process pool extracts them
+            try:
+                await _store_chunks(db, document.doc_id, chunk_pages(extractor.pages(extraction)))
+            except ExtractionError as e:
+                # Chunks of the pages read so far are kept
+                print(f"Error extracting {file_name}: {e}")
+    except DocumentTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    return await _with_chunks(db, document.doc_id)
 
 @router.get("/documents/{entity_id}", response_model=List[schemas.KBDocumentResponse])
 async def read_documents(
     entity_id: UUID,
-    db: AsyncSession = Depends(get_db)
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    page: PageParams = Depends()
 ) -> Any:
     """
     Retrieve documents for an entity.
     """
-    return await crud_knowledge.kb_document.get_by_entity_id(db=db, entity_id=entity_id)
+    return paginate(response, await crud_knowledge.kb_document.get_by_entity_id(
+        db=db, entity_id=entity_id, cursor=page.cursor, limit=page.limit
+    ))
 
 # --- Chunks ---
 @router.post("/chunks", response_model=schemas.KBChunkResponse)
@@ -150,12 +116,16 @@ async def create_chunk(
 @router.get("/chunks/{doc_id}", response_model=List[schemas.KBChunkResponse])
 async def read_chunks(
     doc_id: UUID,
-    db: AsyncSession = Depends(get_db)
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    page: PageParams = Depends()
 ) -> Any:
     """
-    Retrieve chunks for a document.
+    Retrieve chunks for a document, in document order.
     """
-    return await crud_knowledge.kb_chunk.get_by_doc_id(db=db, doc_id=doc_id)
+    return paginate(response, await crud_knowledge.kb_chunk.get_by_doc_id(
+        db=db, doc_id=doc_id, cursor=page.cursor, limit=page.limit
+    ))
 
 # --- Embeddings ---
 @router.post("/embeddings", response_model=schemas.KBEmbeddingResponse)
@@ -204,45 +174,10 @@ async def create_document_from_text(
     document = await crud_knowledge.kb_document.create(db=db, obj_in=doc_in)
 
     # Chunk and embed
-    rag_service = get_rag_service()
-
-    text_content = content or ""
-    if text_content:
-        chunk_size = 500
-        for i in range(0, len(text_content), chunk_size):
-            chunk_text = text_content[i:i+chunk_size]
-
-            # Create Chunk
-            chunk_in = schemas.KBChunkCreate(
-                doc_id=document.doc_id,
-                chunk_index=i // chunk_size,
-                content=chunk_text,
-            )
-            chunk = await crud_knowledge.kb_chunk.create(db=db, obj_in=chunk_in)
+    if content:
+        await _store_chunks(db, document.doc_id, chunk_pages(_as_pages(content)))
 
-            # Generate Embedding
-            embedding_vector = await rag_service.embed_text(chunk_text)
-
-            # Store Embedding
-            embedding_in = schemas.KBEmbeddingCreate(
-                chunk_id=chunk.chunk_id,
-                embedding=embedding_vector,
-            )
-            await crud_knowledge.kb_embedding.create(db=db, obj_in=embedding_in)
-
-    # Refresh document with chunks
-    from sqlalchemy import select
-    from sqlalchemy.orm import selectinload
-    from app.models.knowledge import KBDocument
-
-    query = (
-        select(KBDocument)
-        .options(selectinload(KBDocument.chunks))
-        .filter(KBDocument.doc_id == document.doc_id)
-    )
-    result = await db.execute(query)
-    document = result.scalar_one()
-    return document
+    return await _with_chunks(db, document.doc_id)
 
 @router.delete("/documents/{doc_id}", response_model=schemas.KBDocumentResponse)
 async def delete_document(
@@ -257,10 +192,9 @@ async def delete_document(
         raise HTTPException(status_code=404, detail="Document not found")
     
     # Delete from MinIO
-    from app.services.storage import storage_service
     if document.source:
         try:
-            storage_service.delete_file(document.source)
+            await services.storage.delete_file(document.source)
         except Exception as e:
             print(f"Error deleting file from MinIO: {e}")
             # Continue to delete from DB even if MinIO deletion fails
@@ -268,3 +202,47 @@ async def delete_document(
     # Delete from DB
     document = await crud_knowledge.kb_document.remove(db=db, id=doc_id)
     return document
+
+
+def _check_size(file: UploadFile) -> None:
+    if file.size is not None and file.size > settings.KB_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Document larger than {settings.KB_MAX_UPLOAD_BYTES} bytes")
+
+
+async def _as_pages(text: str) -> AsyncIterator[ExtractedPage]:
+    yield ExtractedPage(text)
+
+
+async def _store_chunks(db: AsyncSession, doc_id: UUID, chunks: AsyncIterator[Chunk]) -> None:
+    rag_service = services.rag
+    chunk_index = 0
+    async for piece in chunks:
+        # Create Chunk
+        chunk_in = schemas.KBChunkCreate(
+            doc_id=doc_id,
+            chunk_index=chunk_index,
+            content=piece.text,
+            page_start=piece.page_start,
+            page_end=piece.page_end,
+            heading=piece.heading,
+            token_count=piece.token_count
+        )
+        chunk = await crud_knowledge.kb_chunk.create(db=db, obj_in=chunk_in)
+        chunk_index += 1
+
+        # Generate Embedding
+        embedding_vector = await rag_service.embed_text(piece.embedding_text, priority=Priority.INGESTION)
+
+        # Store Embedding
+        embedding_in = schemas.KBEmbeddingCreate(
+            chunk_id=chunk.chunk_id,
+            embedding=embedding_vector
+        )
+        await crud_knowledge.kb_embedding.create(db=db, obj_in=embedding_in)
+
+
+async def _with_chunks(db: AsyncSession, doc_id: UUID) -> KBDocument:
+    """Document reloaded with its chunks for the response."""
+    query = select(KBDocument).options(selectinload(KBDocument.chunks)).filter(KBDocument.doc_id == doc_id)
+    result = await db.execute(query)
+    return result.scalar_one()
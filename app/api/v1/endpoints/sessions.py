@@ -1,10 +1,13 @@
 from typing import Any, List
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
+from app.core.pagination import PageParams, paginate
 from app.crud import crud_chat
 from app.schemas import chat as schemas
+from app.services.container import services
+from app.services.session_service import session_service
 
 router = APIRouter()
 
@@ -22,25 +25,29 @@ async def create_session(
 
 @router.get("/sessions", response_model=List[schemas.SessionResponse])
 async def read_sessions(
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100
+    page: PageParams = Depends()
 ) -> Any:
     """
     Retrieve sessions.
     """
-    return await crud_chat.session.get_multi(db=db, skip=skip, limit=limit)
+    return paginate(response, await crud_chat.session.get_page(db=db, cursor=page.cursor, limit=page.limit))
 
 # --- Messages for a session ---
 @router.get("/sessions/{session_id}/messages", response_model=List[schemas.MessageResponse])
 async def read_session_messages(
     session_id: UUID,
-    db: AsyncSession = Depends(get_db)
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    page: PageParams = Depends()
 ) -> Any:
     """
     Retrieve messages for a specific session.
     """
-    return await crud_chat.message.get_by_session_id(db=db, session_id=session_id)
+    return _with_audio_urls(paginate(response, await crud_chat.message.get_by_session_id(
+        db=db, session_id=session_id, cursor=page.cursor, limit=page.limit
+    )))
 
 @router.get("/sessions/{session_id}", response_model=schemas.SessionResponse)
 async def read_session(
@@ -66,6 +73,7 @@ async def delete_session(
     session = await crud_chat.session.get(db=db, id=session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
+    session_service.forget(session_id)
     return await crud_chat.session.remove(db=db, id=session_id)
 
 # --- Messages ---
@@ -83,12 +91,16 @@ async def create_message(
 @router.get("/messages/{session_id}", response_model=List[schemas.MessageResponse])
 async def read_messages(
     session_id: UUID,
-    db: AsyncSession = Depends(get_db)
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    page: PageParams = Depends()
 ) -> Any:
     """
     Retrieve messages for a session.
     """
-    return await crud_chat.message.get_by_session_id(db=db, session_id=session_id)
+    return _with_audio_urls(paginate(response, await crud_chat.message.get_by_session_id(
+        db=db, session_id=session_id, cursor=page.cursor, limit=page.limit
+    )))
 
 @router.delete("/messages/{message_id}", response_model=schemas.MessageResponse)
 async def delete_message(
@@ -102,3 +114,13 @@ async def delete_message(
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
     return await crud_chat.message.remove(db=db, id=message_id)
+
+def _with_audio_urls(messages) -> List[schemas.MessageResponse]:
+    """Message responses with the URL clients play their audio from."""
+    audio_store = services.audio_store
+    return [
+        schemas.MessageResponse.model_validate(message).model_copy(
+            update={"audio_url": audio_store.url(message.audio_path)}
+        )
+        for message in messages
+    ]
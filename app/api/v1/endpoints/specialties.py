@@ -1,10 +1,12 @@
 from typing import Any, List
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
+from app.core.pagination import PageParams, paginate
 from app.crud import crud_appointment
 from app.schemas import specialty as schemas
+from app.services.metadata_cache import metadata_cache
 
 router = APIRouter()
 
@@ -20,17 +22,19 @@ async def create_specialty(
     existing = await crud_appointment.specialty.get_by_name(db=db, name=specialty_in.name)
     if existing:
         raise HTTPException(status_code=400, detail="Specialty with this name already exists")
-    return await crud_appointment.specialty.create(db=db, obj_in=specialty_in)
+    specialty = await crud_appointment.specialty.create(db=db, obj_in=specialty_in)
+    await metadata_cache.invalidate_specialties()
+    return specialty
 
 
 @router.get("/", response_model=List[schemas.SpecialtyResponse])
 async def read_specialties(
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100
+    page: PageParams = Depends()
 ) -> Any:
     """Retrieve all specialties."""
-    return await crud_appointment.specialty.get_multi(db=db, skip=skip, limit=limit)
+    return paginate(response, await metadata_cache.get_specialty_page(db, cursor=page.cursor, limit=page.limit))
 
 
 @router.get("/{specialty_id}", response_model=schemas.SpecialtyResponse)
@@ -55,7 +59,9 @@ async def update_specialty(
     specialty = await crud_appointment.specialty.get(db=db, id=specialty_id)
     if not specialty:
         raise HTTPException(status_code=404, detail="Specialty not found")
-    return await crud_appointment.specialty.update(db=db, db_obj=specialty, obj_in=specialty_in)
+    specialty = await crud_appointment.specialty.update(db=db, db_obj=specialty, obj_in=specialty_in)
+    await metadata_cache.invalidate_specialties()
+    return specialty
 
 
 @router.delete("/{specialty_id}", response_model=schemas.SpecialtyResponse)
@@ -67,4 +73,6 @@ async def delete_specialty(
     specialty = await crud_appointment.specialty.get(db=db, id=specialty_id)
     if not specialty:
         raise HTTPException(status_code=404, detail="Specialty not found")
-    return await crud_appointment.specialty.remove(db=db, id=specialty_id)
+    specialty = await crud_appointment.specialty.remove(db=db, id=specialty_id)
+    await metadata_cache.invalidate_specialties()
+    return specialty
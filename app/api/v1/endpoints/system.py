@@ -0,0 +1,33 @@
+from typing import Any
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.core import singleflight
+from app.core.database import engine
+from app.services import openai_client
+from app.services.container import services
+from app.services.metadata_cache import metadata_cache
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def read_metrics() -> Any:
+    """Process-local runtime metrics (connection pools, rate limiters, circuit breakers, caches, storage) of this worker."""
+    return {
+        "openai_http": openai_client.metrics.snapshot(),
+        "openai_limits": {name: limiter.snapshot() for name, limiter in openai_client.limiters.items()},
+        "circuit_breakers": {name: breaker.snapshot() for name, breaker in openai_client.breakers.items()},
+        "coalescing": {name: group.stats() for name, group in singleflight.groups.items()},
+        "audio": services.audio_stats(),
+        "object_storage": services.storage_stats(),
+        "document_extraction": services.extraction_stats(),
+        "db_pool": engine.pool.status(),
+        "metadata_cache": metadata_cache.stats(),
+    }
+
+
+@router.get("/health")
+async def read_health() -> Any:
+    """Probe the database and the object storage backend; 503 when one of them is unreachable."""
+    health = await services.health()
+    return JSONResponse(health, status_code=200 if health["ok"] else 503)
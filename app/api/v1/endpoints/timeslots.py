@@ -1,13 +1,34 @@
-from typing import Any, List
+import csv
+import io
+from typing import Any, List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Response
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.pagination import PageParams, paginate
 from app.crud import crud_appointment
 from app.schemas import timeslot as schemas
 
 router = APIRouter()
 
+CSV_COLUMNS = ["doctor_id", "day_of_week", "specific_date", "start_time", "end_time", "is_recurring"]
+REQUIRED_CSV_COLUMNS = ["doctor_id", "start_time", "end_time"]
+
+
+def validate_slot(slot_in: schemas.TimeSlotCreate) -> Optional[str]:
+    """Return an error message if the slot is inconsistent, None otherwise."""
+    if slot_in.is_recurring and slot_in.day_of_week is None:
+        return "Recurring slots require day_of_week"
+    if not slot_in.is_recurring and slot_in.specific_date is None:
+        return "Non-recurring slots require specific_date"
+    if slot_in.day_of_week is not None and not 0 <= slot_in.day_of_week <= 6:
+        return "day_of_week must be between 0 (Monday) and 6 (Sunday)"
+    if slot_in.start_time >= slot_in.end_time:
+        return "start_time must be before end_time"
+    return None
+
 
 @router.post("/", response_model=schemas.TimeSlotResponse)
 async def create_time_slot(
@@ -22,21 +43,123 @@ async def create_time_slot(
         raise HTTPException(status_code=404, detail="Doctor not found")
     
     # Validate slot data
-    if slot_in.is_recurring and slot_in.day_of_week is None:
-        raise HTTPException(status_code=400, detail="Recurring slots require day_of_week")
-    if not slot_in.is_recurring and slot_in.specific_date is None:
-        raise HTTPException(status_code=400, detail="Non-recurring slots require specific_date")
+    error = validate_slot(slot_in)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
     
     return await crud_appointment.time_slot.create(db=db, obj_in=slot_in)
 
 
+@router.post("/bulk", response_model=schemas.TimeSlotBulkResponse)
+async def create_time_slots_bulk(
+    *,
+    db: AsyncSession = Depends(get_db),
+    request: Request,
+    bulk_in: schemas.TimeSlotBulkCreate,
+    skip_invalid: bool = False
+) -> Any:
+    """
+    Import many time slots at once (e.g. a hospital's weekly schedules).
+    The whole batch is validated first; by default nothing is inserted if any row is invalid.
+    """
+    _check_size(request.headers.get("content-length"))
+    _check_rows(len(bulk_in.slots))
+    rows = list(enumerate(bulk_in.slots))
+    return await _import_slots(db, rows, [], skip_invalid)
+
+
+@router.post("/import", response_model=schemas.TimeSlotBulkResponse)
+async def import_time_slots_csv(
+    *,
+    db: AsyncSession = Depends(get_db),
+    file: UploadFile = File(...),
+    skip_invalid: bool = False
+) -> Any:
+    """
+    Import time slots from a CSV file with the header
+    doctor_id,day_of_week,specific_date,start_time,end_time,is_recurring.
+    Errors are reported with the CSV line number.
+    """
+    _check_size(file.size)
+    # Read one byte past the limit: the declared size may be missing
+    content = await file.read(settings.TIMESLOT_IMPORT_MAX_BYTES + 1)
+    _check_size(len(content))
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV file must be UTF-8 encoded")
+
+    reader = csv.DictReader(io.StringIO(text))
+    missing = [c for c in REQUIRED_CSV_COLUMNS if c not in (reader.fieldnames or [])]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing CSV columns: {', '.join(missing)}")
+
+    rows = []
+    errors = []
+    for count, record in enumerate(reader, start=1):
+        _check_rows(count)
+        line = reader.line_num
+        # Empty cells mean "not set"; an empty is_recurring falls back to the schema default
+        data = {k: v.strip() for k, v in record.items() if k in CSV_COLUMNS and v and v.strip()}
+        try:
+            rows.append((line, schemas.TimeSlotCreate.model_validate(data)))
+        except ValidationError as e:
+            detail = "; ".join(f"{'.'.join(str(l) for l in err['loc'])}: {err['msg']}" for err in e.errors())
+            errors.append(schemas.TimeSlotImportError(row=line, detail=detail))
+
+    return await _import_slots(db, rows, errors, skip_invalid)
+
+
+def _check_size(size) -> None:
+    if size is not None and int(size) > settings.TIMESLOT_IMPORT_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Import larger than {settings.TIMESLOT_IMPORT_MAX_BYTES} bytes")
+
+
+def _check_rows(count: int) -> None:
+    if count > settings.TIMESLOT_IMPORT_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Import limited to {settings.TIMESLOT_IMPORT_MAX_ROWS} rows")
+
+
+async def _import_slots(
+    db: AsyncSession,
+    rows: List[tuple],
+    errors: List[schemas.TimeSlotImportError],
+    skip_invalid: bool
+) -> schemas.TimeSlotBulkResponse:
+    """Validate parsed rows, check all doctors with one query, then insert in one transaction."""
+    existing_doctors = await crud_appointment.doctor.get_existing_ids(
+        db=db, ids=[slot_in.doctor_id for _, slot_in in rows]
+    )
+
+    valid = []
+    for row, slot_in in rows:
+        error = validate_slot(slot_in)
+        if error is None and slot_in.doctor_id not in existing_doctors:
+            error = "Doctor not found"
+        if error:
+            errors.append(schemas.TimeSlotImportError(row=row, detail=error))
+        else:
+            valid.append(slot_in)
+
+    errors.sort(key=lambda e: e.row)
+    if errors and not skip_invalid:
+        raise HTTPException(status_code=422, detail=[e.model_dump() for e in errors])
+
+    created = await crud_appointment.time_slot.create_bulk(db=db, objs_in=valid) if valid else 0
+    return schemas.TimeSlotBulkResponse(created=created, errors=errors)
+
+
 @router.get("/", response_model=List[schemas.TimeSlotResponse])
 async def read_time_slots(
     doctor_id: UUID,
-    db: AsyncSession = Depends(get_db)
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    page: PageParams = Depends()
 ) -> Any:
     """Retrieve time slots for a doctor."""
-    return await crud_appointment.time_slot.get_by_doctor_id(db=db, doctor_id=doctor_id)
+    return paginate(response, await crud_appointment.time_slot.get_by_doctor_id(
+        db=db, doctor_id=doctor_id, cursor=page.cursor, limit=page.limit
+    ))
 
 
 @router.get("/{slot_id}", response_model=schemas.TimeSlotResponse)
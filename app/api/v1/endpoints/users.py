@@ -1,8 +1,9 @@
 from typing import Any, List
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
+from app.core.pagination import PageParams, paginate
 from app.crud import crud_entity
 from app.schemas import entity as schemas
 
@@ -21,14 +22,14 @@ async def create_user(
 
 @router.get("/", response_model=List[schemas.UserResponse])
 async def read_users(
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100
+    page: PageParams = Depends()
 ) -> Any:
     """
     Retrieve users.
     """
-    return await crud_entity.user.get_multi(db=db, skip=skip, limit=limit)
+    return paginate(response, await crud_entity.user.get_page(db=db, cursor=page.cursor, limit=page.limit))
 
 @router.get("/{user_id}", response_model=schemas.UserResponse)
 async def read_user(
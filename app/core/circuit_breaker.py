@@ -0,0 +1,97 @@
+import time
+from typing import Callable, Optional
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Circuit '{name}' is open, retry in {retry_in:.0f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one upstream operation.
+
+    closed: calls go through; `failure_threshold` failures in a row open it.
+    open: calls fail fast with CircuitOpenError for `recovery_timeout` seconds.
+    half_open: a single probe call is let through; its success closes the
+    circuit, its failure opens it again. Other calls keep failing fast.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go out now."""
+        if self.state == self.OPEN:
+            retry_in = self._opened_at + self.recovery_timeout - self._clock()
+            if retry_in > 0:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, retry_in)
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, 0)
+            self._probe_in_flight = True
+
+    def record(self, healthy: Optional[bool]) -> None:
+        """
+        Report the outcome of a call admitted by `before_call`.
+
+        `None` means the call says nothing about upstream health (throttled,
+        cancelled): it only frees the half-open probe.
+        """
+        self._probe_in_flight = False
+        if healthy is None:
+            return
+        if healthy:
+            if self.state != self.CLOSED:
+                print(f"Circuit '{self.name}' closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            return
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        if self.state != self.OPEN:
+            print(f"Circuit '{self.name}' opened after {self.failures} failure(s)")
+            self.times_opened += 1
+        self.state = self.OPEN
+        self._opened_at = self._clock()
+
+    def snapshot(self) -> dict:
+        retry_in = None
+        if self.state == self.OPEN:
+            retry_in = round(max(self._opened_at + self.recovery_timeout - self._clock(), 0.0), 1)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_in": retry_in,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
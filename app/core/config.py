@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import PostgresDsn, computed_field
-from typing import Optional
+from typing import Dict, Literal, Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Tontouma Voice Chatbot"
@@ -15,12 +15,137 @@ class Settings(BaseSettings):
     OPENAI_MODEL: str = "gpt-4o"
     UPLOAD_DIR: str = "uploads"
 
+    # Voice uploads
+    AUDIO_UPLOAD_MAX_BYTES: int = 25 * 1024 * 1024  # Whisper rejects larger files
+    AUDIO_UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+    AUDIO_IO_THREADS: int = 4  # Thread pool for audio file writes
+    SPEECH_STREAM_TTL_SECONDS: int = 120  # Finished TTS audio kept in memory for /chat/tts readers
+
+    # Speech-to-text pre-processing of WAV recordings (16 kHz mono, energy VAD)
+    STT_VAD_ENABLED: bool = True
+    VAD_THRESHOLD_DB: float = 12.0  # Speech level above the estimated noise floor
+    VAD_PADDING_MS: int = 200  # Audio kept around speech
+    VAD_MAX_PAUSE_MS: int = 1000  # Longer pauses are shortened to this
+    VAD_MIN_SPEECH_MS: int = 150  # Clips with less speech skip STT
+
+    # Background Opus/Ogg transcoding of stored audio (needs ffmpeg)
+    TRANSCODE_ENABLED: bool = True
+    FFMPEG_PATH: str = "ffmpeg"
+    TRANSCODE_WORKERS: int = 2
+    TRANSCODE_QUEUE_SIZE: int = 1000
+    TRANSCODE_DELAY_SECONDS: float = 300.0  # Lets the client play the original file first
+    AUDIO_STORAGE_BITRATE: str = "24k"  # User recordings
+    TTS_BITRATE: str = "32k"  # Stored TTS answers
+
+    # Where chat audio is kept: "local" (UPLOAD_DIR, served under /uploads) or "minio" (the
+    # STORAGE_BACKEND object storage, URLs in responses)
+    AUDIO_STORAGE: Literal["local", "minio"] = "local"
+    AUDIO_PUBLIC_BASE_URL: Optional[str] = None  # CDN / public bucket URL; presigned URLs otherwise
+    AUDIO_URL_EXPIRY_SECONDS: int = 24 * 3600
+    AUDIO_CACHE_CONTROL: str = "public, max-age=31536000, immutable"  # Objects are content-addressed
+
+    # Retention of UPLOAD_DIR audio: orphan cleanup, archiving to MinIO, expiry
+    AUDIO_RETENTION_ENABLED: bool = True
+    AUDIO_RETENTION_INTERVAL_SECONDS: float = 3600.0
+    AUDIO_RETENTION_GRACE_SECONDS: float = 3600.0  # Newer files are never touched (uncommitted turns, transcoding)
+    AUDIO_RETENTION_BATCH_SIZE: int = 500  # Paths checked against messages per query
+    AUDIO_ARCHIVE_AFTER_DAYS: Optional[float] = None  # Move to MinIO after this age, None: keep local
+    AUDIO_MAX_LOCAL_BYTES: Optional[int] = None  # Oldest audio archived (or deleted) above this size
+    AUDIO_RETENTION_DAYS: Optional[float] = None  # Delete audio (local or archived) after this age, None: forever
+
+    # Inference providers: "openai", "stub" (offline, deterministic) or "local" (CPU embeddings)
+    EMBEDDING_PROVIDER: Literal["openai", "stub", "local"] = "openai"
+    STT_PROVIDER: Literal["openai", "stub"] = "openai"
+    TTS_PROVIDER: Literal["openai", "stub"] = "openai"
+    LLM_PROVIDER: Literal["openai", "stub"] = "openai"
+    STUB_LATENCY_MS: Dict[str, int] = {"embeddings": 30, "chat": 800, "stt": 500, "tts": 400}
+    STUB_TRANSCRIPTION: str = "Bonjour, quels sont les horaires de visite ?"
+    LOCAL_EMBEDDING_MODEL: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+    LOCAL_EMBEDDING_THREADS: int = 2
+
+    # Shared OpenAI HTTP transport
+    OPENAI_HTTP2: bool = True
+    OPENAI_MAX_CONNECTIONS: int = 100
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 50
+    OPENAI_KEEPALIVE_EXPIRY: float = 60.0  # Seconds an idle connection stays pooled
+    OPENAI_CONNECT_TIMEOUT: float = 5.0
+    OPENAI_TIMEOUT_EMBEDDINGS: float = 10.0
+    OPENAI_TIMEOUT_CHAT: float = 45.0
+    OPENAI_TIMEOUT_STT: float = 60.0
+    OPENAI_TIMEOUT_TTS: float = 60.0
+
+    # OpenAI rate limiting (per operation)
+    OPENAI_MAX_CONCURRENCY_CHAT: int = 32
+    OPENAI_MAX_CONCURRENCY_EMBEDDINGS: int = 16
+    OPENAI_MAX_CONCURRENCY_STT: int = 8
+    OPENAI_MAX_CONCURRENCY_TTS: int = 8
+    OPENAI_TOKENS_PER_MINUTE_CHAT: Optional[int] = None  # Account TPM limit, None: rely on headers only
+    OPENAI_TOKENS_PER_MINUTE_EMBEDDINGS: Optional[int] = None
+    OPENAI_MAX_RETRIES: int = 4
+    OPENAI_RETRY_BASE_DELAY: float = 0.5
+    OPENAI_RETRY_MAX_DELAY: float = 20.0
+
+    # Circuit breakers (per operation) and degraded chat answers
+    CIRCUIT_FAILURE_THRESHOLD: int = 5  # Consecutive failures that open the circuit
+    CIRCUIT_RECOVERY_SECONDS: float = 30.0  # Open time before a half-open probe
+    DEGRADED_ANSWER_CACHE_SECONDS: int = 3600  # Recent answers reused while the LLM is down
+
+    # Object storage (knowledge files, chat audio): "minio", "local" (directory served under
+    # STORAGE_LOCAL_URL, single node) or "memory" (tests, offline benchmarks)
+    STORAGE_BACKEND: Literal["minio", "local", "memory"] = "minio"
+    STORAGE_LOCAL_DIR: str = "storage"
+    STORAGE_LOCAL_URL: str = "/storage"
+    STORAGE_HEALTH_TIMEOUT_SECONDS: float = 3.0
+
     # MinIO
     MINIO_ENDPOINT: str = "localhost:9100" # External access
     MINIO_ACCESS_KEY: str = "minioadmin"
     MINIO_SECRET_KEY: str = "minioadmin"
     MINIO_BUCKET: str = "tontouma-knowledge"
     MINIO_SECURE: bool = False
+    MINIO_REGION: str = "us-east-1"
+    MINIO_IO_THREADS: int = 8  # Blocking client calls in flight per worker (and HTTP connections)
+    MINIO_PART_SIZE: int = 8 * 1024 * 1024  # Multipart upload part (min 5 MiB), the memory an upload uses
+    MINIO_CONNECT_TIMEOUT: float = 5.0
+    MINIO_READ_TIMEOUT: float = 60.0
+    MINIO_URL_CACHE_SIZE: int = 10000  # Presigned URLs reused until close to expiry
+    MINIO_URL_MIN_VALIDITY_SECONDS: int = 3600
+
+    # Knowledge documents: limits and text extraction (PDF parsing in a process pool)
+    KB_MAX_UPLOAD_BYTES: int = 50 * 1024 * 1024
+    KB_MAX_PAGES: int = 2000
+    KB_EXTRACT_WORKERS: int = 2  # Processes parsing PDFs, shared by every upload of the worker
+    KB_EXTRACT_PAGES_PER_TASK: int = 20  # PDF page range parsed by one process task
+    KB_EXTRACT_PARALLEL_RANGES: int = 4  # Page ranges of one document parsed at once
+    # Chunks cut at paragraph / sentence boundaries, sized in embedding model tokens
+    KB_CHUNK_TOKENS: int = 200
+    KB_CHUNK_OVERLAP_TOKENS: int = 30  # Trailing sentences repeated at the start of the next chunk
+
+    # Connections opened at startup so the first request doesn't pay for them
+    WARMUP_DB_CONNECTIONS: int = 5
+    WARMUP_TIMEOUT_SECONDS: float = 10.0
+
+    # Chat sessions
+    SESSION_TTL_MINUTES: int = 30  # Inactivity before a kiosk conversation expires
+    SESSION_CACHE_SIZE: int = 10000
+
+    # Instance / entity / specialty metadata cache
+    METADATA_CACHE_TTL_SECONDS: int = 300
+    METADATA_CACHE_SIZE: int = 10000
+    METADATA_INVALIDATION_CHANNEL: Optional[str] = None  # Postgres NOTIFY channel shared by workers
+
+    # Doctor search
+    DOCTOR_SEARCH_LIMIT: int = 10
+
+    # Time slot imports (/timeslots/bulk and /timeslots/import)
+    TIMESLOT_IMPORT_MAX_BYTES: int = 5 * 1024 * 1024
+    TIMESLOT_IMPORT_MAX_ROWS: int = 10000
+
+    # Availability engine
+    AVAILABILITY_SEARCH_DAYS: int = 14  # Default horizon when no date is given
+    AVAILABILITY_SUGGESTION_LIMIT: int = 15  # Slots returned to the chatbot per call
+    AVAILABILITY_WINDOW_DAYS: int = 7  # Days of appointments loaded per query
+    AVAILABILITY_MAX_RANGE_DAYS: int = 92
 
     @computed_field
     @property
@@ -0,0 +1,57 @@
+import base64
+import json
+from typing import Any, List, NamedTuple, Optional, Sequence
+from fastapi import Query, Response
+
+# List endpoints return a plain JSON array; the token for the next page (if any)
+# travels in this response header so existing clients keep working unchanged.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str] = None
+
+
+class PageParams:
+    """Common `cursor` / `limit` query parameters of list endpoints."""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+    ):
+        self.cursor = cursor
+        self.limit = limit
+
+
+def paginate(response: Response, page: Page) -> List[Any]:
+    """Expose the next cursor as a header and return the page items as the body."""
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key of the last returned row into an opaque token."""
+    raw = json.dumps(list(values), default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> List[Any]:
+    """Decode a token produced by `encode_cursor`, expecting `size` key values."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorError("Invalid cursor")
+    return values
@@ -0,0 +1,207 @@
+import asyncio
+import heapq
+import itertools
+import re
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Callable, Mapping, Optional
+
+
+class Priority(IntEnum):
+    """Lower runs first when callers are queued on the same limiter."""
+    INTERACTIVE = 0  # A kiosk user is waiting on the answer
+    NORMAL = 5
+    INGESTION = 10  # Knowledge base imports, batch jobs
+
+
+class TokenBucket:
+    """Per-minute budget refilled continuously; `rate=None` means unlimited."""
+
+    def __init__(self, rate_per_minute: Optional[int], clock: Callable[[], float] = time.monotonic):
+        self.rate = rate_per_minute
+        self._clock = clock
+        self.level = float(rate_per_minute or 0)
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        if self.rate:
+            self.level = min(float(self.rate), self.level + (now - self._updated) * self.rate / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be consumed (0 if it can be now)."""
+        if not self.rate:
+            return 0.0
+        self._refill()
+        # A request larger than the whole budget only waits for a full bucket
+        missing = min(amount, self.rate) - self.level
+        return max(missing, 0.0) * 60 / self.rate
+
+    def consume(self, amount: float) -> None:
+        if self.rate:
+            self._refill()
+            self.level -= min(amount, self.rate)
+
+    def cap(self, remaining: float) -> None:
+        """Align the local budget with the remaining budget reported by the server."""
+        if self.rate:
+            self._refill()
+            self.level = min(self.level, remaining)
+
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """Parse rate-limit reset durations such as "1s", "6m0s" or "20ms" into seconds."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _UNITS[unit] for amount, unit in parts)
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency and token-rate limiter for one upstream operation.
+
+    Callers are admitted in priority order, then FIFO. The concurrency limit
+    adapts AIMD-style: it halves when the upstream throttles and grows back by
+    about one slot per window of successful calls, up to `max_concurrency`.
+    Rate-limit response headers pause admission until the reported reset.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        tokens_per_minute: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self._clock = clock
+        self._tokens = TokenBucket(tokens_per_minute, clock)
+        self._paused_until = 0.0
+        self._waiters: list = []  # heap of (priority, seq, tokens, future)
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.admitted = 0
+        self.throttled = 0
+        self.retries = 0
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.NORMAL, tokens: float = 0):
+        await self._acquire(priority, tokens)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._dispatch()
+
+    async def _acquire(self, priority: Priority, tokens: float) -> None:
+        if not self._waiters and self._wait_time(tokens) == 0:
+            self._admit(tokens)
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._seq), tokens, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just before being cancelled: give the slot back
+                self.in_flight -= 1
+                self._dispatch()
+            raise
+
+    def _wait_time(self, tokens: float) -> float:
+        """0 if a call needing `tokens` can start now, else seconds to wait (inf: wait for a release)."""
+        if self.in_flight >= max(int(self.limit), 1):
+            return float("inf")
+        return max(self._paused_until - self._clock(), self._tokens.wait_time(tokens), 0.0)
+
+    def _admit(self, tokens: float) -> None:
+        self.in_flight += 1
+        self.admitted += 1
+        self._tokens.consume(tokens)
+
+    def _dispatch(self) -> None:
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            wait = self._wait_time(tokens)
+            if wait:
+                if wait != float("inf"):
+                    self._schedule(wait)
+                return
+            heapq.heappop(self._waiters)
+            self._admit(tokens)
+            future.set_result(None)
+
+    def _schedule(self, delay: float) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    # --- Feedback from upstream ---
+
+    def on_success(self) -> None:
+        self.limit = min(float(self.max_concurrency), self.limit + 1 / max(self.limit, 1))
+
+    def on_throttled(self, pause: float) -> None:
+        self.throttled += 1
+        self.limit = max(1.0, self.limit / 2)
+        self.pause(pause)
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    def observe_headers(self, headers: Mapping[str, str]) -> None:
+        """Apply the x-ratelimit-* headers of an upstream response."""
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        if remaining_requests is not None and remaining_requests.strip() == "0":
+            reset = parse_reset(headers.get("x-ratelimit-reset-requests"))
+            if reset:
+                self.pause(reset)
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        if remaining_tokens is not None:
+            try:
+                self._tokens.cap(float(remaining_tokens))
+            except ValueError:
+                pass
+
+    def snapshot(self) -> dict:
+        queued: dict = {}
+        for priority, _, _, future in self._waiters:
+            if not future.done():
+                name = Priority(priority).name.lower()
+                queued[name] = queued.get(name, 0) + 1
+        return {
+            "concurrency_limit": round(self.limit, 2),
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queue_depth": sum(queued.values()),
+            "queued_by_priority": queued,
+            "paused_for": round(max(self._paused_until - self._clock(), 0.0), 3),
+            "tokens_available": round(self._tokens.level) if self._tokens.rate else None,
+            "admitted": self.admitted,
+            "throttled": self.throttled,
+            "retries": self.retries,
+        }
@@ -0,0 +1,46 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+# Every group by name, for /system/metrics
+groups: Dict[str, "SingleFlight"] = {}
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one upstream call.
+
+    The first caller starts the work as a task; callers arriving while it runs
+    await the same task. The task is shielded, so a caller that gives up (client
+    disconnect) does not cancel the work the others are waiting on. Nothing is
+    kept once the task finishes: this dedupes in-flight work, it is not a cache.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.shared = 0
+        groups[name] = self
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every waiter went away
+            task.exception()
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._calls), "calls": self.calls, "shared": self.shared}
@@ -1,8 +1,12 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from datetime import datetime
+from typing import Any, Dict, Generic, List, Optional, Sequence, Type, TypeVar, Union
 from uuid import UUID
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import select, inspect, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursorError, Page, encode_cursor, decode_cursor
+)
 from app.models.base import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
@@ -14,21 +18,80 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         self.model = model
 
     async def get(self, db: AsyncSession, id: UUID) -> Optional[ModelType]:
-        result = await db.execute(select(self.model).filter(self.model.entity_id == id if hasattr(self.model, 'entity_id') and self.model.__tablename__ == 'entities' else self.model.instance_id == id if hasattr(self.model, 'instance_id') and self.model.__tablename__ == 'instances' else self.model.user_id == id if hasattr(self.model, 'user_id') and self.model.__tablename__ == 'users' else self.model.session_id == id if hasattr(self.model, 'session_id') and self.model.__tablename__ == 'sessions' else self.model.message_id == id if hasattr(self.model, 'message_id') and self.model.__tablename__ == 'messages' else self.model.doc_id == id if hasattr(self.model, 'doc_id') and self.model.__tablename__ == 'kb_documents' else self.model.chunk_id == id if hasattr(self.model, 'chunk_id') and self.model.__tablename__ == 'kb_chunks' else None))
-        # The above logic is a bit hacky for a generic base, usually we pass the PK column name or assume 'id'. 
-        # Given our models have different PK names (entity_id, instance_id, etc.), we should probably override `get` in subclasses or make it smarter.
-        # Let's try a simpler approach: assume the caller knows how to filter or we use a standard 'id' field if possible, 
-        # but our models don't use 'id'.
-        # Better approach: Use `db.get(self.model, id)` which works with PKs automatically.
+        # Our models have different PK names (entity_id, instance_id, ...); db.get resolves the PK itself.
         return await db.get(self.model, id)
 
+    @property
+    def sort_columns(self) -> List[Any]:
+        """Stable ordering used for pagination: (created_at, pk), or just pk for models without timestamps."""
+        pk = inspect(self.model).primary_key[0]
+        if hasattr(self.model, "created_at"):
+            return [self.model.created_at, pk]
+        return [pk]
+
     async def get_multi(
         self, db: AsyncSession, *, skip: int = 0, limit: int = 100
     ) -> List[ModelType]:
-        query = select(self.model).offset(skip).limit(limit)
+        query = select(self.model).order_by(*self.sort_columns).offset(skip).limit(min(limit, MAX_PAGE_SIZE))
         result = await db.execute(query)
         return result.scalars().all()
 
+    async def get_page(
+        self,
+        db: AsyncSession,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        filters: Sequence[Any] = (),
+        options: Sequence[Any] = ()
+    ) -> Page:
+        """
+        Keyset pagination on (created_at, pk): every page costs one index range scan,
+        however deep it is. Returns the rows and an opaque cursor for the next page.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        columns = self.sort_columns
+        query = select(self.model).filter(*filters).options(*options)
+        if cursor:
+            values = self._decode_sort_key(cursor, columns)
+            query = query.filter(tuple_(*columns) > tuple_(*values))
+        query = query.order_by(*columns).limit(limit + 1)
+
+        result = await db.execute(query)
+        items = result.scalars().all()
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            next_cursor = encode_cursor([
+                self._encode_value(getattr(last, column.key)) for column in columns
+            ])
+        return Page(items=list(items), next_cursor=next_cursor)
+
+    @staticmethod
+    def _encode_value(value: Any) -> Any:
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, UUID):
+            return str(value)
+        return value
+
+    @staticmethod
+    def _decode_sort_key(cursor: str, columns: List[Any]) -> List[Any]:
+        values = decode_cursor(cursor, len(columns))
+        try:
+            decoded = []
+            for column, value in zip(columns, values):
+                python_type = column.type.python_type
+                if python_type is datetime:
+                    decoded.append(datetime.fromisoformat(value))
+                else:
+                    decoded.append(python_type(value))
+            return decoded
+        except (TypeError, ValueError) as e:
+            raise InvalidCursorError("Invalid cursor") from e
+
     async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = obj_in.model_dump()
         db_obj = self.model(**obj_in_data)
@@ -1,8 +1,10 @@
-from typing import List, Optional
+import uuid
+from typing import Iterable, List, Optional, Set
 from uuid import UUID
-from sqlalchemy import select
+from sqlalchemy import select, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.pagination import DEFAULT_PAGE_SIZE, Page
 from app.crud.base import CRUDBase
 from app.models.specialty import Specialty
 from app.models.doctor import Doctor
@@ -25,54 +27,91 @@ class CRUDDoctor(CRUDBase[Doctor, DoctorCreate, DoctorUpdate]):
         result = await db.execute(select(Doctor).filter(Doctor.email == email))
         return result.scalars().first()
 
-    async def get_by_entity_id(self, db: AsyncSession, *, entity_id: UUID) -> List[Doctor]:
-        result = await db.execute(
-            select(Doctor).filter(Doctor.entity_id == entity_id, Doctor.is_active == True)
+    async def get_existing_ids(self, db: AsyncSession, *, ids: Iterable[UUID]) -> Set[UUID]:
+        """Return the subset of `ids` that belong to an existing doctor, in one query."""
+        ids = set(ids)
+        if not ids:
+            return set()
+        result = await db.execute(select(Doctor.doctor_id).filter(Doctor.doctor_id.in_(ids)))
+        return set(result.scalars().all())
+
+    async def get_by_entity_id(
+        self, db: AsyncSession, *, entity_id: UUID, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> Page:
+        return await self.get_page(
+            db, cursor=cursor, limit=limit,
+            filters=[Doctor.entity_id == entity_id, Doctor.is_active == True]
         )
-        return result.scalars().all()
 
-    async def get_by_specialty(self, db: AsyncSession, *, entity_id: UUID, specialty_id: UUID) -> List[Doctor]:
-        result = await db.execute(
-            select(Doctor).filter(
+    async def get_by_specialty(
+        self, db: AsyncSession, *, entity_id: UUID, specialty_id: UUID,
+        cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> Page:
+        return await self.get_page(
+            db, cursor=cursor, limit=limit,
+            filters=[
                 Doctor.entity_id == entity_id,
                 Doctor.specialty_id == specialty_id,
                 Doctor.is_active == True
-            )
+            ]
         )
-        return result.scalars().all()
 
 
 class CRUDTimeSlot(CRUDBase[TimeSlot, TimeSlotCreate, TimeSlotUpdate]):
-    async def get_by_doctor_id(self, db: AsyncSession, *, doctor_id: UUID) -> List[TimeSlot]:
-        result = await db.execute(
-            select(TimeSlot).filter(TimeSlot.doctor_id == doctor_id, TimeSlot.is_active == True)
+    # Rows per multi-row INSERT, well below asyncpg's 32767 bind parameter limit
+    bulk_batch_size = 2000
+
+    async def create_bulk(self, db: AsyncSession, *, objs_in: List[TimeSlotCreate]) -> int:
+        """Insert all slots with multi-row INSERTs inside a single transaction."""
+        rows = [
+            {**obj_in.model_dump(), "slot_id": uuid.uuid4(), "is_active": True}
+            for obj_in in objs_in
+        ]
+        try:
+            for i in range(0, len(rows), self.bulk_batch_size):
+                await db.execute(insert(TimeSlot).values(rows[i:i + self.bulk_batch_size]))
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        return len(rows)
+
+    async def get_by_doctor_id(
+        self, db: AsyncSession, *, doctor_id: UUID, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> Page:
+        return await self.get_page(
+            db, cursor=cursor, limit=limit,
+            filters=[TimeSlot.doctor_id == doctor_id, TimeSlot.is_active == True]
         )
-        return result.scalars().all()
 
 
 class CRUDAppointment(CRUDBase[Appointment, AppointmentCreate, AppointmentUpdate]):
-    async def get_by_doctor_id(self, db: AsyncSession, *, doctor_id: UUID) -> List[Appointment]:
-        result = await db.execute(
-            select(Appointment).filter(Appointment.doctor_id == doctor_id)
+    async def get_by_doctor_id(
+        self, db: AsyncSession, *, doctor_id: UUID, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> Page:
+        return await self.get_page(
+            db, cursor=cursor, limit=limit, filters=[Appointment.doctor_id == doctor_id]
         )
-        return result.scalars().all()
 
-    async def get_by_doctor_and_date(self, db: AsyncSession, *, doctor_id: UUID, date) -> List[Appointment]:
+    async def get_by_doctor_and_date(
+        self, db: AsyncSession, *, doctor_id: UUID, date, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> Page:
         from app.models.appointment import AppointmentStatus
-        result = await db.execute(
-            select(Appointment).filter(
+        return await self.get_page(
+            db, cursor=cursor, limit=limit,
+            filters=[
                 Appointment.doctor_id == doctor_id,
                 Appointment.date == date,
                 Appointment.status != AppointmentStatus.CANCELLED
-            )
+            ]
         )
-        return result.scalars().all()
 
-    async def get_by_session_id(self, db: AsyncSession, *, session_id: UUID) -> List[Appointment]:
-        result = await db.execute(
-            select(Appointment).filter(Appointment.session_id == session_id)
+    async def get_by_session_id(
+        self, db: AsyncSession, *, session_id: UUID, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> Page:
+        return await self.get_page(
+            db, cursor=cursor, limit=limit, filters=[Appointment.session_id == session_id]
         )
-        return result.scalars().all()
 
 
 # Singleton instances
@@ -1,7 +1,8 @@
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.pagination import DEFAULT_PAGE_SIZE, Page
 from app.crud.base import CRUDBase
 from app.models.chat import Session, Message
 from app.schemas.chat import SessionCreate, MessageCreate, MessageBase
@@ -10,10 +11,23 @@ class CRUDSession(CRUDBase[Session, SessionCreate, SessionCreate]): # Update sch
     pass
 
 class CRUDMessage(CRUDBase[Message, MessageCreate, MessageBase]):
-    async def get_by_session_id(self, db: AsyncSession, *, session_id: UUID) -> List[Message]:
-        query = select(self.model).filter(self.model.session_id == session_id)
+    async def get_by_session_id(
+        self, db: AsyncSession, *, session_id: UUID, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> Page:
+        return await self.get_page(
+            db, cursor=cursor, limit=limit, filters=[self.model.session_id == session_id]
+        )
+
+    async def get_recent_by_session_id(self, db: AsyncSession, *, session_id: UUID, limit: int) -> List[Message]:
+        """Last `limit` messages of a session, oldest first (for prompt history)."""
+        query = (
+            select(self.model)
+            .filter(self.model.session_id == session_id)
+            .order_by(self.model.created_at.desc(), self.model.message_id.desc())
+            .limit(limit)
+        )
         result = await db.execute(query)
-        return result.scalars().all()
+        return list(reversed(result.scalars().all()))
 
 session = CRUDSession(Session)
 message = CRUDMessage(Message)
@@ -1,23 +1,35 @@
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from app.core.pagination import DEFAULT_PAGE_SIZE, Page
 from app.crud.base import CRUDBase
 from app.models.knowledge import KBDocument, KBChunk, KBEmbedding
 from app.schemas.knowledge import KBDocumentCreate, KBChunkCreate, KBEmbeddingCreate
 
 class CRUDKBDocument(CRUDBase[KBDocument, KBDocumentCreate, KBDocumentCreate]):
-    async def get_by_entity_id(self, db: AsyncSession, *, entity_id: UUID) -> List[KBDocument]:
-        query = select(self.model).options(selectinload(self.model.chunks)).filter(self.model.entity_id == entity_id)
-        result = await db.execute(query)
-        return result.scalars().all()
+    async def get_by_entity_id(
+        self, db: AsyncSession, *, entity_id: UUID, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> Page:
+        return await self.get_page(
+            db,
+            cursor=cursor,
+            limit=limit,
+            filters=[self.model.entity_id == entity_id],
+            options=[selectinload(self.model.chunks)]
+        )
 
 class CRUDKBChunk(CRUDBase[KBChunk, KBChunkCreate, KBChunkCreate]):
-    async def get_by_doc_id(self, db: AsyncSession, *, doc_id: UUID) -> List[KBChunk]:
-        query = select(self.model).filter(self.model.doc_id == doc_id)
-        result = await db.execute(query)
-        return result.scalars().all()
+    @property
+    def sort_columns(self):
+        # Chunks read back in document order
+        return [self.model.chunk_index, self.model.chunk_id]
+
+    async def get_by_doc_id(
+        self, db: AsyncSession, *, doc_id: UUID, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> Page:
+        return await self.get_page(db, cursor=cursor, limit=limit, filters=[self.model.doc_id == doc_id])
 
 class CRUDKBEmbedding(CRUDBase[KBEmbedding, KBEmbeddingCreate, KBEmbeddingCreate]):
     pass
@@ -1,13 +1,29 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import RedirectResponse
 from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER, InvalidCursorError
 from app.api.v1.api import api_router
+from app.services.container import services
+from app.services.metadata_cache import metadata_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await services.start()
+    await metadata_cache.start_listener()
+    yield
+    await metadata_cache.stop_listener()
+    await services.close()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"/api/v1/openapi.json"
+    openapi_url=f"/api/v1/openapi.json",
+    lifespan=lifespan
 )
 
 # Set all CORS enabled origins
@@ -18,12 +34,19 @@ if True: # settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
     )
 
 app.include_router(api_router, prefix="/api/v1")
 
-# Serve uploaded files (audio) statically
-app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
+# Serve uploaded files (audio) statically; with object storage clients get MinIO/CDN URLs instead
+if settings.AUDIO_STORAGE == "local":
+    app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
+
+# Objects of the local-directory storage backend
+if settings.STORAGE_BACKEND == "local":
+    os.makedirs(settings.STORAGE_LOCAL_DIR, exist_ok=True)
+    app.mount(settings.STORAGE_LOCAL_URL, StaticFiles(directory=settings.STORAGE_LOCAL_DIR), name="storage")
 
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
@@ -54,6 +77,10 @@ async def validation_exception_handler(request, exc):
         content={"detail": jsonable_encoder(errors)},
     )
 
+@app.exception_handler(InvalidCursorError)
+async def invalid_cursor_handler(request, exc):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
 @app.get("/")
 async def root():
     return RedirectResponse(url="/admin")
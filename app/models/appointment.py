@@ -2,7 +2,7 @@ import uuid
 from typing import Optional
 from datetime import datetime, date, time
 from enum import Enum as PyEnum
-from sqlalchemy import String, Text, ForeignKey, Date, Time, Enum
+from sqlalchemy import String, Text, ForeignKey, Date, Time, Enum, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.models.base import Base, TimestampMixin
@@ -45,3 +45,8 @@ class Appointment(Base, TimestampMixin):
     # Relations
     doctor: Mapped["Doctor"] = relationship(back_populates="appointments")
     session: Mapped[Optional["Session"]] = relationship()
+
+    __table_args__ = (
+        Index("ix_appointments_doctor_date", "doctor_id", "date"),
+        Index("ix_appointments_session_id", "session_id"),
+    )
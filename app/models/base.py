@@ -10,3 +10,10 @@ class TimestampMixin:
         server_default=func.now(), 
         nullable=False
     )
+
+def search_normalized(expr):
+    """Accent- and case-insensitive form of a text expression, as indexed by the pg_trgm indexes.
+
+    `immutable_unaccent` is created by the doctor search migration (and by scripts/init_db.py).
+    """
+    return func.immutable_unaccent(func.lower(expr))
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from typing import List, Optional
-from sqlalchemy import String, Text, ForeignKey, Integer, Boolean, DateTime
+from sqlalchemy import String, Text, ForeignKey, Integer, Boolean, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 from pgvector.sqlalchemy import Vector
@@ -23,6 +23,8 @@ class Session(Base, TimestampMixin):
     session_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     entity_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("entities.entity_id"), nullable=False)
     speaker_id: Mapped[Optional[uuid.UUID]] = mapped_column(ForeignKey("speakers.speaker_id"), nullable=True)
+    # Kiosk that opened the session (chat sessions are per kiosk, not shared per entity)
+    instance_id: Mapped[Optional[uuid.UUID]] = mapped_column(ForeignKey("instances.instance_id"), nullable=True)
     expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
 
@@ -32,6 +34,10 @@ class Session(Base, TimestampMixin):
     messages: Mapped[List["Message"]] = relationship(back_populates="session", cascade="all, delete-orphan")
     analytics: Mapped[List["Analytics"]] = relationship(back_populates="session")
 
+    __table_args__ = (
+        Index("ix_sessions_entity_speaker_active", "entity_id", "speaker_id", "is_active", "created_at"),
+    )
+
 class Message(Base, TimestampMixin):
     __tablename__ = "messages"
 
@@ -46,3 +52,14 @@ class Message(Base, TimestampMixin):
     # Relations
     session: Mapped["Session"] = relationship(back_populates="messages")
     instance: Mapped["Instance"] = relationship(back_populates="messages")
+
+    __table_args__ = (
+        # Serves session history and keyset pagination on (created_at, message_id)
+        Index("ix_messages_session_created", "session_id", "created_at", "message_id"),
+        # Audio retention: batched "is this file still referenced" checks and archived-path scans
+        Index(
+            "ix_messages_audio_path", "audio_path",
+            postgresql_ops={"audio_path": "text_pattern_ops"},
+            postgresql_where=audio_path.isnot(None),
+        ),
+    )
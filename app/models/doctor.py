@@ -1,9 +1,9 @@
 import uuid
 from typing import List, Optional
-from sqlalchemy import String, Text, ForeignKey, Integer, Boolean
+from sqlalchemy import String, Text, ForeignKey, Integer, Boolean, Index, literal_column
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
-from app.models.base import Base, TimestampMixin
+from app.models.base import Base, TimestampMixin, search_normalized
 
 
 class Doctor(Base, TimestampMixin):
@@ -29,3 +29,21 @@ class Doctor(Base, TimestampMixin):
     specialty: Mapped[Optional["Specialty"]] = relationship(back_populates="doctors")
     time_slots: Mapped[List["TimeSlot"]] = relationship(back_populates="doctor", cascade="all, delete-orphan")
     appointments: Mapped[List["Appointment"]] = relationship(back_populates="doctor", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index("ix_doctors_entity_specialty", "entity_id", "specialty_id"),
+    )
+
+    @classmethod
+    def full_name_expr(cls):
+        """SQL expression matching the indexed `first_name last_name` form."""
+        return cls.first_name + literal_column("' '") + cls.last_name
+
+
+# Trigram index backing accent-insensitive, typo-tolerant doctor name search
+Index(
+    "ix_doctors_full_name_trgm",
+    search_normalized(Doctor.full_name_expr()).label("full_name_norm"),
+    postgresql_using="gin",
+    postgresql_ops={"full_name_norm": "gin_trgm_ops"},
+)
@@ -1,6 +1,6 @@
 import uuid
 from typing import List, Optional
-from sqlalchemy import String, Text, ForeignKey, Integer
+from sqlalchemy import String, Text, ForeignKey, Integer, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 from pgvector.sqlalchemy import Vector
@@ -18,6 +18,10 @@ class KBDocument(Base, TimestampMixin):
     entity: Mapped["Entity"] = relationship(back_populates="kb_documents")
     chunks: Mapped[List["KBChunk"]] = relationship(back_populates="document", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_kb_documents_entity_created", "entity_id", "created_at", "doc_id"),
+    )
+
 class KBChunk(Base, TimestampMixin):
     __tablename__ = "kb_chunks"
 
@@ -25,11 +29,20 @@ class KBChunk(Base, TimestampMixin):
     doc_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("kb_documents.doc_id"), nullable=False)
     chunk_index: Mapped[int] = mapped_column(Integer, nullable=False)
     content: Mapped[str] = mapped_column(Text, nullable=False)
+    # Where the chunk comes from: PDF pages and the section heading above it
+    page_start: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    page_end: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    heading: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    token_count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
 
     # Relations
     document: Mapped["KBDocument"] = relationship(back_populates="chunks")
     embedding: Mapped[Optional["KBEmbedding"]] = relationship(back_populates="chunk", uselist=False, cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_kb_chunks_doc_index", "doc_id", "chunk_index"),
+    )
+
 class KBEmbedding(Base):
     __tablename__ = "kb_embeddings"
 
@@ -1,9 +1,9 @@
 import uuid
 from typing import List, Optional
-from sqlalchemy import String, Text
+from sqlalchemy import String, Text, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
-from app.models.base import Base, TimestampMixin
+from app.models.base import Base, TimestampMixin, search_normalized
 
 
 class Specialty(Base, TimestampMixin):
@@ -16,3 +16,12 @@ class Specialty(Base, TimestampMixin):
 
     # Relations
     doctors: Mapped[List["Doctor"]] = relationship(back_populates="specialty")
+
+
+# Trigram index backing accent-insensitive, typo-tolerant specialty search
+Index(
+    "ix_specialties_name_trgm",
+    search_normalized(Specialty.name).label("name_norm"),
+    postgresql_using="gin",
+    postgresql_ops={"name_norm": "gin_trgm_ops"},
+)
@@ -1,7 +1,7 @@
 import uuid
 from typing import Optional
 from datetime import time, date
-from sqlalchemy import ForeignKey, Integer, Boolean, Time, Date
+from sqlalchemy import ForeignKey, Integer, Boolean, Time, Date, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.models.base import Base, TimestampMixin
@@ -31,3 +31,7 @@ class TimeSlot(Base, TimestampMixin):
 
     # Relations
     doctor: Mapped["Doctor"] = relationship(back_populates="time_slots")
+
+    __table_args__ = (
+        Index("ix_time_slots_doctor_id", "doctor_id"),
+    )
@@ -10,11 +10,13 @@ class SessionBase(BaseModel):
 class SessionCreate(SessionBase):
     entity_id: UUID
     speaker_id: Optional[UUID] = None
+    instance_id: Optional[UUID] = None
 
 class SessionResponse(SessionBase):
     session_id: UUID
     entity_id: UUID
     speaker_id: Optional[UUID]
+    instance_id: Optional[UUID] = None
     created_at: datetime
     expires_at: Optional[datetime]
 
@@ -37,6 +39,7 @@ class MessageResponse(MessageBase):
     session_id: UUID
     instance_id: UUID
     created_at: datetime
+    audio_url: Optional[str] = None  # Playable URL of audio_path (object storage or /uploads)
 
     class Config:
         from_attributes = True
@@ -24,6 +24,10 @@ class KBDocumentResponse(KBDocumentBase):
 class KBChunkBase(BaseModel):
     chunk_index: int
     content: str
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
+    heading: Optional[str] = None
+    token_count: Optional[int] = None
 
 class KBChunkCreate(KBChunkBase):
     doc_id: UUID
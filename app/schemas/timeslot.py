@@ -16,6 +16,21 @@ class TimeSlotCreate(TimeSlotBase):
     doctor_id: UUID
 
 
+class TimeSlotBulkCreate(BaseModel):
+    """Batch of time slots imported in one transaction"""
+    slots: List[TimeSlotCreate]
+
+
+class TimeSlotImportError(BaseModel):
+    row: int  # Index in `slots` for JSON imports, line number for CSV imports
+    detail: str
+
+
+class TimeSlotBulkResponse(BaseModel):
+    created: int
+    errors: List[TimeSlotImportError] = []
+
+
 class TimeSlotUpdate(BaseModel):
     day_of_week: Optional[int] = None
     specific_date: Optional[date] = None
@@ -1,11 +1,15 @@
 from datetime import date, time, datetime, timedelta
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Tuple
 from uuid import UUID
-from sqlalchemy import select
+from sqlalchemy import select, func, or_, literal
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.core.config import settings
+from app.core.pagination import encode_cursor, decode_cursor, InvalidCursorError
+from app.models.base import search_normalized
 from app.models.doctor import Doctor
+from app.models.specialty import Specialty
 from app.models.timeslot import TimeSlot
 from app.models.appointment import Appointment, AppointmentStatus
 from app.schemas.timeslot import AvailableSlot
@@ -21,95 +25,168 @@ class AppointmentService:
         entity_id: UUID, 
         target_date: Optional[date] = None,
         specialty_id: Optional[UUID] = None,
-        doctor_id: Optional[UUID] = None
+        doctor_id: Optional[UUID] = None,
+        end_date: Optional[date] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[date, time, str]] = None
     ) -> List[AvailableSlot]:
-        """Get available slots. If target_date is None, search next 7 days."""
-        
-        # Build query for doctors
+        """Get the first available slots in chronological order.
+
+        With only target_date, that day is searched. Without any date, the next
+        AVAILABILITY_SEARCH_DAYS days are searched. At most `limit` slots are returned.
+        """
+        today = date.today()
+        start_date = target_date or today
+        if end_date is None:
+            end_date = target_date or today + timedelta(days=settings.AVAILABILITY_SEARCH_DAYS - 1)
+        limit = limit or settings.AVAILABILITY_SUGGESTION_LIMIT
+
+        available_slots = []
+        async for slot in self.iter_available_slots(
+            db,
+            entity_id=entity_id,
+            start_date=start_date,
+            end_date=end_date,
+            specialty_id=specialty_id,
+            doctor_id=doctor_id,
+            after=after
+        ):
+            available_slots.append(slot)
+            if len(available_slots) >= limit:
+                break
+        return available_slots
+
+    async def iter_available_slots(
+        self,
+        db: AsyncSession,
+        entity_id: UUID,
+        start_date: date,
+        end_date: date,
+        specialty_id: Optional[UUID] = None,
+        doctor_id: Optional[UUID] = None,
+        after: Optional[Tuple[date, time, str]] = None
+    ) -> AsyncIterator[AvailableSlot]:
+        """Yield available slots between start_date and end_date (inclusive).
+
+        Slots come out ordered by (date, start_time, doctor_id), which is also the
+        key expected in `after` to resume a previous iteration. Only one window of
+        appointments is held in memory at a time.
+        """
         query = select(Doctor).options(
             selectinload(Doctor.specialty),
-            selectinload(Doctor.time_slots),
-            selectinload(Doctor.appointments)
+            selectinload(Doctor.time_slots)
         ).filter(Doctor.entity_id == entity_id, Doctor.is_active == True)
-        
+
         if doctor_id:
             query = query.filter(Doctor.doctor_id == doctor_id)
         elif specialty_id:
             query = query.filter(Doctor.specialty_id == specialty_id)
-        
+
         result = await db.execute(query)
         doctors = result.scalars().all()
-        
-        available_slots = []
-        
-        today = date.today()
-        dates_to_check = [target_date] if target_date else [today + timedelta(days=i) for i in range(14)]
-        
-        for check_date in dates_to_check:
-            # Optimization: If we already found enough slots (e.g. 5) and we are ignoring specific date, stop?
-            # For now, let's just find the first day with potential slots or collect a reasonable amount
-            if not target_date and len(available_slots) >= 10:
-                break
+        if not doctors:
+            return
 
-            target_weekday = check_date.weekday()
-            
-            for doctor in doctors:
-                # Get applicable time slots
-                applicable_slots = []
-                for slot in doctor.time_slots:
-                    if not slot.is_active:
+        if after:
+            start_date = max(start_date, after[0])
+
+        window = timedelta(days=settings.AVAILABILITY_WINDOW_DAYS)
+        window_start = start_date
+        while window_start <= end_date:
+            window_end = min(window_start + window - timedelta(days=1), end_date)
+
+            # One query per window for the booked appointments of all candidate doctors
+            result = await db.execute(
+                select(Appointment.doctor_id, Appointment.date, Appointment.start_time, Appointment.end_time)
+                .filter(
+                    Appointment.doctor_id.in_([d.doctor_id for d in doctors]),
+                    Appointment.date >= window_start,
+                    Appointment.date <= window_end,
+                    Appointment.status != AppointmentStatus.CANCELLED
+                )
+            )
+            booked = {}
+            for appt_doctor_id, appt_date, appt_start, appt_end in result.all():
+                booked.setdefault((appt_doctor_id, appt_date), []).append((appt_start, appt_end))
+
+            check_date = window_start
+            while check_date <= window_end:
+                day_slots = self._slots_for_day(doctors, check_date, booked)
+                day_slots.sort(key=lambda x: (x.start_time, str(x.doctor_id)))
+                for slot in day_slots:
+                    if after and (slot.date, slot.start_time, str(slot.doctor_id)) <= after:
                         continue
-                    if slot.is_recurring and slot.day_of_week == target_weekday:
-                        applicable_slots.append(slot)
-                    elif not slot.is_recurring and slot.specific_date == check_date:
-                        applicable_slots.append(slot)
-                
-                # Get existing appointments for this date
-                existing_appointments = [
-                    appt for appt in doctor.appointments 
-                    if appt.date == check_date and appt.status != AppointmentStatus.CANCELLED
-                ]
-                
-                # Generate available slots based on time slots and consultation duration
-                for slot in applicable_slots:
-                    current_time = datetime.combine(check_date, slot.start_time)
-                    end_time = datetime.combine(check_date, slot.end_time)
-                    duration = timedelta(minutes=doctor.consultation_duration)
-                    
-                    while current_time + duration <= end_time:
-                        slot_start = current_time.time()
-                        slot_end = (current_time + duration).time()
-                        
-                        # Check if this slot overlaps with any existing appointment
-                        is_available = True
-                        for appt in existing_appointments:
-                            appt_start = datetime.combine(check_date, appt.start_time)
-                            appt_end = datetime.combine(check_date, appt.end_time)
-                            slot_start_dt = current_time
-                            slot_end_dt = current_time + duration
-                            
-                            # Check overlap
-                            if not (slot_end_dt <= appt_start or slot_start_dt >= appt_end):
-                                is_available = False
-                                break
-                        
-                        if is_available:
-                            # Only add future slots
-                            if datetime.combine(check_date, slot_start) > datetime.now():
-                                available_slots.append(AvailableSlot(
-                                    doctor_id=doctor.doctor_id,
-                                    doctor_name=f"{doctor.first_name} {doctor.last_name}",
-                                    specialty_name=doctor.specialty.name if doctor.specialty else None,
-                                    date=check_date,
-                                    start_time=slot_start,
-                                    end_time=slot_end
-                                ))
-                        
-                        current_time += duration
-        
-        # Sort by date and time
-        available_slots.sort(key=lambda x: (x.date, x.start_time))
-        return available_slots[:15] # Limit to 15 suggestions
+                    yield slot
+                check_date += timedelta(days=1)
+
+            window_start = window_end + timedelta(days=1)
+
+    @staticmethod
+    def encode_slot_cursor(slot: AvailableSlot) -> str:
+        """Opaque token resuming iteration right after `slot`."""
+        return encode_cursor([slot.date.isoformat(), slot.start_time.isoformat(), str(slot.doctor_id)])
+
+    @staticmethod
+    def decode_slot_cursor(token: str) -> Tuple[date, time, str]:
+        slot_date, start_time, doctor_id = decode_cursor(token, 3)
+        try:
+            return date.fromisoformat(slot_date), time.fromisoformat(start_time), str(UUID(doctor_id))
+        except (TypeError, ValueError) as e:
+            raise InvalidCursorError("Invalid cursor") from e
+
+    def _slots_for_day(self, doctors: List[Doctor], check_date: date, booked: dict) -> List[AvailableSlot]:
+        """Expand the doctors' time slots for one day, minus booked and past slots."""
+        available_slots = []
+        target_weekday = check_date.weekday()
+        now = datetime.now()
+
+        for doctor in doctors:
+            # Get applicable time slots
+            applicable_slots = []
+            for slot in doctor.time_slots:
+                if not slot.is_active:
+                    continue
+                if slot.is_recurring and slot.day_of_week == target_weekday:
+                    applicable_slots.append(slot)
+                elif not slot.is_recurring and slot.specific_date == check_date:
+                    applicable_slots.append(slot)
+
+            # Existing appointments for this date
+            existing_appointments = booked.get((doctor.doctor_id, check_date), [])
+
+            # Generate available slots based on time slots and consultation duration
+            duration = timedelta(minutes=doctor.consultation_duration)
+            for slot in applicable_slots:
+                current_time = datetime.combine(check_date, slot.start_time)
+                end_time = datetime.combine(check_date, slot.end_time)
+
+                while current_time + duration <= end_time:
+                    slot_start_dt = current_time
+                    slot_end_dt = current_time + duration
+
+                    # Check if this slot overlaps with any existing appointment
+                    is_available = True
+                    for appt_start_time, appt_end_time in existing_appointments:
+                        appt_start = datetime.combine(check_date, appt_start_time)
+                        appt_end = datetime.combine(check_date, appt_end_time)
+                        if not (slot_end_dt <= appt_start or slot_start_dt >= appt_end):
+                            is_available = False
+                            break
+
+                    # Only add future slots
+                    if is_available and slot_start_dt > now:
+                        available_slots.append(AvailableSlot(
+                            doctor_id=doctor.doctor_id,
+                            doctor_name=f"{doctor.first_name} {doctor.last_name}",
+                            specialty_name=doctor.specialty.name if doctor.specialty else None,
+                            date=check_date,
+                            start_time=slot_start_dt.time(),
+                            end_time=slot_end_dt.time()
+                        ))
+
+                    current_time += duration
+
+        return available_slots
 
     async def book_appointment(
         self,
@@ -194,33 +271,84 @@ class AppointmentService:
         self,
         db: AsyncSession,
         entity_id: UUID,
-        specialty_name: Optional[str] = None
+        specialty_name: Optional[str] = None,
+        limit: Optional[int] = None
     ) -> List[dict]:
-        """Search doctors by specialty name (for chatbot)"""
-        query = select(Doctor).options(
-            selectinload(Doctor.specialty)
-        ).filter(Doctor.entity_id == entity_id, Doctor.is_active == True)
-        
-        result = await db.execute(query)
-        doctors = result.scalars().all()
-        
-        matching_doctors = []
-        for doctor in doctors:
-            if specialty_name:
-                if doctor.specialty and specialty_name.lower() in doctor.specialty.name.lower():
-                    matching_doctors.append({
-                        "doctor_id": str(doctor.doctor_id),
-                        "name": f"Dr. {doctor.first_name} {doctor.last_name}",
-                        "specialty": doctor.specialty.name if doctor.specialty else None
-                    })
-            else:
-                matching_doctors.append({
-                    "doctor_id": str(doctor.doctor_id),
-                    "name": f"Dr. {doctor.first_name} {doctor.last_name}",
-                    "specialty": doctor.specialty.name if doctor.specialty else None
-                })
-        
-        return matching_doctors
+        """Search doctors by specialty or doctor name (for chatbot).
+
+        Matching runs in Postgres on accent- and case-insensitive forms backed by
+        pg_trgm indexes. Substring matches come first; if there are none, a
+        typo-tolerant trigram fallback is tried so the model gets a hit on the first call.
+        """
+        limit = limit or settings.DOCTOR_SEARCH_LIMIT
+
+        query = (
+            select(Doctor, Specialty.name)
+            .outerjoin(Specialty, Doctor.specialty_id == Specialty.specialty_id)
+            .filter(Doctor.entity_id == entity_id, Doctor.is_active == True)
+        )
+
+        search = (specialty_name or "").strip()
+        if not search:
+            result = await db.execute(
+                query.order_by(Doctor.last_name, Doctor.first_name).limit(limit)
+            )
+            return [self._doctor_summary(doctor, spec_name) for doctor, spec_name in result.all()]
+
+        term = search_normalized(literal(search))
+        specialty_norm = search_normalized(Specialty.name)
+        name_norm = search_normalized(Doctor.full_name_expr())
+        rank = func.greatest(
+            func.word_similarity(term, specialty_norm),
+            func.word_similarity(term, name_norm)
+        )
+
+        # 1. Substring match (LIKE is served by the trigram indexes)
+        escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = func.concat("%", search_normalized(literal(escaped)), "%")
+        result = await db.execute(
+            query.filter(or_(
+                specialty_norm.like(pattern, escape="\\"),
+                name_norm.like(pattern, escape="\\")
+            ))
+            .order_by(rank.desc(), Doctor.last_name)
+            .limit(limit)
+        )
+        rows = result.all()
+
+        # 2. Typo-tolerant fallback ("pediatre" -> "Pédiatrie", "cardiolgie" -> "Cardiologie")
+        if not rows:
+            result = await db.execute(
+                query.filter(or_(
+                    term.op("<%")(specialty_norm),
+                    term.op("<%")(name_norm)
+                ))
+                .order_by(rank.desc(), Doctor.last_name)
+                .limit(limit)
+            )
+            rows = result.all()
+
+        return [self._doctor_summary(doctor, spec_name) for doctor, spec_name in rows]
+
+    async def find_specialty(self, db: AsyncSession, name: str) -> Optional[Specialty]:
+        """Resolve a spoken specialty name to a Specialty, ignoring accents, case and small typos."""
+        term = search_normalized(literal(name.strip()))
+        specialty_norm = search_normalized(Specialty.name)
+        result = await db.execute(
+            select(Specialty)
+            .filter(or_(specialty_norm == term, term.op("<%")(specialty_norm)))
+            .order_by(func.word_similarity(term, specialty_norm).desc())
+            .limit(1)
+        )
+        return result.scalars().first()
+
+    @staticmethod
+    def _doctor_summary(doctor: Doctor, specialty_name: Optional[str]) -> dict:
+        return {
+            "doctor_id": str(doctor.doctor_id),
+            "name": f"Dr. {doctor.first_name} {doctor.last_name}",
+            "specialty": specialty_name
+        }
 
 
 # Singleton
@@ -1,38 +1,253 @@
+import asyncio
+import hashlib
 import os
-import uuid
 import shutil
-from typing import Tuple, List
-from openai import AsyncOpenAI
+import subprocess
+import uuid
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterator, BinaryIO, Dict, Tuple, List, Optional
 from app.core.config import settings
+from app.services.audio_processing import (
+    STT_SAMPLE_RATE, VADConfig, decode_with_ffmpeg, encode_wav, prepare_for_stt, prepare_samples
+)
+from app.services.providers import (
+    SpeechToTextProvider, TextToSpeechProvider, build_stt_provider, build_tts_provider
+)
+
+
+class AudioUploadError(ValueError):
+    """Rejected voice upload; `status_code` is the HTTP status to answer with."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class SavedAudio:
+    path: str
+    content_type: str
+    size: int
+    sha256: str
+
+
+# Leading bytes of the formats accepted by speech-to-text: (offset, magic, content type, extension)
+_AUDIO_SIGNATURES = [
+    (0, b"OggS", "audio/ogg", "ogg"),
+    (0, b"fLaC", "audio/flac", "flac"),
+    (0, b"\x1aE\xdf\xa3", "audio/webm", "webm"),  # Matroska/WebM (browser MediaRecorder)
+    (0, b"ID3", "audio/mpeg", "mp3"),
+    (4, b"ftyp", "audio/mp4", "m4a"),
+]
+
+
+def sniff_audio(head: bytes) -> Tuple[str, str]:
+    """(content type, extension) of an audio file from its first bytes; the client's header is not trusted."""
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "audio/wav", "wav"
+    for offset, magic, content_type, extension in _AUDIO_SIGNATURES:
+        if head[offset:offset + len(magic)] == magic:
+            return content_type, extension
+    # MPEG audio frame without ID3 tag: 11-bit frame sync
+    if len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0:
+        return "audio/mpeg", "mp3"
+    raise AudioUploadError("Unsupported audio format", status_code=415)
+
+
+class SpeechStream:
+    """
+    Text-to-speech audio being synthesized.
+
+    Chunks are kept in memory as they arrive from the provider, so any number
+    of readers can play the audio from the start while it is still being
+    generated; the same chunks are written to `path` for later playback.
+    """
+
+    def __init__(self, stream_id: str, path: str, content_type: str):
+        self.id = stream_id
+        self.path = path
+        self.content_type = content_type
+        self.chunks: List[bytes] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        # Wake every current waiter; later waiters get a fresh event
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _append(self, chunk: bytes) -> None:
+        self.chunks.append(chunk)
+        self._notify()
+
+    def _finish(self, error: Optional[BaseException] = None) -> None:
+        self.done = True
+        self.error = error
+        self._notify()
+
+    async def started(self) -> None:
+        """Wait for the first chunk; raises the synthesis error if it failed before that."""
+        while not self.chunks and not self.done:
+            await self._changed.wait()
+        if self.error is not None and not self.chunks:
+            raise self.error
+
+    async def wait(self) -> str:
+        """Wait for the whole audio to be written; returns its path."""
+        while not self.done:
+            await self._changed.wait()
+        if self.error is not None:
+            raise self.error
+        return self.path
+
+    async def iter_bytes(self) -> AsyncIterator[bytes]:
+        """The audio from its first byte, following the synthesis until it ends."""
+        index = 0
+        while True:
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.error is not None:
+                # Cuts the response short: the client sees a truncated download
+                raise self.error
+            if self.done:
+                return
+            await self._changed.wait()
+
 
 class AudioService:
-    def __init__(self, upload_dir: str):
+    def __init__(
+        self,
+        upload_dir: str,
+        stt: Optional[SpeechToTextProvider] = None,
+        tts: Optional[TextToSpeechProvider] = None
+    ):
         self.upload_dir = upload_dir
         os.makedirs(self.upload_dir, exist_ok=True)
-        
-        print("Initializing OpenAI Client for Audio...")
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        
-        # Models
-        self.stt_model = "whisper-1"
-        self.tts_model = "tts-1"
-        self.tts_voice = "nova" # alloy, echo, fable, onyx, nova, shimmer
-
-    async def save_upload_file(self, upload_file) -> str:
-        file_path = os.path.join(self.upload_dir, f"{uuid.uuid4()}.wav")
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(upload_file.file, buffer)
-        return file_path
+
+        self.stt = stt or build_stt_provider()
+        self.tts = tts or build_tts_provider()
+        # Disk writes (and hashing) never run on the event loop
+        self._io = ThreadPoolExecutor(max_workers=settings.AUDIO_IO_THREADS, thread_name_prefix="audio-io")
+        self._speech: Dict[str, SpeechStream] = {}  # By id, until SPEECH_STREAM_TTL_SECONDS after the end
+        self._speech_by_text: Dict[tuple, SpeechStream] = {}  # In-flight syntheses
+        self._speech_tasks = set()
+        self.speech_started = 0
+        self.speech_shared = 0
+        self.vad = VADConfig(
+            threshold_db=settings.VAD_THRESHOLD_DB,
+            padding_ms=settings.VAD_PADDING_MS,
+            max_pause_ms=settings.VAD_MAX_PAUSE_MS,
+            min_speech_ms=settings.VAD_MIN_SPEECH_MS
+        )
+        # Decodes non-WAV recordings (MediaRecorder webm) for the VAD; without it they go to STT as they are
+        self.ffmpeg = shutil.which(settings.FFMPEG_PATH)
+        self._stt_counters = {"clips": 0, "trimmed": 0, "silent": 0, "passthrough": 0, "seconds_in": 0.0, "seconds_out": 0.0}
+
+    async def save_upload_file(self, upload_file) -> SavedAudio:
+        """
+        Stream an uploaded recording to disk chunk by chunk.
+
+        The format is sniffed from the first bytes (it also picks the file
+        extension speech-to-text relies on), the size is capped at
+        AUDIO_UPLOAD_MAX_BYTES and the SHA-256 is computed during the copy.
+        Raises AudioUploadError; nothing is left on disk when it does.
+        """
+        loop = asyncio.get_running_loop()
+        chunk_size = settings.AUDIO_UPLOAD_CHUNK_BYTES
+        chunk = await upload_file.read(chunk_size)
+        if not chunk:
+            raise AudioUploadError("Empty audio file")
+        content_type, extension = sniff_audio(chunk)
+
+        file_path = os.path.join(self.upload_dir, f"{uuid.uuid4()}.{extension}")
+        digest = hashlib.sha256()
+        size = 0
+        buffer = await loop.run_in_executor(self._io, open, file_path, "wb")
+        try:
+            while chunk:
+                size += len(chunk)
+                if size > settings.AUDIO_UPLOAD_MAX_BYTES:
+                    raise AudioUploadError(
+                        f"Audio file larger than {settings.AUDIO_UPLOAD_MAX_BYTES} bytes", status_code=413
+                    )
+                await loop.run_in_executor(self._io, self._write_chunk, buffer, digest, chunk)
+                chunk = await upload_file.read(chunk_size)
+        except BaseException:
+            await loop.run_in_executor(self._io, self._discard, buffer, file_path)
+            raise
+        await loop.run_in_executor(self._io, buffer.close)
+        return SavedAudio(path=file_path, content_type=content_type, size=size, sha256=digest.hexdigest())
+
+    @staticmethod
+    def _write_chunk(buffer: BinaryIO, digest, chunk: bytes) -> None:
+        # hashlib releases the GIL on large buffers: hashing here keeps the loop free too
+        digest.update(chunk)
+        buffer.write(chunk)
+
+    @classmethod
+    def _discard(cls, buffer: BinaryIO, file_path: str) -> None:
+        buffer.close()
+        cls._remove(file_path)
 
     async def transcribe(self, file_path: str) -> str:
-        """Transcribe audio using OpenAI Whisper API"""
-        with open(file_path, "rb") as audio_file:
-            transcript = await self.client.audio.transcriptions.create(
-                model=self.stt_model, 
-                file=audio_file,
-                language="fr" # Hint for better accuracy
-            )
-        return transcript.text
+        """
+        Transcribe audio with the configured speech-to-text provider.
+
+        WAV recordings are sent as 16 kHz mono with silence trimmed; an empty
+        string is returned without calling the provider when there is no speech.
+        """
+        stt_path = await self.prepare_for_stt(file_path)
+        if stt_path is None:
+            return ""
+        try:
+            return await self.stt.transcribe(stt_path)
+        finally:
+            if stt_path != file_path:
+                await asyncio.get_running_loop().run_in_executor(self._io, self._remove, stt_path)
+
+    async def prepare_for_stt(self, file_path: str) -> Optional[str]:
+        """Path of the audio to send to STT: a trimmed 16 kHz copy, the original, or None if silent."""
+        self._stt_counters["clips"] += 1
+        if not settings.STT_VAD_ENABLED or not (file_path.endswith(".wav") or self.ffmpeg):
+            self._stt_counters["passthrough"] += 1
+            return file_path
+        return await asyncio.get_running_loop().run_in_executor(self._io, self._prepare, file_path)
+
+    def _prepare(self, file_path: str) -> Optional[str]:
+        try:
+            if file_path.endswith(".wav"):
+                with open(file_path, "rb") as f:
+                    prepared = prepare_for_stt(f.read(), self.vad)
+            else:
+                samples = decode_with_ffmpeg(file_path, self.ffmpeg)
+                prepared = prepare_samples(samples, STT_SAMPLE_RATE, self.vad)
+        except (wave.Error, ValueError, EOFError, OSError, subprocess.TimeoutExpired) as e:
+            # Compressed, malformed or undecodable recording: let the provider decode it
+            print(f"STT pre-processing skipped for {file_path}: {e}")
+            self._stt_counters["passthrough"] += 1
+            return file_path
+
+        self._stt_counters["seconds_in"] += prepared.input_seconds
+        self._stt_counters["seconds_out"] += prepared.output_seconds
+        if prepared.samples is None:
+            self._stt_counters["silent"] += 1
+            return None
+        self._stt_counters["trimmed"] += 1
+        stt_path = f"{os.path.splitext(file_path)[0]}.stt.wav"
+        with open(stt_path, "wb") as f:
+            f.write(encode_wav(prepared.samples))
+        return stt_path
+
+    @staticmethod
+    def _remove(file_path: str) -> None:
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
 
     async def get_speaker_embedding(self, file_path: str) -> Tuple[str, List[float]]:
         # Mock implementation - OpenAI doesn't provide speaker embeddings
@@ -41,15 +256,73 @@ class AudioService:
         return fingerprint, emb_vector
 
     async def text_to_speech(self, text: str) -> str:
-        """Generate speech using OpenAI TTS API"""
-        filename = f"{uuid.uuid4()}.mp3"
-        file_path = os.path.join(self.upload_dir, filename)
-        
-        response = await self.client.audio.speech.create(
-            model=self.tts_model,
-            voice=self.tts_voice,
-            input=text
+        """Generate speech with the configured text-to-speech provider; returns the file path"""
+        return await self.start_speech(text).wait()
+
+    def start_speech(self, text: str) -> SpeechStream:
+        """
+        Start synthesizing `text` in the background and return its stream.
+
+        Concurrent requests for the same text share one synthesis and one file.
+        The synthesis runs to the end even if every reader goes away.
+        """
+        key = (self.tts.name, self.tts.model, text)
+        speech = self._speech_by_text.get(key)
+        if speech is not None:
+            self.speech_shared += 1
+            return speech
+
+        stream_id = uuid.uuid4().hex
+        speech = SpeechStream(
+            stream_id, os.path.join(self.upload_dir, f"{stream_id}.{self.tts.extension}"), self.tts.content_type
         )
-        
-        response.stream_to_file(file_path)
-        return file_path
+        self._speech[stream_id] = speech
+        self._speech_by_text[key] = speech
+        self.speech_started += 1
+        task = asyncio.ensure_future(self._synthesize(key, speech))
+        self._speech_tasks.add(task)
+        task.add_done_callback(self._speech_tasks.discard)
+        return speech
+
+    def get_speech(self, stream_id: str) -> Optional[SpeechStream]:
+        return self._speech.get(stream_id)
+
+    async def _synthesize(self, key: tuple, speech: SpeechStream) -> None:
+        loop = asyncio.get_running_loop()
+        buffer = None
+        try:
+            buffer = await loop.run_in_executor(self._io, open, speech.path, "wb")
+            async for chunk in self.tts.stream(key[2]):
+                speech._append(chunk)
+                await loop.run_in_executor(self._io, buffer.write, chunk)
+            await loop.run_in_executor(self._io, buffer.close)
+            speech._finish()
+        except BaseException as e:
+            if buffer is not None:
+                await loop.run_in_executor(self._io, self._discard, buffer, speech.path)
+            speech._finish(e)
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            self._speech_by_text.pop(key, None)
+            # Late readers (a client starting playback after the answer) still get it from memory
+            loop.call_later(settings.SPEECH_STREAM_TTL_SECONDS, self._speech.pop, speech.id, None)
+
+    def stats(self) -> dict:
+        counters = self._stt_counters
+        return {
+            "tts_streams": {
+                "in_flight": len(self._speech_by_text),
+                "retained": len(self._speech),
+                "started": self.speech_started,
+                "shared": self.speech_shared,
+            },
+            "stt_preprocessing": {
+                **counters,
+                "seconds_in": round(counters["seconds_in"], 1),
+                "seconds_out": round(counters["seconds_out"], 1),
+            },
+        }
+
+    def close(self) -> None:
+        self._io.shutdown(wait=False)
@@ -0,0 +1,159 @@
+"""
+Speech-to-text pre-processing of kiosk recordings (NumPy / SciPy, CPU only).
+
+WAV recordings are decoded, mixed down to mono, resampled to 16 kHz (what
+Whisper works at internally) and cut to the speech found by an energy-based
+voice activity detector: leading and trailing silence are trimmed and long
+pauses shortened. Other formats (browser webm/ogg recordings) are decoded by
+ffmpeg when it is installed, and left to the STT provider as they are otherwise.
+"""
+import io
+import subprocess
+import wave
+from dataclasses import dataclass
+from math import gcd
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy.signal import resample_poly
+
+STT_SAMPLE_RATE = 16000
+
+
+@dataclass
+class VADConfig:
+    frame_ms: int = 30
+    threshold_db: float = 12.0  # Speech is this far above the noise floor...
+    min_level_dbfs: float = -50.0  # ...and never quieter than this
+    padding_ms: int = 200  # Kept around every speech region
+    max_pause_ms: int = 1000  # Longer silences inside the clip are shortened to this
+    min_speech_ms: int = 150  # Less speech than this in the whole clip counts as silence
+
+
+@dataclass
+class PreparedAudio:
+    samples: Optional[np.ndarray]  # float32 mono at STT_SAMPLE_RATE, None if no speech
+    input_seconds: float
+    output_seconds: float
+
+
+def decode_wav(data: bytes) -> Tuple[np.ndarray, int]:
+    """PCM WAV to float32 mono samples in [-1, 1] and the sample rate."""
+    with wave.open(io.BytesIO(data), "rb") as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        rate = wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768
+    elif width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+        # Sign-extend 24-bit little endian samples into int32
+        ints = (raw[:, 0].astype(np.int32) | raw[:, 1].astype(np.int32) << 8 | raw[:, 2].astype(np.int32) << 16)
+        ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+        samples = ints.astype(np.float32) / 8388608
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"Unsupported sample width: {width} bytes")
+
+    if channels > 1:
+        samples = samples[: len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def encode_wav(samples: np.ndarray, rate: int = STT_SAMPLE_RATE) -> bytes:
+    """float32 mono samples to 16-bit PCM WAV."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def resample(samples: np.ndarray, rate: int, target: int = STT_SAMPLE_RATE) -> np.ndarray:
+    """Polyphase resampling (anti-aliased) from `rate` to `target`."""
+    if rate == target or not len(samples):
+        return samples
+    divisor = gcd(rate, target)
+    return resample_poly(samples, target // divisor, rate // divisor).astype(np.float32)
+
+
+def speech_mask(samples: np.ndarray, rate: int, config: VADConfig) -> np.ndarray:
+    """One boolean per `frame_ms` frame: True where the frame energy looks like speech."""
+    frame = max(int(rate * config.frame_ms / 1000), 1)
+    count = len(samples) // frame
+    if not count:
+        return np.zeros(0, dtype=bool)
+    frames = samples[: count * frame].reshape(count, frame)
+    energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+
+    # Adaptive threshold: the quietest frames estimate the background noise.
+    # Capped below the loudest frame so a clip that is all speech is kept whole.
+    noise_floor = np.percentile(energy_db, 10)
+    if energy_db.max() - noise_floor < config.threshold_db:
+        # Nothing stands out of the background: steady noise (fan, hall), not speech
+        return np.zeros(count, dtype=bool)
+    threshold = min(noise_floor + config.threshold_db, energy_db.max() - config.threshold_db)
+    return energy_db > max(threshold, config.min_level_dbfs)
+
+
+def trim_silence(samples: np.ndarray, rate: int, config: VADConfig) -> Optional[np.ndarray]:
+    """Speech regions of `samples` with bounded silences between them; None if there is no speech."""
+    mask = speech_mask(samples, rate, config)
+    frame_ms = config.frame_ms
+    if mask.sum() * frame_ms < config.min_speech_ms:
+        return None
+
+    # Grow every speech frame by the padding so word edges and short gaps survive
+    pad = config.padding_ms // frame_ms
+    if pad:
+        mask = np.convolve(mask.astype(np.int8), np.ones(2 * pad + 1, dtype=np.int8), mode="same") > 0
+
+    frame = max(int(rate * frame_ms / 1000), 1)
+    max_pause = config.max_pause_ms // frame_ms
+    pieces = []
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    previous_end = None
+    for start, end in zip(edges[::2], edges[1::2]):
+        if previous_end is not None:
+            # Keep up to max_pause of the silence between two speech regions
+            gap = min(start - previous_end, max_pause)
+            pieces.append(samples[previous_end * frame:(previous_end + gap) * frame])
+        pieces.append(samples[start * frame:end * frame])
+        previous_end = end
+    return np.concatenate(pieces)
+
+
+def decode_with_ffmpeg(path: str, ffmpeg: str, timeout: float = 60.0) -> np.ndarray:
+    """Any recording ffmpeg reads to float32 mono samples at STT_SAMPLE_RATE."""
+    result = subprocess.run(
+        [ffmpeg, "-nostdin", "-loglevel", "error", "-i", path,
+         "-f", "s16le", "-ac", "1", "-ar", str(STT_SAMPLE_RATE), "-"],
+        capture_output=True, timeout=timeout
+    )
+    if result.returncode != 0:
+        raise ValueError(result.stderr.decode(errors="replace").strip() or f"ffmpeg exited with {result.returncode}")
+    pcm = result.stdout[: len(result.stdout) - len(result.stdout) % 2]
+    return np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768
+
+
+def prepare_for_stt(data: bytes, config: VADConfig) -> PreparedAudio:
+    """Decode a WAV recording, resample it to 16 kHz mono and keep only its speech."""
+    samples, rate = decode_wav(data)
+    return prepare_samples(samples, rate, config)
+
+
+def prepare_samples(samples: np.ndarray, rate: int, config: VADConfig) -> PreparedAudio:
+    """Resample decoded mono samples to 16 kHz and keep only their speech."""
+    input_seconds = len(samples) / rate if rate else 0.0
+    samples = resample(samples, rate)
+    speech = trim_silence(samples, STT_SAMPLE_RATE, config)
+    output_seconds = len(speech) / STT_SAMPLE_RATE if speech is not None else 0.0
+    return PreparedAudio(samples=speech, input_seconds=input_seconds, output_seconds=output_seconds)
@@ -0,0 +1,152 @@
+"""
+Chat audio in object storage.
+
+With AUDIO_STORAGE="minio", each turn's recording and TTS answer are uploaded
+to object storage (STORAGE_BACKEND, MinIO in production) under a
+content-addressed name (`audio/<sha256>.<ext>`). Identical audio is stored once. Because an object never changes, it carries a long,
+immutable Cache-Control that browsers and a CDN can honour. Messages keep
+`minio://<object>` as audio_path. API responses carry a URL instead: under
+AUDIO_PUBLIC_BASE_URL (CDN or public bucket) when it is set, otherwise a
+presigned GET. The API workers then serve no audio bytes and need no shared
+disk: UPLOAD_DIR only holds working copies for speech-to-text and transcoding.
+
+With AUDIO_STORAGE="local" (default) audio stays in UPLOAD_DIR, served under
+/uploads. Audio archived by the retention pass goes through the same store.
+"""
+import asyncio
+import hashlib
+import mimetypes
+import os
+from datetime import timedelta
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import select, update
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.singleflight import SingleFlight
+from app.models.chat import Message
+
+# audio_path of a message whose audio is in object storage
+OBJECT_AUDIO_PREFIX = "minio://"
+AUDIO_OBJECT_DIR = "audio/"
+
+
+def object_name(audio_path: Optional[str]) -> Optional[str]:
+    """Object name of a message audio in object storage, None for a local file."""
+    if audio_path and audio_path.startswith(OBJECT_AUDIO_PREFIX):
+        return audio_path[len(OBJECT_AUDIO_PREFIX):]
+    return None
+
+
+# Content types browsers expect for the formats we store (mimetypes says audio/x-wav, video/webm)
+_CONTENT_TYPES = {".wav": "audio/wav", ".webm": "audio/webm", ".ogg": "audio/ogg", ".mp3": "audio/mpeg"}
+
+
+def content_type_of(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    return _CONTENT_TYPES.get(extension) or mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+class AudioStore:
+    def __init__(self, storage):
+        self.storage = storage  # StorageBackend
+        self.stats_counters = {"published": 0, "deduplicated": 0, "bytes": 0, "deleted": 0}
+        # A TTS file is shared by identical concurrent answers: it is published once and
+        # every turn's message is pointed at the result, even after the file is removed
+        self._publishing = SingleFlight("audio_publish")
+        self._published: TTLCache[str] = TTLCache(settings.SPEECH_STREAM_TTL_SECONDS)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether new chat audio goes to object storage."""
+        return settings.AUDIO_STORAGE == "minio"
+
+    async def publish(self, path: str) -> str:
+        """Upload a local file under its content-addressed name; returns the message audio_path for it."""
+        digest, size = await asyncio.to_thread(_hash_file, path)
+        name = f"{AUDIO_OBJECT_DIR}{digest}{os.path.splitext(path)[1]}"
+        if await self.storage.exists(name):
+            # Same bytes already stored (e.g. the same TTS answer)
+            self.stats_counters["deduplicated"] += 1
+        else:
+            await self.storage.upload_path(path, name, content_type_of(path), settings.AUDIO_CACHE_CONTROL)
+            self.stats_counters["published"] += 1
+            self.stats_counters["bytes"] += size
+        return OBJECT_AUDIO_PREFIX + name
+
+    async def store(self, path: Optional[str], message_ids: Iterable[UUID], keep_local: bool = False) -> Optional[str]:
+        """
+        Move a turn's audio file to object storage and point its messages at it.
+
+        Returns the new audio_path, or `path` itself when object storage is
+        disabled. With `keep_local` the local file is left for the transcoder,
+        which replaces the object once it has re-encoded it. Several turns
+        may store the same file (a shared TTS answer): it is uploaded once.
+        """
+        if not path or not self.enabled:
+            return path
+        audio_path = self._published.get(path)
+        if audio_path is None:
+            audio_path = await self._publishing.do(path, lambda: self.publish(path))
+        await repoint(path, audio_path, message_ids)
+        if not keep_local:
+            # Remembered for the turns sharing the file that store it after it is gone
+            self._published.set(path, audio_path)
+            await asyncio.to_thread(_remove, path)
+        return audio_path
+
+    async def delete_if_unreferenced(self, audio_path: str) -> bool:
+        """Delete an object no message points at any more (objects are shared by identical audio)."""
+        name = object_name(audio_path)
+        if name is None:
+            return False
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Message.message_id).where(Message.audio_path == audio_path).limit(1))
+            if result.first() is not None:
+                return False
+        await self.storage.delete_file(name)
+        self.stats_counters["deleted"] += 1
+        return True
+
+    def url(self, audio_path: Optional[str]) -> Optional[str]:
+        """URL to give clients for a message audio_path."""
+        name = object_name(audio_path)
+        if name is None:
+            # Local file: served under /uploads, which only exists with local storage
+            return audio_path if not self.enabled else None
+        if settings.AUDIO_PUBLIC_BASE_URL:
+            return f"{settings.AUDIO_PUBLIC_BASE_URL.rstrip('/')}/{name}"
+        return self.storage.get_file_url(name, expires=timedelta(seconds=settings.AUDIO_URL_EXPIRY_SECONDS))
+
+    def stats(self) -> dict:
+        return {"backend": settings.AUDIO_STORAGE, **self.stats_counters}
+
+
+async def repoint(old_path: str, new_path: Optional[str], message_ids: Optional[Iterable[UUID]] = None) -> None:
+    """Point the messages using `old_path` (only `message_ids` if given) at `new_path`."""
+    statement = update(Message).where(Message.audio_path == old_path)
+    if message_ids is not None:
+        statement = statement.where(Message.message_id.in_(list(message_ids)))
+    async with AsyncSessionLocal() as db:
+        await db.execute(statement.values(audio_path=new_path))
+        await db.commit()
+
+
+def _hash_file(path: str):
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+            size += len(block)
+    return digest.hexdigest(), size
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
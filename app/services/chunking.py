@@ -0,0 +1,288 @@
+"""
+Splitting of knowledge documents into chunks for embedding and retrieval.
+
+Text is cut at paragraph boundaries (blank lines), and inside a long paragraph
+at sentence boundaries. Pieces are packed into chunks of up to KB_CHUNK_TOKENS
+tokens. A sentence is only cut between words when it is longer than a whole
+chunk. Each chunk starts with the last sentences of the previous one (up to
+KB_CHUNK_OVERLAP_TOKENS), so a fact that straddles a boundary is still found
+whole in one chunk.
+
+Headings (markdown `#`, numbered sections, short capitalised lines) close the
+current chunk. They are kept as metadata with the pages a chunk comes from.
+
+Tokens are counted with tiktoken (cl100k_base, the encoding of the OpenAI
+embedding models) when it is installed, otherwise estimated at about 4
+characters per token. Pages are consumed as they are extracted: only the
+paragraph in progress and the chunk being filled are held in memory.
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.extraction import ExtractedPage
+from app.services.openai_client import estimate_tokens
+
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n+")
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|(?<=[.!?…][\"'»)\]])\s+")
+_HYPHENATED_LINE = re.compile(r"(\w)-\n(\w)")
+_LIST_ITEM = re.compile(r"^([-•*▪–]|\d{1,3}[.)])\s")
+_MARKDOWN_HEADING = re.compile(r"^#{1,6}\s+(.+?)\s*#*$")
+_NUMBERED_HEADING = re.compile(r"^(\d{1,2}(\.\d{1,2})*\.?|[IVX]{1,5}\.|[A-Z]\.)\s+\S")
+_HEADING_MAX_CHARS = 80
+_HEADING_MAX_WORDS = 12
+# A paragraph running on past this many characters (text without blank lines) is cut at a sentence end
+_MAX_CARRY_CHARS = 64 * 1024
+
+
+@dataclass
+class Chunk:
+    text: str
+    token_count: int
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
+    heading: Optional[str] = None
+
+    @property
+    def embedding_text(self) -> str:
+        """Text to embed: the section heading gives a chunk from the middle of a section its topic."""
+        if self.heading and not self.text.startswith(self.heading):
+            return f"{self.heading}\n{self.text}"
+        return self.text
+
+
+@dataclass
+class _Piece:
+    text: str
+    tokens: int
+    pages: Tuple[Optional[int], Optional[int]]
+    new_paragraph: bool  # Joined to the previous piece by a blank line, not a space
+    is_heading: bool = False
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        # Optional dependency: exact counts for the OpenAI embedding models
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def warm_up() -> None:
+    """Load the tiktoken encoding (its BPE file is downloaded on first use) ahead of the first upload."""
+    _encoding()
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+class TextChunker:
+    """Incremental chunker: feed it pages in order, then `finish()`."""
+
+    def __init__(
+        self,
+        target_tokens: Optional[int] = None,
+        overlap_tokens: Optional[int] = None,
+        tokens: Callable[[str], int] = count_tokens,
+    ):
+        self.target = target_tokens or settings.KB_CHUNK_TOKENS
+        overlap = settings.KB_CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+        self.overlap = min(overlap, self.target // 2)
+        self.tokens = tokens
+        # Last paragraph of the text fed so far: it may go on in the next page
+        self._carry = ""
+        self._carry_page: Optional[int] = None
+        self._last_page: Optional[int] = None
+        self._heading: Optional[str] = None
+        self._pieces: List[_Piece] = []
+        self._piece_tokens = 0
+        self._has_body = False  # Current chunk holds more than headings and overlap
+
+    def feed(self, page: ExtractedPage) -> List[Chunk]:
+        text = page.text
+        if page.number is not None:
+            # A PDF page ending a sentence most likely ends its paragraph; otherwise the
+            # paragraph goes on in the next page. Text blocks are cut anywhere and join as-is.
+            text = text.rstrip()
+            text += "\n\n" if text.endswith((".", "!", "?", "…", ":")) else "\n"
+        text = self._carry + text
+        start_page = self._carry_page if self._carry else page.number
+        blocks = _PARAGRAPH_BREAK.split(text)
+        self._carry = blocks.pop()
+        chunks: List[Chunk] = []
+        for i, block in enumerate(blocks):
+            chunks += self._paragraph(block, (start_page if i == 0 else page.number, page.number))
+        self._carry_page = page.number if blocks else start_page
+        self._last_page = page.number
+        if len(self._carry) > _MAX_CARRY_CHARS:
+            cut = _last_sentence_end(self._carry)
+            if cut:
+                chunks += self._paragraph(self._carry[:cut], (self._carry_page, page.number))
+                self._carry = self._carry[cut:]
+                self._carry_page = page.number
+        return chunks
+
+    def finish(self) -> List[Chunk]:
+        chunks = self._paragraph(self._carry, (self._carry_page, self._last_page))
+        self._carry = ""
+        return chunks + self._flush()
+
+    def _paragraph(self, block: str, pages: Tuple[Optional[int], Optional[int]]) -> List[Chunk]:
+        lines = [line.strip() for line in _HYPHENATED_LINE.sub(r"\1\2", block).split("\n")]
+        lines = [line for line in lines if line]
+        if not lines:
+            return []
+        chunks: List[Chunk] = []
+        # "1. ..." followed by "2. ..." is a list, not a numbered section
+        in_list = len(lines) > 1 and _LIST_ITEM.match(lines[1])
+        heading = None if in_list else _heading(lines[0], alone=len(lines) == 1)
+        if heading is not None:
+            # A new section never shares a chunk (nor an overlap) with the previous one;
+            # consecutive headings (chapter, then section) stay together
+            if self._has_body:
+                chunks += self._flush()
+            self._drop_overlap()
+            self._heading = heading
+            chunks += self._add(_Piece(lines[0], self.tokens(lines[0]), pages, new_paragraph=True, is_heading=True))
+            lines = lines[1:]
+            if not lines:
+                return chunks
+        paragraph = _join_lines(lines)
+        tokens = self.tokens(paragraph)
+        # A whole paragraph when it fits, or when the chunk is well filled and it opens the next one
+        if tokens <= self.target and (
+            self._piece_tokens + tokens <= self.target or self._piece_tokens >= self.target // 2
+        ):
+            return chunks + self._add(_Piece(paragraph, tokens, pages, new_paragraph=True))
+        for i, sentence in enumerate(self._sentences(paragraph)):
+            chunks += self._add(_Piece(sentence, self.tokens(sentence), pages, new_paragraph=i == 0))
+        return chunks
+
+    def _sentences(self, paragraph: str) -> Iterable[str]:
+        for sentence in _SENTENCE_END.split(paragraph):
+            if not sentence:
+                continue
+            if self.tokens(sentence) <= self.target:
+                yield sentence
+            else:
+                yield from self._words(sentence)
+
+    def _words(self, sentence: str) -> Iterable[str]:
+        """A sentence longer than a chunk (tables, lists without punctuation): cut between words."""
+        # Sized in characters from the sentence's own density, a little under the target
+        max_chars = int(0.9 * self.target * len(sentence) / self.tokens(sentence))
+        piece: List[str] = []
+        length = 0
+        for word in sentence.split():
+            if piece and length + 1 + len(word) > max_chars:
+                yield " ".join(piece)
+                piece, length = [], 0
+            piece.append(word)
+            length += len(word) + (1 if length else 0)
+        if piece:
+            yield " ".join(piece)
+
+    def _add(self, piece: _Piece) -> List[Chunk]:
+        chunks: List[Chunk] = []
+        if self._piece_tokens + piece.tokens > self.target:
+            if self._has_body:
+                chunks = self._flush(keep_overlap=True)
+            if self._piece_tokens + piece.tokens > self.target:
+                # No room for the overlap next to this piece
+                self._drop_overlap()
+        self._pieces.append(piece)
+        self._piece_tokens += piece.tokens
+        self._has_body = self._has_body or not piece.is_heading
+        return chunks
+
+    def _drop_overlap(self) -> None:
+        """Keep only the headings of a chunk that has no body yet."""
+        self._pieces = [piece for piece in self._pieces if piece.is_heading]
+        self._piece_tokens = sum(piece.tokens for piece in self._pieces)
+
+    def _flush(self, keep_overlap: bool = False) -> List[Chunk]:
+        pieces = self._pieces
+        self._pieces, self._piece_tokens, self._has_body = [], 0, False
+        if not pieces:
+            return []
+        text = pieces[0].text
+        for piece in pieces[1:]:
+            text += ("\n\n" if piece.new_paragraph else " ") + piece.text
+        pages = [page for piece in pieces for page in piece.pages if page is not None]
+        chunk = Chunk(
+            text=text,
+            token_count=self.tokens(text),
+            page_start=min(pages) if pages else None,
+            page_end=max(pages) if pages else None,
+            heading=self._heading,
+        )
+        if keep_overlap and self.overlap:
+            self._pieces = self._overlap(pieces)
+            self._piece_tokens = sum(piece.tokens for piece in self._pieces)
+        return [chunk]
+
+    def _overlap(self, pieces: List[_Piece]) -> List[_Piece]:
+        """Trailing sentences of a chunk, up to the overlap budget, to start the next one."""
+        kept: List[_Piece] = []
+        budget = self.overlap
+        for piece in reversed(pieces):
+            if piece.is_heading:
+                break
+            sentences = [s for s in _SENTENCE_END.split(piece.text) if s]
+            for i, sentence in enumerate(reversed(sentences)):
+                tokens = self.tokens(sentence)
+                if tokens > budget:
+                    return kept
+                budget -= tokens
+                first = i == len(sentences) - 1
+                kept.insert(0, _Piece(sentence, tokens, piece.pages, new_paragraph=piece.new_paragraph and first))
+        return kept
+
+
+async def chunk_pages(pages: AsyncIterator[ExtractedPage], chunker: Optional[TextChunker] = None) -> AsyncIterator[Chunk]:
+    """Chunks of a document as its pages arrive."""
+    chunker = chunker or TextChunker()
+    async for page in pages:
+        for chunk in chunker.feed(page):
+            yield chunk
+    for chunk in chunker.finish():
+        yield chunk
+
+
+def _heading(line: str, alone: bool) -> Optional[str]:
+    """The heading text if `line` is one; `alone`: the line is a paragraph by itself."""
+    match = _MARKDOWN_HEADING.match(line)
+    if match:
+        return match.group(1)
+    if len(line) > _HEADING_MAX_CHARS or len(line.split()) > _HEADING_MAX_WORDS or line[-1] in ".,;:!?…":
+        return None
+    letters = [c for c in line if c.isalpha()]
+    if _NUMBERED_HEADING.match(line) or (len(letters) > 2 and all(c.isupper() for c in letters)):
+        return line
+    # A short capitalised line is only taken for a heading when a blank line sets it apart
+    if alone and line[0].isupper() and not _LIST_ITEM.match(line):
+        return line
+    return None
+
+
+def _join_lines(lines: List[str]) -> str:
+    """Unwrap a paragraph's lines (PDF text comes line by line), keeping list items on their own line."""
+    text = lines[0]
+    for line in lines[1:]:
+        text += ("\n" if _LIST_ITEM.match(line) else " ") + line
+    return text
+
+
+def _last_sentence_end(text: str) -> int:
+    end = 0
+    for match in _SENTENCE_END.finditer(text):
+        end = match.end()
+    return end
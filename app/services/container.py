@@ -0,0 +1,211 @@
+import asyncio
+from typing import Optional
+from openai import AsyncOpenAI
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import engine
+from app.services.audio import AudioService
+from app.services.audio_store import AudioStore
+from app.services import chunking
+from app.services.extraction import DocumentExtractor
+from app.services.llm import LLMService
+from app.services.openai_client import build_openai_client
+from app.services.providers import (
+    build_chat_provider, build_embedding_provider, build_stt_provider, build_tts_provider
+)
+from app.services.rag import RAGService
+from app.services.retention import AudioRetention
+from app.services.storage import StorageBackend, build_storage
+from app.services.transcoder import AudioTranscoder
+
+
+class ServiceContainer:
+    """
+    Holds the process-wide service instances and their shared clients.
+
+    The FastAPI lifespan calls `start()` to build everything and warm the
+    connection pools before the first request, and `close()` on shutdown.
+    Services are also built lazily on first access so scripts can use the
+    container without running the app.
+    """
+
+    def __init__(self):
+        self._openai: Optional[AsyncOpenAI] = None
+        self._rag: Optional[RAGService] = None
+        self._llm: Optional[LLMService] = None
+        self._audio: Optional[AudioService] = None
+        self._storage: Optional[StorageBackend] = None
+        self._audio_store: Optional[AudioStore] = None
+        self._transcoder: Optional[AudioTranscoder] = None
+        self._retention: Optional[AudioRetention] = None
+        self._extractor: Optional[DocumentExtractor] = None
+
+    @property
+    def openai(self) -> Optional[AsyncOpenAI]:
+        """The one OpenAI client (and HTTP connection pool) shared by every OpenAI provider."""
+        if self._openai is None and settings.OPENAI_API_KEY:
+            self._openai = build_openai_client()
+        return self._openai
+
+    @property
+    def rag(self) -> RAGService:
+        if self._rag is None:
+            self._rag = RAGService(build_embedding_provider(self.openai))
+        return self._rag
+
+    @property
+    def llm(self) -> LLMService:
+        if self._llm is None:
+            self._llm = LLMService(build_chat_provider(self.openai))
+        return self._llm
+
+    @property
+    def audio(self) -> AudioService:
+        if self._audio is None:
+            self._audio = AudioService(
+                settings.UPLOAD_DIR,
+                stt=build_stt_provider(self.openai),
+                tts=build_tts_provider(self.openai)
+            )
+        return self._audio
+
+    @property
+    def storage(self) -> StorageBackend:
+        """Object storage picked by STORAGE_BACKEND; it connects on first use, not here."""
+        if self._storage is None:
+            self._storage = build_storage()
+        return self._storage
+
+    @property
+    def audio_store(self) -> AudioStore:
+        """Chat audio in object storage (AUDIO_STORAGE="minio") and the URLs handed to clients."""
+        if self._audio_store is None:
+            self._audio_store = AudioStore(self.storage)
+        return self._audio_store
+
+    @property
+    def transcoder(self) -> AudioTranscoder:
+        if self._transcoder is None:
+            self._transcoder = AudioTranscoder(store=self.audio_store)
+        return self._transcoder
+
+    @property
+    def retention(self) -> AudioRetention:
+        if self._retention is None:
+            self._retention = AudioRetention(settings.UPLOAD_DIR, store=self.audio_store)
+        return self._retention
+
+    @property
+    def extractor(self) -> DocumentExtractor:
+        """Knowledge document text extraction; its process pool starts with the first PDF."""
+        if self._extractor is None:
+            self._extractor = DocumentExtractor()
+        return self._extractor
+
+    def audio_stats(self) -> Optional[dict]:
+        """Audio service, storage, transcoder and retention counters, None until the audio service exists."""
+        if self._audio is None:
+            return None
+        stats = self._audio.stats()
+        if self._audio_store is not None:
+            stats["storage"] = self._audio_store.stats()
+        if self._transcoder is not None:
+            stats["transcoding"] = self._transcoder.stats()
+        if self._retention is not None:
+            stats["retention"] = self._retention.stats()
+        return stats
+
+    def storage_stats(self) -> Optional[dict]:
+        return self._storage.stats() if self._storage is not None else None
+
+    def extraction_stats(self) -> Optional[dict]:
+        return self._extractor.stats() if self._extractor is not None else None
+
+    async def health(self) -> dict:
+        """Database and object storage reachability, probed now (GET /system/health)."""
+        async def database() -> dict:
+            try:
+                await asyncio.wait_for(self._warm_db(connections=1), settings.STORAGE_HEALTH_TIMEOUT_SECONDS)
+            except Exception as e:
+                return {"ok": False, "error": repr(e)}
+            return {"ok": True}
+
+        db_health, storage_health = await asyncio.gather(database(), self.storage.health())
+        return {"ok": db_health["ok"] and storage_health["ok"], "database": db_health, "storage": storage_health}
+
+    async def start(self) -> None:
+        # Build every service now so construction never happens inside a request
+        for name in ("rag", "llm", "audio", "storage"):
+            try:
+                getattr(self, name)
+            except Exception as e:
+                print(f"Could not initialize {name} service: {e}")
+        self.transcoder.start()
+        self.retention.start()
+        await self.warm_up()
+
+    async def warm_up(self) -> None:
+        """
+        Open DB and OpenAI connections and load local models ahead of the first request.
+
+        Object storage is left out: it is only needed by uploads and connects on
+        first use, so an unreachable MinIO never delays startup.
+        """
+        timeout = settings.WARMUP_TIMEOUT_SECONDS
+        results = await asyncio.gather(
+            asyncio.wait_for(self._warm_db(), timeout),
+            asyncio.wait_for(self._warm_openai(), timeout),
+            # Loading a local model can take longer than a connection: not bounded
+            self._warm_providers(),
+            return_exceptions=True
+        )
+        for name, result in zip(("database", "openai", "providers"), results):
+            # A failed warm-up only means the first request pays for it
+            if isinstance(result, Exception):
+                print(f"Warm-up of {name} failed: {result!r}")
+
+    async def _warm_db(self, connections: Optional[int] = None) -> None:
+        async def ping():
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        # Concurrent checkouts force the pool to open distinct connections
+        await asyncio.gather(*(ping() for _ in range(connections or settings.WARMUP_DB_CONNECTIONS)))
+
+    async def _warm_openai(self) -> None:
+        uses_openai = "openai" in (
+            settings.EMBEDDING_PROVIDER, settings.STT_PROVIDER, settings.TTS_PROVIDER, settings.LLM_PROVIDER
+        )
+        if uses_openai and self.openai is not None:
+            await self.openai.models.list()
+
+    async def _warm_providers(self) -> None:
+        providers = [self._rag and self._rag.provider, self._llm and self._llm.provider]
+        if self._audio:
+            providers += [self._audio.stt, self._audio.tts]
+        await asyncio.gather(
+            *(p.warm_up() for p in providers if p),
+            asyncio.to_thread(chunking.warm_up),
+        )
+
+    async def close(self) -> None:
+        if self._openai is not None:
+            await self._openai.close()
+        if self._retention is not None:
+            await self._retention.stop()
+        if self._transcoder is not None:
+            await self._transcoder.stop()
+        if self._audio is not None:
+            self._audio.close()
+        if self._storage is not None:
+            self._storage.close()
+        if self._extractor is not None:
+            self._extractor.close()
+        self._openai = self._rag = self._llm = self._audio = None
+        self._storage = self._audio_store = self._transcoder = self._retention = self._extractor = None
+        await engine.dispose()
+
+
+# Singleton
+services = ServiceContainer()
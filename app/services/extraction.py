@@ -0,0 +1,232 @@
+"""
+Text extraction of uploaded knowledge documents, off the event loop.
+
+PDF parsing is CPU-bound pure Python: in a thread it would still hold the GIL,
+so it runs in a small process pool (KB_EXTRACT_WORKERS) shared by every upload.
+A PDF is cut into ranges of KB_EXTRACT_PAGES_PER_TASK pages. Up to
+KB_EXTRACT_PARALLEL_RANGES ranges of a document are parsed at once. They come
+back in order and are yielded page by page, so the caller chunks and embeds
+while later pages are still being parsed, and the whole text is never held.
+Text files are decoded in a thread, a block at a time.
+
+Documents over KB_MAX_UPLOAD_BYTES or KB_MAX_PAGES are refused before
+anything is stored.
+"""
+import asyncio
+import codecs
+import multiprocessing
+import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, BinaryIO, List, Optional, Tuple
+
+from app.core.config import settings
+
+PDF_CONTENT_TYPE = "application/pdf"
+_TEXT_BLOCK_BYTES = 1024 * 1024
+
+
+class DocumentTooLarge(ValueError):
+    pass
+
+
+class ExtractionError(ValueError):
+    pass
+
+
+@dataclass
+class ExtractedPage:
+    text: str
+    number: Optional[int] = None  # 1-based PDF page, None for text files
+
+
+@dataclass
+class Extraction:
+    """An uploaded document spooled to a temporary file, ready to be read page by page."""
+    path: str
+    kind: str  # "pdf", "text" or "binary" (not extractable)
+    size: int
+    page_count: Optional[int] = None
+
+
+class DocumentExtractor:
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or settings.KB_EXTRACT_WORKERS
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.in_flight = 0
+        self.stats_counters = {"documents": 0, "refused": 0, "pages": 0, "failed_pages": 0, "ranges": 0, "errors": 0}
+        self.extract_seconds = 0.0
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that runs an event loop and thread pools is unsafe
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def _run(self, fn, *args):
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+        except BrokenProcessPool:
+            # A worker died (out of memory on a hostile PDF...): the next call starts a new pool
+            self.close()
+            raise
+        finally:
+            self.in_flight -= 1
+
+    @asynccontextmanager
+    async def open(self, file: BinaryIO, content_type: Optional[str]) -> AsyncIterator[Extraction]:
+        """
+        Spool an upload to disk and inspect it; raises DocumentTooLarge over the limits.
+
+        The temporary file is removed when the block exits.
+        """
+        fd, path = tempfile.mkstemp(prefix="kb-")
+        os.close(fd)
+        try:
+            size = await asyncio.to_thread(_spool, file, path, settings.KB_MAX_UPLOAD_BYTES)
+            if size is None:
+                self.stats_counters["refused"] += 1
+                raise DocumentTooLarge(f"Document larger than {settings.KB_MAX_UPLOAD_BYTES} bytes")
+            if content_type == PDF_CONTENT_TYPE:
+                try:
+                    page_count = await self._run(_pdf_page_count, path)
+                except Exception as e:
+                    print(f"Error reading PDF: {e!r}")
+                    self.stats_counters["errors"] += 1
+                    page_count = None
+                extraction = Extraction(path, "pdf" if page_count is not None else "binary", size, page_count)
+                if extraction.page_count is not None and extraction.page_count > settings.KB_MAX_PAGES:
+                    self.stats_counters["refused"] += 1
+                    raise DocumentTooLarge(f"Document has {extraction.page_count} pages, limit is {settings.KB_MAX_PAGES}")
+            else:
+                extraction = Extraction(path, "text" if await asyncio.to_thread(_is_utf8, path) else "binary", size)
+            self.stats_counters["documents"] += 1
+            yield extraction
+        finally:
+            await asyncio.to_thread(_remove, path)
+
+    async def pages(self, extraction: Extraction) -> AsyncIterator[ExtractedPage]:
+        """The text of a document, in order, page by page (blocks of text for text files)."""
+        if extraction.kind == "pdf":
+            async for page in self._pdf_pages(extraction):
+                yield page
+        elif extraction.kind == "text":
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            with open(extraction.path, "rb") as f:
+                while True:
+                    block = await asyncio.to_thread(f.read, _TEXT_BLOCK_BYTES)
+                    text = decoder.decode(block, final=not block)
+                    if text:
+                        yield ExtractedPage(text)
+                    if not block:
+                        break
+
+    async def _pdf_pages(self, extraction: Extraction) -> AsyncIterator[ExtractedPage]:
+        per_task = settings.KB_EXTRACT_PAGES_PER_TASK
+        ranges = deque((start, min(start + per_task, extraction.page_count))
+                       for start in range(0, extraction.page_count, per_task))
+        pending: deque = deque()
+        try:
+            while ranges or pending:
+                # Keep a few ranges ahead of the consumer, no more: the pool is shared
+                while ranges and len(pending) < settings.KB_EXTRACT_PARALLEL_RANGES:
+                    start, end = ranges.popleft()
+                    pending.append((start, asyncio.ensure_future(self._timed(_pdf_range, extraction.path, start, end))))
+                start, task = pending.popleft()
+                texts, failed = await task
+                self.stats_counters["ranges"] += 1
+                self.stats_counters["pages"] += len(texts)
+                self.stats_counters["failed_pages"] += failed
+                for offset, text in enumerate(texts):
+                    yield ExtractedPage(text, number=start + offset + 1)
+        except Exception as e:
+            self.stats_counters["errors"] += 1
+            raise ExtractionError(f"Could not extract PDF text: {e!r}") from e
+        finally:
+            # Consumer gone (client disconnected, ingestion failed): drop what is queued
+            for _, task in pending:
+                task.cancel()
+
+    async def _timed(self, fn, *args):
+        started = time.perf_counter()
+        try:
+            return await self._run(fn, *args)
+        finally:
+            self.extract_seconds += time.perf_counter() - started
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "extract_seconds": round(self.extract_seconds, 3),
+            **self.stats_counters,
+        }
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# --- Run in the worker processes ---
+
+def _pdf_page_count(path: str) -> int:
+    import pypdf
+    return len(pypdf.PdfReader(path).pages)
+
+
+def _pdf_range(path: str, start: int, end: int) -> Tuple[List[str], int]:
+    """Text of pages [start, end); a page that fails to parse is empty. Returns the texts and the failures."""
+    import pypdf
+    reader = pypdf.PdfReader(path)
+    texts, failed = [], 0
+    for number in range(start, end):
+        try:
+            texts.append(reader.pages[number].extract_text() or "")
+        except Exception as e:
+            print(f"Error extracting PDF page {number + 1}: {e!r}")
+            texts.append("")
+            failed += 1
+    return texts, failed
+
+
+# --- Run in threads ---
+
+def _spool(file: BinaryIO, path: str, max_bytes: int) -> Optional[int]:
+    """Copy an upload to `path`; None (and nothing kept) when it exceeds `max_bytes`."""
+    file.seek(0)
+    size = 0
+    with open(path, "wb") as out:
+        for block in iter(lambda: file.read(_TEXT_BLOCK_BYTES), b""):
+            size += len(block)
+            if size > max_bytes:
+                return None
+            out.write(block)
+    file.seek(0)
+    return size
+
+
+def _is_utf8(path: str) -> bool:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(_TEXT_BLOCK_BYTES), b""):
+                decoder.decode(block)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -1,7 +1,9 @@
+import hashlib
 import json
 from typing import Optional, List, Dict, Any
-from openai import AsyncOpenAI
-from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.services import openai_client
+from app.services.providers import ChatProvider, ChatReply, build_chat_provider
 
 # Define appointment-related tools for OpenAI
 APPOINTMENT_TOOLS = [
@@ -9,13 +11,13 @@ APPOINTMENT_TOOLS = [
         "type": "function",
         "function": {
             "name": "search_doctors",
-            "description": "Recherche des médecins disponibles par spécialité. Utilisez cette fonction quand l'utilisateur veut prendre un rendez-vous et mentionne une spécialité ou demande les médecins disponibles.",
+            "description": "Recherche des médecins disponibles par spécialité ou par nom. Utilisez cette fonction quand l'utilisateur veut prendre un rendez-vous et mentionne une spécialité, un médecin, ou demande les médecins disponibles. Les accents et petites fautes de frappe sont tolérés.",
             "parameters": {
                 "type": "object",
                 "properties": {
                     "specialty": {
                         "type": "string",
-                        "description": "Nom de la spécialité médicale recherchée (ex: cardiologie, pédiatrie, dermatologie)"
+                        "description": "Nom de la spécialité médicale ou du médecin recherché (ex: cardiologie, pédiatrie, Diallo)"
                     }
                 },
                 "required": []
@@ -26,7 +28,7 @@ APPOINTMENT_TOOLS = [
         "type": "function",
         "function": {
             "name": "get_available_slots",
-            "description": "Obtient les créneaux de rendez-vous disponibles pour un médecin ou une spécialité à une date donnée.",
+            "description": "Obtient les créneaux de rendez-vous disponibles pour un médecin ou une spécialité à une date ou sur une période donnée. Si le résultat contient next_cursor, d'autres créneaux existent.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -40,7 +42,15 @@ APPOINTMENT_TOOLS = [
                     },
                     "date": {
                         "type": "string",
-                        "description": "Date souhaitée au format YYYY-MM-DD"
+                        "description": "Date souhaitée (ou début de période) au format YYYY-MM-DD"
+                    },
+                    "date_end": {
+                        "type": "string",
+                        "description": "Fin de période au format YYYY-MM-DD (optionnel, pour chercher sur plusieurs jours)"
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "Valeur next_cursor d'un appel précédent pour obtenir les créneaux suivants (optionnel)"
                     }
                 },
                 "required": []
@@ -91,13 +101,41 @@ APPOINTMENT_TOOLS = [
 ]
 
 class LLMService:
-    def __init__(self):
-        if settings.OPENAI_API_KEY:
-            self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-            self.model = settings.OPENAI_MODEL
-        else:
-            self.client = None
-            self.model = None
+    def __init__(self, provider: Optional[ChatProvider] = None):
+        self.provider = provider or build_chat_provider()
+        self._inflight = SingleFlight("chat")
+
+    async def _complete(
+        self, messages: List[Dict[str, str]], tools: Optional[list] = None, coalesce: bool = False
+    ) -> ChatReply:
+        """
+        One chat completion with the configured provider.
+
+        With `coalesce`, concurrent calls with exactly the same model, messages
+        and tools share one upstream completion. Only pass it where any of the
+        callers could use the other's answer, i.e. when nothing caller-specific
+        lives outside the prompt.
+        """
+        if not coalesce:
+            return await self.provider.complete(messages, tools)
+        key = hashlib.sha256(
+            json.dumps(
+                [self.provider.name, self.provider.model, messages, tools], sort_keys=True, ensure_ascii=False
+            ).encode()
+        ).hexdigest()
+        return await self._inflight.do(key, lambda: self.provider.complete(messages, tools))
+
+    @staticmethod
+    def _to_result(reply: ChatReply, empty_text: Optional[str]) -> Dict[str, Any]:
+        if reply.tool_name:
+            return {
+                "type": "function_call",
+                "content": {
+                    "name": reply.tool_name,
+                    "args": json.loads(reply.tool_arguments or "{}")
+                }
+            }
+        return {"type": "text", "content": reply.content or empty_text}
 
     def _parse_history(self, history_str: str) -> List[Dict[str, str]]:
         """
@@ -151,7 +189,8 @@ class LLMService:
         system_instruction: str, 
         context: str, 
         history: str, 
-        user_message: str
+        user_message: str,
+        coalesce: bool = False
     ) -> Dict[str, Any]:
         """
         Generate response with potential function calls for appointment booking.
@@ -159,7 +198,7 @@ class LLMService:
         - 'type': 'text' or 'function_call'
         - 'content': text response or function call details
         """
-        if not self.client:
+        if not self.provider:
             return {"type": "text", "content": "OpenAI API Key not configured. Mock response."}
         
         messages = [
@@ -176,28 +215,12 @@ class LLMService:
         messages.append({"role": "user", "content": user_message})
         
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                tools=APPOINTMENT_TOOLS,
-                tool_choice="auto"
-            )
-            
-            message = response.choices[0].message
-            
-            # Check for tool calls
-            if message.tool_calls:
-                tool_call = message.tool_calls[0]
-                return {
-                    "type": "function_call",
-                    "content": {
-                        "name": tool_call.function.name,
-                        "args": json.loads(tool_call.function.arguments)
-                    }
-                }
-            
-            return {"type": "text", "content": message.content or "Je n'ai pas compris."}
+            reply = await self._complete(messages, tools=APPOINTMENT_TOOLS, coalesce=coalesce)
+            return self._to_result(reply, "Je n'ai pas compris.")
             
+        except openai_client.UNAVAILABLE_ERRORS:
+            # Let the caller switch to a degraded answer
+            raise
         except Exception as e:
             return {"type": "text", "content": f"Error generating response: {str(e)}"}
 
@@ -205,12 +228,13 @@ class LLMService:
         self,
         system_instruction: str,
         function_name: str,
-        function_result: str
+        function_result: str,
+        coalesce: bool = False
     ) -> Dict[str, Any]:
         """
         Continue the conversation after executing a function call.
         """
-        if not self.client:
+        if not self.provider:
             return {"type": "text", "content": "OpenAI API Key not configured."}
         
         messages = [
@@ -220,25 +244,11 @@ class LLMService:
         ]
         
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages
-            )
-            
-            message = response.choices[0].message
-             
-            # Check for MORE tool calls (nested)
-            if message.tool_calls:
-                tool_call = message.tool_calls[0]
-                return {
-                    "type": "function_call",
-                    "content": {
-                        "name": tool_call.function.name,
-                        "args": json.loads(tool_call.function.arguments)
-                    }
-                }
-            
-            return {"type": "text", "content": message.content}
+            reply = await self._complete(messages, coalesce=coalesce)
+            # May be a further (nested) tool call
+            return self._to_result(reply, None)
             
+        except openai_client.UNAVAILABLE_ERRORS:
+            raise
         except Exception as e:
             return {"type": "text", "content": f"Error: {str(e)}"}
@@ -0,0 +1,195 @@
+import asyncio
+from typing import Optional, Union
+from uuid import UUID
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import engine
+from app.core.pagination import Page
+from app.crud import crud_appointment, crud_entity
+from app.schemas.entity import EntityResponse, InstanceResponse
+from app.schemas.specialty import SpecialtyResponse
+from app.services.appointment_service import appointment_service
+
+_MISSING = object()
+
+
+class MetadataCache:
+    """
+    Read-through cache of the rarely written metadata read on every request:
+    instances, entities and specialties.
+
+    Entries are immutable response snapshots (never ORM objects, which are bound
+    to the session that loaded them) and expire after METADATA_CACHE_TTL_SECONDS.
+    Writers call the `invalidate_*` methods after committing; when
+    METADATA_INVALIDATION_CHANNEL is set the invalidation is also broadcast to the
+    other workers through Postgres LISTEN/NOTIFY.
+    """
+
+    def __init__(self):
+        ttl = settings.METADATA_CACHE_TTL_SECONDS
+        size = settings.METADATA_CACHE_SIZE
+        self.channel = settings.METADATA_INVALIDATION_CHANNEL
+        self._instances: TTLCache[InstanceResponse] = TTLCache(ttl=ttl, maxsize=size)
+        self._entities: TTLCache[EntityResponse] = TTLCache(ttl=ttl, maxsize=size)
+        self._specialties: TTLCache = TTLCache(ttl=ttl, maxsize=size)
+        self._listener_task: Optional[asyncio.Task] = None
+
+    # --- Reads ---
+
+    async def get_instance(self, db: AsyncSession, instance_id: Union[str, UUID]) -> Optional[InstanceResponse]:
+        key = _as_uuid(instance_id)
+        if key is None:
+            return None
+        cached = self._instances.get(key)
+        if cached is not None:
+            return cached
+        instance = await crud_entity.instance.get(db=db, id=key)
+        if not instance:
+            return None
+        snapshot = InstanceResponse.model_validate(instance)
+        self._instances.set(key, snapshot)
+        return snapshot
+
+    async def get_entity(self, db: AsyncSession, entity_id: Union[str, UUID]) -> Optional[EntityResponse]:
+        key = _as_uuid(entity_id)
+        if key is None:
+            return None
+        cached = self._entities.get(key)
+        if cached is not None:
+            return cached
+        entity = await crud_entity.entity.get(db=db, id=key)
+        if not entity:
+            return None
+        snapshot = EntityResponse.model_validate(entity)
+        self._entities.set(key, snapshot)
+        return snapshot
+
+    async def get_specialty_page(self, db: AsyncSession, *, cursor: Optional[str], limit: int) -> Page:
+        key = ("page", cursor, limit)
+        cached = self._specialties.get(key)
+        if cached is not None:
+            return cached
+        page = await crud_appointment.specialty.get_page(db=db, cursor=cursor, limit=limit)
+        page = Page([SpecialtyResponse.model_validate(s) for s in page.items], page.next_cursor)
+        self._specialties.set(key, page)
+        return page
+
+    async def find_specialty(self, db: AsyncSession, name: str) -> Optional[SpecialtyResponse]:
+        # Misses are cached too: any specialty write invalidates the whole namespace
+        key = ("name", name.strip().lower())
+        cached = self._specialties.get(key, _MISSING)
+        if cached is not _MISSING:
+            return cached
+        specialty = await appointment_service.find_specialty(db=db, name=name)
+        snapshot = SpecialtyResponse.model_validate(specialty) if specialty else None
+        self._specialties.set(key, snapshot)
+        return snapshot
+
+    # --- Invalidation ---
+
+    async def invalidate_instance(self, instance_id: UUID) -> None:
+        self._apply("instance", str(instance_id))
+        await self._publish("instance", str(instance_id))
+
+    async def invalidate_entity(self, entity_id: UUID) -> None:
+        self._apply("entity", str(entity_id))
+        await self._publish("entity", str(entity_id))
+
+    async def invalidate_specialties(self) -> None:
+        self._apply("specialties", "")
+        await self._publish("specialties", "")
+
+    def _apply(self, kind: str, key: str) -> None:
+        if kind == "instance":
+            self._instances.delete(UUID(key))
+        elif kind == "entity":
+            self._entities.delete(UUID(key))
+            # Deleting an entity cascades to its instances
+            self._instances.clear()
+        elif kind == "specialties":
+            self._specialties.clear()
+
+    async def _publish(self, kind: str, key: str) -> None:
+        if not self.channel:
+            return
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(
+                    text("SELECT pg_notify(:channel, :payload)"),
+                    {"channel": self.channel, "payload": f"{kind}:{key}"}
+                )
+        except Exception as e:
+            # Other workers still converge when their entries expire
+            print(f"Metadata invalidation broadcast failed: {e}")
+
+    # --- Cross-worker channel ---
+
+    async def start_listener(self) -> None:
+        if self.channel and self._listener_task is None:
+            self._listener_task = asyncio.create_task(self._listen())
+
+    async def stop_listener(self) -> None:
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+
+    async def _listen(self) -> None:
+        import asyncpg
+
+        dsn = str(settings.SQLALCHEMY_DATABASE_URI).replace("postgresql+asyncpg://", "postgresql://")
+
+        def on_notify(conn, pid, channel, payload):
+            kind, _, key = payload.partition(":")
+            try:
+                self._apply(kind, key)
+            except ValueError:
+                print(f"Ignoring malformed metadata invalidation: {payload!r}")
+
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(dsn)
+                lost = asyncio.Event()
+                conn.add_termination_listener(lambda c: lost.set())
+                await conn.add_listener(self.channel, on_notify)
+                # Invalidations sent while we were disconnected are lost: start clean
+                self._instances.clear()
+                self._entities.clear()
+                self._specialties.clear()
+                await lost.wait()
+                print("Metadata invalidation listener disconnected, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Metadata invalidation listener error: {e}")
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            await asyncio.sleep(5)
+
+    def stats(self) -> dict:
+        return {
+            "instances": self._instances.stats(),
+            "entities": self._entities.stats(),
+            "specialties": self._specialties.stats(),
+        }
+
+
+def _as_uuid(value: Union[str, UUID]) -> Optional[UUID]:
+    if isinstance(value, UUID):
+        return value
+    try:
+        return UUID(str(value))
+    except ValueError:
+        return None
+
+
+# Singleton
+metadata_cache = MetadataCache()
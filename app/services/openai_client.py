@@ -0,0 +1,235 @@
+import asyncio
+import random
+from typing import Awaitable, Callable, Optional, TypeVar
+import httpx
+import openai
+from openai import AsyncOpenAI
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.core.config import settings
+from app.core.rate_limit import AdaptiveLimiter, Priority
+
+T = TypeVar("T")
+
+# Upstream operations with their own timeout budget
+OPERATIONS = ("embeddings", "chat", "stt", "tts")
+
+
+def timeout_for(operation: str) -> httpx.Timeout:
+    """Per-request timeout of an operation, passed as `timeout=` to the SDK call."""
+    read = {
+        "embeddings": settings.OPENAI_TIMEOUT_EMBEDDINGS,
+        "chat": settings.OPENAI_TIMEOUT_CHAT,
+        "stt": settings.OPENAI_TIMEOUT_STT,
+        "tts": settings.OPENAI_TIMEOUT_TTS,
+    }[operation]
+    return httpx.Timeout(read, connect=settings.OPENAI_CONNECT_TIMEOUT)
+
+
+class ConnectionMetrics:
+    """
+    Connection reuse counters of the shared transport.
+
+    A response whose request did not go through a TCP connect (httpcore trace
+    event) was sent on a pooled connection.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.responses = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+        self.http_versions: dict = {}
+        self.status_codes: dict = {}
+
+    async def on_request(self, request: httpx.Request) -> None:
+        self.requests += 1
+
+        async def trace(event_name: str, info: dict) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                self.new_connections += 1
+                request.extensions["new_connection"] = True
+
+        request.extensions["trace"] = trace
+
+    async def on_response(self, response: httpx.Response) -> None:
+        self.responses += 1
+        self.http_versions[response.http_version] = self.http_versions.get(response.http_version, 0) + 1
+        self.status_codes[response.status_code] = self.status_codes.get(response.status_code, 0) + 1
+        if not response.request.extensions.get("new_connection"):
+            self.reused_connections += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "responses": self.responses,
+            "new_connections": self.new_connections,
+            "reused_connections": self.reused_connections,
+            "reuse_ratio": round(self.reused_connections / self.responses, 3) if self.responses else None,
+            "http_versions": dict(self.http_versions),
+            "status_codes": {str(k): v for k, v in self.status_codes.items()},
+        }
+
+
+metrics = ConnectionMetrics()
+
+limiters = {
+    "embeddings": AdaptiveLimiter(
+        "embeddings", settings.OPENAI_MAX_CONCURRENCY_EMBEDDINGS, settings.OPENAI_TOKENS_PER_MINUTE_EMBEDDINGS
+    ),
+    "chat": AdaptiveLimiter("chat", settings.OPENAI_MAX_CONCURRENCY_CHAT, settings.OPENAI_TOKENS_PER_MINUTE_CHAT),
+    "stt": AdaptiveLimiter("stt", settings.OPENAI_MAX_CONCURRENCY_STT),
+    "tts": AdaptiveLimiter("tts", settings.OPENAI_MAX_CONCURRENCY_TTS),
+}
+
+breakers = {
+    operation: CircuitBreaker(
+        operation,
+        failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+        recovery_timeout=settings.CIRCUIT_RECOVERY_SECONDS
+    )
+    for operation in OPERATIONS
+}
+
+_PATH_OPERATIONS = {
+    "/embeddings": "embeddings",
+    "/chat/completions": "chat",
+    "/audio/transcriptions": "stt",
+    "/audio/speech": "tts",
+}
+
+# Failures that say the upstream is down or too slow (timeouts are connection errors)
+_UNHEALTHY = (openai.APIConnectionError, openai.InternalServerError)
+
+# What callers should treat as "upstream unavailable" and degrade on
+UNAVAILABLE_ERRORS = (CircuitOpenError, openai.RateLimitError) + _UNHEALTHY
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token) used for rate budgeting."""
+    return len(text) // 4 + 1
+
+
+async def call(
+    operation: str,
+    request: Callable[[], Awaitable[T]],
+    *,
+    priority: Priority = Priority.INTERACTIVE,
+    tokens: int = 0
+) -> T:
+    """
+    Run one OpenAI request through the circuit breaker and limiter of its operation.
+
+    `request` is called again on each retry, so it must build the whole SDK
+    call (and reopen any file it uploads). Raises CircuitOpenError without
+    calling upstream while the operation's circuit is open. Timeouts are not
+    retried for interactive calls.
+    """
+    limiter = limiters[operation]
+    breaker = breakers[operation]
+    attempt = 0
+    while True:
+        breaker.before_call()
+        healthy = None
+        try:
+            async with limiter.slot(priority, tokens):
+                try:
+                    result = await request()
+                    healthy = True
+                except _UNHEALTHY as e:
+                    healthy = False
+                    error = e
+                except openai.RateLimitError as e:
+                    error = e
+                except openai.APIStatusError:
+                    # The upstream answered: a client error says nothing about its health
+                    healthy = True
+                    raise
+        finally:
+            # Also when cancelled while queued for a slot, so a half-open probe is never left claimed
+            breaker.record(healthy)
+        if healthy:
+            limiter.on_success()
+            return result
+
+        if attempt >= settings.OPENAI_MAX_RETRIES or _is_quota_error(error):
+            raise error
+        if priority == Priority.INTERACTIVE and isinstance(error, openai.APITimeoutError):
+            # A user is waiting: one full timeout is all the turn can afford before degrading
+            raise error
+        delay = _retry_delay(error, attempt)
+        if isinstance(error, openai.RateLimitError):
+            # Hold every caller of this operation, not just this one
+            limiter.on_throttled(delay)
+        limiter.retries += 1
+        attempt += 1
+        await asyncio.sleep(delay)
+
+
+def stream_error(operation: str, error: httpx.HTTPError, request: httpx.Request) -> openai.APIConnectionError:
+    """
+    Failure while reading a streamed response body, after `call` has returned.
+
+    Counted by the operation's circuit breaker and turned into the SDK error
+    callers already degrade on (see UNAVAILABLE_ERRORS); raise the result.
+    """
+    breakers[operation].record(False)
+    if isinstance(error, httpx.TimeoutException):
+        return openai.APITimeoutError(request=request)
+    return openai.APIConnectionError(message=str(error) or "Connection error.", request=request)
+
+
+def _is_quota_error(error: Exception) -> bool:
+    # Exhausted billing quota is reported as a 429 but will not recover by waiting
+    return isinstance(error, openai.RateLimitError) and getattr(error, "code", None) == "insufficient_quota"
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    retry_after = _retry_after(error)
+    if retry_after is not None:
+        return retry_after * random.uniform(1.0, 1.2)
+    # Full jitter exponential backoff
+    cap = min(settings.OPENAI_RETRY_MAX_DELAY, settings.OPENAI_RETRY_BASE_DELAY * 2 ** attempt)
+    return random.uniform(0, cap)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        if "retry-after-ms" in response.headers:
+            return float(response.headers["retry-after-ms"]) / 1000
+        if "retry-after" in response.headers:
+            return float(response.headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+async def observe_rate_limits(response: httpx.Response) -> None:
+    """Response hook feeding x-ratelimit-* headers to the matching limiter."""
+    path = response.request.url.path
+    for suffix, operation in _PATH_OPERATIONS.items():
+        if path.endswith(suffix):
+            limiters[operation].observe_headers(response.headers)
+            return
+
+
+def build_http_client() -> httpx.AsyncClient:
+    """The pooled HTTP/2 transport shared by every OpenAI call of the process."""
+    return httpx.AsyncClient(
+        http2=settings.OPENAI_HTTP2,
+        limits=httpx.Limits(
+            max_connections=settings.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(settings.OPENAI_TIMEOUT_CHAT, connect=settings.OPENAI_CONNECT_TIMEOUT),
+        follow_redirects=True,
+        event_hooks={"request": [metrics.on_request], "response": [metrics.on_response, observe_rate_limits]},
+    )
+
+
+def build_openai_client() -> AsyncOpenAI:
+    # Retries are handled by `call` so they go back through the limiter
+    return AsyncOpenAI(api_key=settings.OPENAI_API_KEY, http_client=build_http_client(), max_retries=0)
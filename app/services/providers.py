@@ -0,0 +1,366 @@
+"""
+Inference providers behind RAGService, AudioService and LLMService.
+
+Each capability has a small interface with an OpenAI implementation and a
+deterministic in-process stub (no network, configurable latency) for load
+tests, benchmarks and CI. Embeddings can also run on a local CPU model.
+The implementation is picked per capability in Settings
+(EMBEDDING_PROVIDER, STT_PROVIDER, TTS_PROVIDER, LLM_PROVIDER).
+"""
+import asyncio
+import hashlib
+import io
+import json
+import re
+import threading
+import wave
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+import numpy as np
+from openai import AsyncOpenAI
+
+from app.core.config import settings
+from app.core.rate_limit import Priority
+from app.services import openai_client
+from app.services.openai_client import timeout_for
+
+# KBEmbedding.embedding is a Vector(1536): every embedding provider must fill it
+EMBEDDING_DIMENSIONS = 1536
+
+# Tokens reserved per completion when budgeting the chat rate limit
+COMPLETION_TOKEN_ESTIMATE = 400
+
+# Size of the audio chunks streamed out of text-to-speech
+TTS_CHUNK_BYTES = 16 * 1024
+
+
+@dataclass
+class ChatReply:
+    """A chat completion: either text or a single tool call (arguments as JSON)."""
+    content: Optional[str] = None
+    tool_name: Optional[str] = None
+    tool_arguments: Optional[str] = None
+
+
+class Provider(ABC):
+    name: str
+    model: str
+
+    async def warm_up(self) -> None:
+        """Load models / open connections ahead of the first request."""
+
+
+class EmbeddingProvider(Provider):
+    @abstractmethod
+    async def embed(self, text: str, priority: Priority = Priority.INTERACTIVE) -> List[float]:
+        ...
+
+
+class SpeechToTextProvider(Provider):
+    @abstractmethod
+    async def transcribe(self, file_path: str) -> str:
+        ...
+
+
+class TextToSpeechProvider(Provider):
+    # Format of the audio produced by `stream`
+    extension: str = "mp3"
+    content_type: str = "audio/mpeg"
+
+    @abstractmethod
+    def stream(self, text: str) -> AsyncIterator[bytes]:
+        """The audio of `text`, chunk by chunk as the provider produces it."""
+        ...
+
+
+class ChatProvider(Provider):
+    @abstractmethod
+    async def complete(self, messages: List[Dict[str, str]], tools: Optional[list] = None) -> ChatReply:
+        ...
+
+
+# --- OpenAI ---
+
+class OpenAIEmbeddings(EmbeddingProvider):
+    name = "openai"
+
+    def __init__(self, client: AsyncOpenAI, model: str = "text-embedding-3-small"):
+        self.client = client
+        self.model = model
+
+    async def embed(self, text: str, priority: Priority = Priority.INTERACTIVE) -> List[float]:
+        response = await openai_client.call(
+            "embeddings",
+            lambda: self.client.embeddings.create(
+                input=[text], model=self.model, timeout=timeout_for("embeddings")
+            ),
+            priority=priority,
+            tokens=openai_client.estimate_tokens(text)
+        )
+        return response.data[0].embedding
+
+
+class OpenAISpeechToText(SpeechToTextProvider):
+    name = "openai"
+
+    def __init__(self, client: AsyncOpenAI, model: str = "whisper-1"):
+        self.client = client
+        self.model = model
+
+    async def transcribe(self, file_path: str) -> str:
+        async def request():
+            # Reopened on every attempt: a retry must upload the whole file again
+            with open(file_path, "rb") as audio_file:
+                return await self.client.audio.transcriptions.create(
+                    model=self.model,
+                    file=audio_file,
+                    language="fr", # Hint for better accuracy
+                    timeout=timeout_for("stt")
+                )
+
+        transcript = await openai_client.call("stt", request)
+        return transcript.text
+
+
+class OpenAITextToSpeech(TextToSpeechProvider):
+    name = "openai"
+    extension = "mp3"
+    content_type = "audio/mpeg"
+
+    def __init__(self, client: AsyncOpenAI, model: str = "tts-1", voice: str = "nova"):
+        self.client = client
+        self.model = model
+        self.voice = voice # alloy, echo, fable, onyx, nova, shimmer
+
+    async def stream(self, text: str) -> AsyncIterator[bytes]:
+        async with AsyncExitStack() as stack:
+            async def request():
+                # Only the status and headers are awaited here: the body is read below
+                return await stack.enter_async_context(
+                    self.client.audio.speech.with_streaming_response.create(
+                        model=self.model,
+                        voice=self.voice,
+                        input=text,
+                        response_format=self.extension,
+                        timeout=timeout_for("tts")
+                    )
+                )
+
+            response = await openai_client.call("tts", request)
+            try:
+                async for chunk in response.iter_bytes(TTS_CHUNK_BYTES):
+                    yield chunk
+            except httpx.HTTPError as e:
+                # Read timeout or dropped connection in the middle of the audio
+                raise openai_client.stream_error("tts", e, response.http_request) from e
+
+
+class OpenAIChat(ChatProvider):
+    name = "openai"
+
+    def __init__(self, client: AsyncOpenAI, model: str):
+        self.client = client
+        self.model = model
+
+    async def complete(self, messages: List[Dict[str, str]], tools: Optional[list] = None) -> ChatReply:
+        kwargs = {"model": self.model, "messages": messages, "timeout": timeout_for("chat")}
+        if tools:
+            kwargs.update(tools=tools, tool_choice="auto")
+        # Prompt plus a typical answer, counted against the chat token budget
+        tokens = sum(openai_client.estimate_tokens(m["content"]) for m in messages) + COMPLETION_TOKEN_ESTIMATE
+
+        response = await openai_client.call(
+            "chat", lambda: self.client.chat.completions.create(**kwargs), tokens=tokens
+        )
+        message = response.choices[0].message
+        if message.tool_calls:
+            tool_call = message.tool_calls[0]
+            return ChatReply(tool_name=tool_call.function.name, tool_arguments=tool_call.function.arguments)
+        return ChatReply(content=message.content)
+
+
+# --- Deterministic stubs ---
+
+async def _stub_latency(operation: str) -> None:
+    delay = settings.STUB_LATENCY_MS.get(operation, 0)
+    if delay:
+        await asyncio.sleep(delay / 1000)
+
+
+@lru_cache(maxsize=50000)
+def _word_vector(word: str) -> np.ndarray:
+    seed = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "little")
+    return np.random.default_rng(seed).standard_normal(EMBEDDING_DIMENSIONS).astype(np.float32)
+
+
+class StubEmbeddings(EmbeddingProvider):
+    """
+    Bag-of-words vectors: each word maps to a fixed pseudo-random vector, so
+    texts sharing words are close and vector search still behaves sensibly.
+    """
+    name = "stub"
+    model = "stub-embeddings"
+
+    async def embed(self, text: str, priority: Priority = Priority.INTERACTIVE) -> List[float]:
+        await _stub_latency("embeddings")
+        return self.vector(text).tolist()
+
+    @staticmethod
+    def vector(text: str) -> np.ndarray:
+        """The embedding of `text`, without the simulated latency (for seeding)."""
+        vector = np.zeros(EMBEDDING_DIMENSIONS, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            vector += _word_vector(word)
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector
+
+
+class StubSpeechToText(SpeechToTextProvider):
+    name = "stub"
+    model = "stub-stt"
+
+    async def transcribe(self, file_path: str) -> str:
+        await _stub_latency("stt")
+        return settings.STUB_TRANSCRIPTION
+
+
+class StubTextToSpeech(TextToSpeechProvider):
+    """Streams a silent 16 kHz WAV whose length follows the text, like real speech."""
+    name = "stub"
+    model = "stub-tts"
+    extension = "wav"
+    content_type = "audio/wav"
+
+    SAMPLE_RATE = 16000
+    SECONDS_PER_CHAR = 0.06
+
+    async def stream(self, text: str) -> AsyncIterator[bytes]:
+        # The simulated latency is the time to the first chunk
+        await _stub_latency("tts")
+        frames = int(min(len(text) * self.SECONDS_PER_CHAR, 60) * self.SAMPLE_RATE)
+        audio = self._silence(frames)
+        for start in range(0, len(audio), TTS_CHUNK_BYTES):
+            yield audio[start:start + TTS_CHUNK_BYTES]
+            await asyncio.sleep(0)
+
+    def _silence(self, frames: int) -> bytes:
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.SAMPLE_RATE)
+            wav.writeframes(b"\x00\x00" * frames)
+        return buffer.getvalue()
+
+
+class StubChat(ChatProvider):
+    """
+    Canned but input-dependent replies: appointment requests trigger a
+    search_doctors tool call, tool outputs are summarized, anything else is
+    answered with the first sentence of the knowledge base context.
+    """
+    name = "stub"
+    model = "stub-chat"
+
+    APPOINTMENT_WORDS = re.compile(r"rendez|rdv|médecin|medecin|docteur|consultation", re.IGNORECASE)
+
+    async def complete(self, messages: List[Dict[str, str]], tools: Optional[list] = None) -> ChatReply:
+        await _stub_latency("chat")
+        user = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        tool_output = next(
+            (m["content"] for m in messages if m["role"] == "system" and m["content"].startswith("System (Tool")),
+            None
+        )
+        if tool_output:
+            return ChatReply(content=f"Voici ce que j'ai trouvé : {tool_output.split(':', 1)[-1].strip()[:300]}")
+        if tools and self.APPOINTMENT_WORDS.search(user):
+            return ChatReply(tool_name="search_doctors", tool_arguments=json.dumps({}))
+
+        context = messages[0]["content"].split("Context from Knowledge Base:", 1)[-1] if messages else ""
+        match = re.search(r"Content: (.+?[.!?])(\s|$)", context, re.DOTALL)
+        sentence = match.group(1).strip() if match else "Je n'ai pas d'information à ce sujet."
+        return ChatReply(content=f"Réponse simulée. {sentence}")
+
+
+# --- Local CPU embeddings ---
+
+class LocalEmbeddings(EmbeddingProvider):
+    """
+    sentence-transformers model on CPU, in a dedicated thread pool.
+
+    Vectors are zero-padded to EMBEDDING_DIMENSIONS, which keeps distances
+    between them unchanged. They are not comparable with OpenAI vectors:
+    re-embed the knowledge base when switching EMBEDDING_PROVIDER.
+    """
+    name = "local"
+
+    def __init__(self, model: Optional[str] = None, threads: Optional[int] = None):
+        self.model = model or settings.LOCAL_EMBEDDING_MODEL
+        self._encoder = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=threads or settings.LOCAL_EMBEDDING_THREADS, thread_name_prefix="local-embeddings"
+        )
+
+    def _load(self):
+        with self._lock:
+            if self._encoder is None:
+                # Optional dependency, only needed with EMBEDDING_PROVIDER=local
+                from sentence_transformers import SentenceTransformer
+                self._encoder = SentenceTransformer(self.model, device="cpu")
+        return self._encoder
+
+    def _encode(self, text: str) -> List[float]:
+        vector = self._load().encode(text, normalize_embeddings=True)
+        if len(vector) > EMBEDDING_DIMENSIONS:
+            raise ValueError(f"{self.model} produces {len(vector)} dimensions, more than {EMBEDDING_DIMENSIONS}")
+        return np.pad(vector, (0, EMBEDDING_DIMENSIONS - len(vector))).tolist()
+
+    async def embed(self, text: str, priority: Priority = Priority.INTERACTIVE) -> List[float]:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._encode, text)
+
+    async def warm_up(self) -> None:
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._load)
+
+
+# --- Factories ---
+
+def _openai_client(client: Optional[AsyncOpenAI]) -> AsyncOpenAI:
+    return client or AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+
+
+def build_embedding_provider(client: Optional[AsyncOpenAI] = None) -> EmbeddingProvider:
+    if settings.EMBEDDING_PROVIDER == "stub":
+        return StubEmbeddings()
+    if settings.EMBEDDING_PROVIDER == "local":
+        return LocalEmbeddings()
+    return OpenAIEmbeddings(_openai_client(client))
+
+
+def build_stt_provider(client: Optional[AsyncOpenAI] = None) -> SpeechToTextProvider:
+    if settings.STT_PROVIDER == "stub":
+        return StubSpeechToText()
+    return OpenAISpeechToText(_openai_client(client))
+
+
+def build_tts_provider(client: Optional[AsyncOpenAI] = None) -> TextToSpeechProvider:
+    if settings.TTS_PROVIDER == "stub":
+        return StubTextToSpeech()
+    return OpenAITextToSpeech(_openai_client(client))
+
+
+def build_chat_provider(client: Optional[AsyncOpenAI] = None) -> Optional[ChatProvider]:
+    """None when OpenAI is selected but no API key is configured (LLMService answers a mock text)."""
+    if settings.LLM_PROVIDER == "stub":
+        return StubChat()
+    if client is None and not settings.OPENAI_API_KEY:
+        return None
+    return OpenAIChat(_openai_client(client), settings.OPENAI_MODEL)
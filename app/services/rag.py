@@ -1,18 +1,20 @@
-from typing import List
-from openai import AsyncOpenAI
-from app.core.config import settings
+from typing import List, Optional
+from app.core.rate_limit import Priority
+from app.core.singleflight import SingleFlight
+from app.services.providers import EmbeddingProvider, build_embedding_provider
 
 class RAGService:
-    def __init__(self):
-        print("Initializing OpenAI Client for Embeddings...")
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        self.model = "text-embedding-3-small"
+    def __init__(self, provider: Optional[EmbeddingProvider] = None):
+        self.provider = provider or build_embedding_provider()
+        self._inflight = SingleFlight("embeddings")
 
-    async def embed_text(self, text: str) -> List[float]:
-        """Generate embedding using OpenAI API"""
+    async def embed_text(self, text: str, priority: Priority = Priority.INTERACTIVE) -> List[float]:
+        """Generate embedding with the configured provider (ingestion passes Priority.INGESTION)"""
         text = text.replace("\n", " ")
-        response = await self.client.embeddings.create(input=[text], model=self.model)
-        return response.data[0].embedding
+        # Identical texts embedded concurrently (the same FAQ question) share one call
+        return await self._inflight.do(
+            (self.provider.model, text), lambda: self.provider.embed(text, priority)
+        )
 
     async def search_kb(self, db, entity_id, query_embedding, top_k=3):
         from sqlalchemy import select
@@ -34,3 +36,25 @@ class RAGService:
         
         result = await db.execute(stmt)
         return result.scalars().all()
+
+    async def search_kb_text(self, db, entity_id, query: str, top_k=3):
+        """Keyword search over chunk contents, used when embeddings are unavailable."""
+        from sqlalchemy import Text, func, select
+        from sqlalchemy.orm import selectinload
+        from app.models.knowledge import KBChunk, KBDocument
+
+        # Any of the query's lexemes may match: turn plainto_tsquery's ANDs into ORs
+        ts_query = func.to_tsquery(
+            "french", func.replace(func.plainto_tsquery("french", query).cast(Text), "&", "|")
+        )
+        ts_vector = func.to_tsvector("french", KBChunk.content)
+        stmt = (
+            select(KBChunk)
+            .join(KBDocument)
+            .options(selectinload(KBChunk.document))
+            .filter(KBDocument.entity_id == entity_id, ts_vector.op("@@")(ts_query))
+            .order_by(func.ts_rank(ts_vector, ts_query).desc())
+            .limit(top_k)
+        )
+        result = await db.execute(stmt)
+        return result.scalars().all()
@@ -0,0 +1,277 @@
+"""
+Retention of the audio files written to UPLOAD_DIR.
+
+A background pass (every AUDIO_RETENTION_INTERVAL_SECONDS, one worker at a
+time through a Postgres advisory lock) scans the directory and:
+
+- deletes orphans: files no message points at any more (deleted sessions,
+  `scripts/clear_chat_messages.py`, crashes between write and commit);
+- archives cold audio to object storage (MinIO) after AUDIO_ARCHIVE_AFTER_DAYS,
+  or sooner, oldest first, while the directory is above AUDIO_MAX_LOCAL_BYTES
+  (with AUDIO_STORAGE="minio", every referenced file left in UPLOAD_DIR);
+- expires audio older than AUDIO_RETENTION_DAYS, locally or in the archive:
+  the file is deleted and the message keeps its text with no audio.
+
+Files younger than AUDIO_RETENTION_GRACE_SECONDS are never touched: they may
+belong to a turn not committed yet or wait for transcoding.
+"""
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import select, text, update
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.models.chat import Message
+from app.services.audio_store import OBJECT_AUDIO_PREFIX, AudioStore, repoint
+
+_LOCK_KEY = 0x746F6E74  # pg advisory lock shared by every worker
+
+
+@dataclass
+class AudioFile:
+    path: str
+    size: int
+    mtime: float
+
+
+class AudioRetention:
+    def __init__(self, upload_dir: Optional[str] = None, store: Optional[AudioStore] = None):
+        self.upload_dir = upload_dir or settings.UPLOAD_DIR
+        # Object storage for archived audio, None: cold audio stays local
+        self.store = store
+        self._task: Optional[asyncio.Task] = None
+        self.running = False
+        self.runs = 0
+        self.skipped_runs = 0  # Another worker held the lock
+        self.last_run_at: Optional[datetime] = None
+        self.last_duration_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last: Dict[str, int] = {}
+        self.totals: Dict[str, int] = {}
+
+    @property
+    def archiving(self) -> bool:
+        return self.store is not None and (self.store.enabled or settings.AUDIO_ARCHIVE_AFTER_DAYS is not None)
+
+    def start(self) -> None:
+        if settings.AUDIO_RETENTION_ENABLED and self._task is None:
+            self._task = asyncio.ensure_future(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = repr(e)
+                print(f"Audio retention pass failed: {e!r}")
+            await asyncio.sleep(settings.AUDIO_RETENTION_INTERVAL_SECONDS)
+
+    async def run_once(self, dry_run: bool = False) -> Optional[Dict[str, int]]:
+        """One retention pass; returns its counters, None if another worker is running one."""
+        async with engine.connect() as lock_conn:
+            locked = (await lock_conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": _LOCK_KEY})).scalar()
+            if not locked:
+                self.skipped_runs += 1
+                return None
+            try:
+                return await self._run(dry_run)
+            finally:
+                await lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _LOCK_KEY})
+
+    async def _run(self, dry_run: bool) -> Dict[str, int]:
+        started = time.perf_counter()
+        self.running = True
+        counts = dict.fromkeys((
+            "scanned", "scanned_bytes", "orphans", "orphan_bytes", "archived", "archived_bytes",
+            "expired", "expired_bytes", "archive_expired", "errors", "local_bytes"
+        ), 0)
+        try:
+            now = time.time()
+            files = await asyncio.to_thread(self._scan, now - settings.AUDIO_RETENTION_GRACE_SECONDS)
+            counts["scanned"] = len(files)
+            counts["scanned_bytes"] = sum(f.size for f in files)
+
+            referenced = await self._referenced(files)
+            kept: List[AudioFile] = []
+            for f in files:
+                if f.path in referenced:
+                    kept.append(f)
+                    continue
+                counts["orphans"] += 1
+                counts["orphan_bytes"] += f.size
+                if not dry_run:
+                    await asyncio.to_thread(_remove, f.path)
+
+            expire_before = _cutoff(now, settings.AUDIO_RETENTION_DAYS)
+            archive_before = None
+            if self.archiving:
+                # Local files are only working copies with object storage: archive whatever is left
+                archive_before = now if self.store.enabled else _cutoff(now, settings.AUDIO_ARCHIVE_AFTER_DAYS)
+            kept.sort(key=lambda f: f.mtime)  # Oldest first
+            local_bytes = sum(f.size for f in kept)
+            for f in kept:
+                over_size = settings.AUDIO_MAX_LOCAL_BYTES is not None and local_bytes > settings.AUDIO_MAX_LOCAL_BYTES
+                if expire_before is not None and f.mtime < expire_before:
+                    action = "expired"
+                elif archive_before is not None and (f.mtime < archive_before or over_size):
+                    action = "archived"
+                elif over_size:
+                    # No archive to move to: the size limit wins over keeping the audio
+                    action = "expired"
+                else:
+                    continue
+                try:
+                    if not dry_run:
+                        if action == "archived":
+                            await self._archive(f, referenced[f.path])
+                        else:
+                            await self._expire_local(f, referenced[f.path])
+                except Exception as e:
+                    counts["errors"] += 1
+                    print(f"Audio retention could not handle {f.path}: {e!r}")
+                    continue
+                counts[action] += 1
+                counts[f"{action}_bytes"] += f.size
+                local_bytes -= f.size
+            counts["local_bytes"] = local_bytes
+
+            if self.store is not None and expire_before is not None:
+                counts["archive_expired"] = await self._expire_archived(expire_before, dry_run)
+        finally:
+            self.running = False
+
+        self.runs += 1
+        self.last_run_at = datetime.now(timezone.utc)
+        self.last_duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.last_error = None
+        self.last = counts
+        if not dry_run:
+            for key, value in counts.items():
+                if key != "local_bytes":
+                    self.totals[key] = self.totals.get(key, 0) + value
+        return counts
+
+    def _scan(self, older_than: float) -> List[AudioFile]:
+        files = []
+        try:
+            entries = os.scandir(self.upload_dir)
+        except FileNotFoundError:
+            return files
+        with entries:
+            for entry in entries:
+                if entry.name.startswith(".") or not entry.is_file(follow_symlinks=False):
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                if stat.st_mtime < older_than:
+                    files.append(AudioFile(os.path.join(self.upload_dir, entry.name), stat.st_size, stat.st_mtime))
+        return files
+
+    async def _referenced(self, files: List[AudioFile]) -> Dict[str, Set[str]]:
+        """Files with at least one message pointing at them, with the audio_path values used."""
+        # Messages store the path as written (UPLOAD_DIR + name); absolute paths are matched too
+        aliases: Dict[str, str] = {}
+        for f in files:
+            aliases[f.path] = f.path
+            aliases[os.path.abspath(f.path)] = f.path
+        referenced: Dict[str, Set[str]] = {}
+        candidates = list(aliases)
+        batch = settings.AUDIO_RETENTION_BATCH_SIZE
+        async with AsyncSessionLocal() as db:
+            for i in range(0, len(candidates), batch):
+                result = await db.execute(
+                    select(Message.audio_path).where(Message.audio_path.in_(candidates[i:i + batch])).distinct()
+                )
+                for audio_path in result.scalars():
+                    referenced.setdefault(aliases[audio_path], set()).add(audio_path)
+        return referenced
+
+    async def _archive(self, f: AudioFile, audio_paths: Set[str]) -> None:
+        audio_path = await self.store.publish(f.path)
+        for old_path in audio_paths:
+            await repoint(old_path, audio_path)
+        await asyncio.to_thread(_remove, f.path)
+
+    async def _expire_local(self, f: AudioFile, audio_paths: Set[str]) -> None:
+        for old_path in audio_paths:
+            await repoint(old_path, None)
+        await asyncio.to_thread(_remove, f.path)
+
+    async def _expire_archived(self, before: float, dry_run: bool) -> int:
+        """Drop the archived audio of messages older than `before`, a batch of objects at a time."""
+        created_before = datetime.fromtimestamp(before, timezone.utc)
+        expired = 0
+        last_path = ""
+        while True:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(Message.audio_path)
+                    .where(
+                        Message.audio_path.startswith(OBJECT_AUDIO_PREFIX),
+                        Message.audio_path > last_path,
+                        Message.created_at < created_before,
+                    )
+                    .distinct()
+                    .order_by(Message.audio_path)
+                    .limit(settings.AUDIO_RETENTION_BATCH_SIZE)
+                )
+                paths = list(result.scalars())
+            if not paths:
+                return expired
+            last_path = paths[-1]
+            for audio_path in paths:
+                if not dry_run:
+                    try:
+                        await self._expire_object(audio_path, created_before)
+                    except Exception as e:
+                        print(f"Audio retention could not expire {audio_path}: {e!r}")
+                        continue
+                expired += 1
+
+    async def _expire_object(self, audio_path: str, created_before: datetime) -> None:
+        # Identical audio shares one object: newer messages may still use it
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Message)
+                .where(Message.audio_path == audio_path, Message.created_at < created_before)
+                .values(audio_path=None)
+            )
+            await db.commit()
+        await self.store.delete_if_unreferenced(audio_path)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.AUDIO_RETENTION_ENABLED,
+            "archiving": self.archiving,
+            "running": self.running,
+            "runs": self.runs,
+            "skipped_runs": self.skipped_runs,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_duration_ms": self.last_duration_ms,
+            "last_error": self.last_error,
+            "last": self.last,
+            "totals": self.totals,
+        }
+
+
+def _cutoff(now: float, days: Optional[float]) -> Optional[float]:
+    return now - timedelta(days=days).total_seconds() if days is not None else None
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
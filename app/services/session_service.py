@@ -0,0 +1,111 @@
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.chat import Session
+
+
+@dataclass
+class ActiveSession:
+    session_id: UUID
+    entity_id: UUID
+    instance_id: Optional[UUID]
+    expires_at: datetime
+
+
+class SessionService:
+    """
+    Resolves the chat session of a turn from the session id carried by the client.
+
+    Active sessions are kept in an in-process cache so a normal turn costs no
+    session query at all; expiry is enforced through `Session.expires_at` with a
+    sliding window of SESSION_TTL_MINUTES.
+    """
+
+    def __init__(self):
+        self.ttl = timedelta(minutes=settings.SESSION_TTL_MINUTES)
+        self._cache: TTLCache[ActiveSession] = TTLCache(
+            ttl=self.ttl.total_seconds(), maxsize=settings.SESSION_CACHE_SIZE
+        )
+
+    async def resolve(
+        self,
+        db: AsyncSession,
+        *,
+        entity_id: UUID,
+        instance_id: UUID,
+        speaker_id: Optional[UUID],
+        session_id: Optional[UUID] = None
+    ) -> UUID:
+        """
+        Return the id of the session to use for this turn.
+
+        A known, active, unexpired session of the same entity is reused; otherwise
+        a new one is opened for this kiosk. Session writes are only added to `db`
+        and go out with the caller's next commit (the user message).
+        """
+        now = datetime.now(timezone.utc)
+
+        active = await self._lookup(db, session_id) if session_id else None
+        if active and active.entity_id == entity_id:
+            if active.expires_at > now:
+                # Slide the expiry, but only write it back once half the window is used
+                if active.expires_at - now < self.ttl / 2:
+                    active.expires_at = now + self.ttl
+                    await db.execute(
+                        update(Session)
+                        .where(Session.session_id == active.session_id)
+                        .values(expires_at=active.expires_at)
+                    )
+                self._remember(active, now)
+                return active.session_id
+            await self.close(db, active.session_id)
+
+        session = Session(
+            session_id=uuid.uuid4(),
+            entity_id=entity_id,
+            instance_id=instance_id,
+            speaker_id=speaker_id,
+            is_active=True,
+            expires_at=now + self.ttl
+        )
+        db.add(session)
+        self._remember(
+            ActiveSession(session.session_id, entity_id, instance_id, session.expires_at), now
+        )
+        return session.session_id
+
+    async def close(self, db: AsyncSession, session_id: UUID) -> None:
+        """Mark a session inactive (flushed with the caller's next commit)."""
+        self.forget(session_id)
+        await db.execute(
+            update(Session).where(Session.session_id == session_id).values(is_active=False)
+        )
+
+    def forget(self, session_id: UUID) -> None:
+        self._cache.delete(session_id)
+
+    async def _lookup(self, db: AsyncSession, session_id: UUID) -> Optional[ActiveSession]:
+        active = self._cache.get(session_id)
+        if active:
+            return active
+
+        # Unknown to this worker (restart, other worker): one primary-key read
+        session = await db.get(Session, session_id)
+        if not session or not session.is_active:
+            return None
+        expires_at = session.expires_at or datetime.now(timezone.utc)
+        return ActiveSession(session.session_id, session.entity_id, session.instance_id, expires_at)
+
+    def _remember(self, active: ActiveSession, now: datetime) -> None:
+        self._cache.set(active.session_id, active, ttl=(active.expires_at - now).total_seconds())
+
+
+# Singleton
+session_service = SessionService()
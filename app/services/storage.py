@@ -1,47 +1,368 @@
+"""
+Object storage behind knowledge documents and chat audio.
+
+One small interface with three backends, picked in Settings (STORAGE_BACKEND):
+MinIO / S3 for production, a local directory (served under STORAGE_LOCAL_URL)
+for single-node installs, and an in-process dict for tests and offline
+ingestion benchmarks. Nothing connects at import or construction: MinIO is
+reached on first use, and `health()` probes a backend on demand.
+"""
+import asyncio
+import io
+import os
+import shutil
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+from typing import BinaryIO, Dict, Optional, Tuple
+from urllib.parse import quote
+
+import urllib3
 from minio import Minio
 from minio.error import S3Error
+
+from app.core.cache import TTLCache
 from app.core.config import settings
-import io
 
-class MinioService:
+_COPY_BUFFER = 1024 * 1024
+
+
+class StorageBackend(ABC):
+    name: str
+
+    async def ensure_bucket(self) -> None:
+        """Prepare the backend (bucket, directory); called before the first write."""
+
+    async def upload_file(self, file_data: bytes, file_name: str, content_type: str) -> str:
+        """
+        Uploads in-memory bytes and returns the object name.
+        """
+        return await self.upload_stream(io.BytesIO(file_data), file_name, content_type, length=len(file_data))
+
+    @abstractmethod
+    async def upload_stream(
+        self,
+        stream: BinaryIO,
+        file_name: str,
+        content_type: str,
+        length: int = -1,
+        cache_control: Optional[str] = None
+    ) -> str:
+        """Uploads a readable file object (e.g. `UploadFile.file`) and returns the object name."""
+
+    @abstractmethod
+    async def upload_path(self, file_path: str, file_name: str, content_type: str, cache_control: Optional[str] = None) -> str:
+        """Uploads a local file and returns the object name."""
+
+    @abstractmethod
+    async def exists(self, file_name: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def delete_file(self, file_name: str) -> None:
+        ...
+
+    @abstractmethod
+    def get_file_url(self, file_name: str, expires: timedelta = timedelta(days=7)) -> str:
+        """URL clients can fetch the object from."""
+
+    async def health(self) -> dict:
+        """Whether the backend can be reached right now."""
+        return {"backend": self.name, "ok": True}
+
+    def stats(self) -> dict:
+        return {"backend": self.name}
+
+    def close(self) -> None:
+        pass
+
+
+class MinioService(StorageBackend):
+    """
+    Async facade over the (blocking) MinIO client.
+
+    Every network call runs on a dedicated, bounded thread pool sized like the
+    client's connection pool, so uploads never block the event loop and at most
+    MINIO_IO_THREADS requests are in flight per worker. Uploads stream from a
+    file object in MINIO_PART_SIZE multipart chunks: memory use is one part,
+    whatever the file size. Presigned URLs are cached until shortly before
+    they expire, so the same object keeps the same URL (and browser cache entry).
+    """
+
+    name = "minio"
+
     def __init__(self):
+        threads = settings.MINIO_IO_THREADS
         self.client = Minio(
             settings.MINIO_ENDPOINT,
             access_key=settings.MINIO_ACCESS_KEY,
             secret_key=settings.MINIO_SECRET_KEY,
-            secure=settings.MINIO_SECURE
+            secure=settings.MINIO_SECURE,
+            # Known region: presigning needs no bucket location request
+            region=settings.MINIO_REGION,
+            http_client=urllib3.PoolManager(
+                maxsize=threads,
+                timeout=urllib3.Timeout(connect=settings.MINIO_CONNECT_TIMEOUT, read=settings.MINIO_READ_TIMEOUT),
+                retries=urllib3.Retry(total=3, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504])
+            )
         )
         self.bucket_name = settings.MINIO_BUCKET
-        self._ensure_bucket_exists()
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="minio")
+        self._bucket_checked = False
+        self._bucket_lock = asyncio.Lock()
+        self._urls: TTLCache[tuple] = TTLCache(ttl=0, maxsize=settings.MINIO_URL_CACHE_SIZE)
+        self.in_flight = 0
+        self.stats_counters = {"uploads": 0, "upload_bytes": 0, "deletes": 0, "errors": 0}
+
+    async def _run(self, fn, *args, **kwargs):
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, partial(fn, *args, **kwargs))
+        except S3Error:
+            self.stats_counters["errors"] += 1
+            raise
+        finally:
+            self.in_flight -= 1
 
-    def _ensure_bucket_exists(self):
+    async def ensure_bucket(self):
+        """Create the bucket if needed (checked once per process)."""
+        if self._bucket_checked:
+            return
+        async with self._bucket_lock:
+            if not self._bucket_checked:
+                await self._run(self._create_bucket)
+                self._bucket_checked = True
+
+    def _create_bucket(self):
         if not self.client.bucket_exists(self.bucket_name):
             self.client.make_bucket(self.bucket_name)
 
-    def upload_file(self, file_data: bytes, file_name: str, content_type: str) -> str:
+    async def upload_stream(
+        self,
+        stream: BinaryIO,
+        file_name: str,
+        content_type: str,
+        length: int = -1,
+        cache_control: Optional[str] = None
+    ) -> str:
         """
-        Uploads a file to MinIO and returns the object name.
+        Uploads a readable file object (e.g. `UploadFile.file`) and returns the object name.
+
+        With an unknown `length` the object is sent as a multipart upload of
+        MINIO_PART_SIZE parts read one at a time from `stream`.
         """
+        await self.ensure_bucket()
+        metadata = {"Cache-Control": cache_control} if cache_control else None
         try:
-            result = self.client.put_object(
+            result = await self._run(
+                self.client.put_object,
                 self.bucket_name,
                 file_name,
-                io.BytesIO(file_data),
-                len(file_data),
-                content_type=content_type
+                stream,
+                length,
+                content_type=content_type,
+                metadata=metadata,
+                part_size=settings.MINIO_PART_SIZE if length < 0 else 0
             )
-            return file_name
         except S3Error as e:
             print(f"MinIO Upload Error: {e}")
             raise e
+        self.stats_counters["uploads"] += 1
+        if length >= 0:
+            self.stats_counters["upload_bytes"] += length
+        return result.object_name
+
+    async def upload_path(self, file_path: str, file_name: str, content_type: str, cache_control: Optional[str] = None) -> str:
+        """
+        Uploads a local file to MinIO (streamed from disk) and returns the object name.
+        """
+        await self.ensure_bucket()
+        metadata = {"Cache-Control": cache_control} if cache_control else None
+        await self._run(
+            self.client.fput_object, self.bucket_name, file_name, file_path,
+            content_type=content_type, metadata=metadata, part_size=settings.MINIO_PART_SIZE
+        )
+        self.stats_counters["uploads"] += 1
+        return file_name
+
+    async def exists(self, file_name: str) -> bool:
+        try:
+            await self._run(self.client.stat_object, self.bucket_name, file_name)
+            return True
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchObject", "NoSuchBucket"):
+                return False
+            raise
 
-    def get_file_url(self, file_name: str) -> str:
+    def get_file_url(self, file_name: str, expires: timedelta = timedelta(days=7)) -> str:
         """
-        Generates a presigned URL for the file.
+        Generates a presigned URL for the file (computed locally, reused until close to expiry).
         """
-        return self.client.presigned_get_object(self.bucket_name, file_name)
+        cached = self._urls.get(file_name)
+        if cached is not None and cached[0] == expires:
+            return cached[1]
+        url = self.client.presigned_get_object(self.bucket_name, file_name, expires=expires)
+        # Never handed out with less than MINIO_URL_MIN_VALIDITY_SECONDS (or half its lifetime) left
+        lifetime = expires.total_seconds()
+        self._urls.set(file_name, (expires, url), ttl=min(lifetime - settings.MINIO_URL_MIN_VALIDITY_SECONDS, lifetime / 2))
+        return url
+
+    async def delete_file(self, file_name: str):
+        await self._run(self.client.remove_object, self.bucket_name, file_name)
+        self.stats_counters["deletes"] += 1
+        self._urls.delete(file_name)
+
+    async def health(self) -> dict:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(
+                self._run(self.client.bucket_exists, self.bucket_name), settings.STORAGE_HEALTH_TIMEOUT_SECONDS
+            )
+        except Exception as e:
+            return {"backend": self.name, "ok": False, "error": repr(e)}
+        return {"backend": self.name, "ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            **self.stats_counters,
+            "in_flight": self.in_flight,  # Beyond MINIO_IO_THREADS, calls wait for a thread
+            "presigned_urls": self._urls.stats(),
+        }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+class LocalStorage(StorageBackend):
+    """
+    Objects as files under STORAGE_LOCAL_DIR (object names become relative paths).
+
+    Served by the API under STORAGE_LOCAL_URL; writes go to a temporary file
+    renamed into place, so readers never see a partial object.
+    """
+
+    name = "local"
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = os.path.abspath(root or settings.STORAGE_LOCAL_DIR)
+        self.stats_counters = {"uploads": 0, "upload_bytes": 0, "deletes": 0}
+
+    def _path(self, file_name: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, file_name))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid object name: {file_name}")
+        return path
+
+    async def ensure_bucket(self) -> None:
+        await asyncio.to_thread(os.makedirs, self.root, exist_ok=True)
+
+    async def upload_stream(
+        self,
+        stream: BinaryIO,
+        file_name: str,
+        content_type: str,
+        length: int = -1,
+        cache_control: Optional[str] = None
+    ) -> str:
+        # Content type and cache headers come from the extension and StaticFiles
+        size = await asyncio.to_thread(
+            self._write, self._path(file_name), lambda target: shutil.copyfileobj(stream, target, _COPY_BUFFER)
+        )
+        self.stats_counters["uploads"] += 1
+        self.stats_counters["upload_bytes"] += size
+        return file_name
+
+    async def upload_path(self, file_path: str, file_name: str, content_type: str, cache_control: Optional[str] = None) -> str:
+        def copy(target: BinaryIO) -> None:
+            with open(file_path, "rb") as source:
+                shutil.copyfileobj(source, target, _COPY_BUFFER)
+
+        size = await asyncio.to_thread(self._write, self._path(file_name), copy)
+        self.stats_counters["uploads"] += 1
+        self.stats_counters["upload_bytes"] += size
+        return file_name
+
+    @staticmethod
+    def _write(path: str, fill) -> int:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial_path = f"{path}.part"
+        try:
+            with open(partial_path, "wb") as target:
+                fill(target)
+            os.replace(partial_path, path)
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+        return os.path.getsize(path)
+
+    async def exists(self, file_name: str) -> bool:
+        return await asyncio.to_thread(os.path.isfile, self._path(file_name))
+
+    async def delete_file(self, file_name: str) -> None:
+        try:
+            await asyncio.to_thread(os.remove, self._path(file_name))
+        except FileNotFoundError:
+            return
+        self.stats_counters["deletes"] += 1
+
+    def get_file_url(self, file_name: str, expires: timedelta = timedelta(days=7)) -> str:
+        return f"{settings.STORAGE_LOCAL_URL.rstrip('/')}/{quote(file_name)}"
+
+    async def health(self) -> dict:
+        ok = await asyncio.to_thread(os.access, self.root, os.W_OK)
+        return {"backend": self.name, "ok": ok, **({} if ok else {"error": f"{self.root} is not writable"})}
+
+    def stats(self) -> dict:
+        return {"backend": self.name, **self.stats_counters}
+
+
+class MemoryStorage(StorageBackend):
+    """Objects kept in process memory: for tests and offline benchmarks, not for production."""
+
+    name = "memory"
+
+    def __init__(self):
+        self.objects: Dict[str, Tuple[bytes, str]] = {}
+
+    async def upload_stream(
+        self,
+        stream: BinaryIO,
+        file_name: str,
+        content_type: str,
+        length: int = -1,
+        cache_control: Optional[str] = None
+    ) -> str:
+        self.objects[file_name] = (await asyncio.to_thread(stream.read), content_type)
+        return file_name
+
+    async def upload_path(self, file_path: str, file_name: str, content_type: str, cache_control: Optional[str] = None) -> str:
+        with open(file_path, "rb") as f:
+            return await self.upload_stream(f, file_name, content_type)
+
+    async def exists(self, file_name: str) -> bool:
+        return file_name in self.objects
+
+    async def delete_file(self, file_name: str) -> None:
+        self.objects.pop(file_name, None)
+
+    def get_file_url(self, file_name: str, expires: timedelta = timedelta(days=7)) -> str:
+        return f"memory://{file_name}"
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "objects": len(self.objects),
+            "bytes": sum(len(data) for data, _ in self.objects.values()),
+        }
 
-    def delete_file(self, file_name: str):
-        self.client.remove_object(self.bucket_name, file_name)
 
-storage_service = MinioService()
+def build_storage() -> StorageBackend:
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage()
+    if settings.STORAGE_BACKEND == "memory":
+        return MemoryStorage()
+    return MinioService()
@@ -0,0 +1,175 @@
+"""
+Background transcoding of stored audio to Opus/Ogg.
+
+User recordings arrive as WAV and TTS answers as mp3 (or WAV with the stub
+provider): once a turn is saved, its files are re-encoded by a small pool of
+ffmpeg workers (speech at 24-32 kbit/s is 5-10x smaller), the messages are
+pointed at the new files and the originals are deleted. With object storage
+the Opus file is uploaded in place of the original object. Needs the ffmpeg
+binary; without it, audio is simply kept as produced.
+"""
+import asyncio
+import os
+import shutil
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Set
+from uuid import UUID
+
+from app.core.config import settings
+from app.services.audio_store import AudioStore, object_name, repoint
+
+TRANSCODED_EXTENSION = ".ogg"
+
+
+@dataclass
+class TranscodeJob:
+    path: str
+    bitrate: str
+    message_ids: Set[UUID] = field(default_factory=set)
+    audio_path: Optional[str] = None  # What the messages point at, if not `path` (object storage)
+
+
+class AudioTranscoder:
+    def __init__(self, workers: Optional[int] = None, ffmpeg: Optional[str] = None, store: Optional[AudioStore] = None):
+        self.workers = workers or settings.TRANSCODE_WORKERS
+        self.ffmpeg = shutil.which(ffmpeg or settings.FFMPEG_PATH)
+        self.store = store
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=settings.TRANSCODE_QUEUE_SIZE)
+        # Jobs not yet picked by a worker, by source path: a file shared by several
+        # messages (identical TTS answers) is transcoded once for all of them
+        self._pending: Dict[str, TranscodeJob] = {}
+        self._tasks: list = []
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self.stats_counters = {"queued": 0, "done": 0, "failed": 0, "dropped": 0, "bytes_in": 0, "bytes_out": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return settings.TRANSCODE_ENABLED and self.ffmpeg is not None
+
+    def start(self) -> None:
+        if settings.TRANSCODE_ENABLED and self.ffmpeg is None:
+            print(f"Audio transcoding disabled: '{settings.FFMPEG_PATH}' not found")
+        if not self.enabled or self._tasks:
+            return
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(
+        self,
+        path: Optional[str],
+        message_ids: Iterable[UUID],
+        bitrate: str,
+        delay: float = 0,
+        audio_path: Optional[str] = None
+    ) -> bool:
+        """
+        Transcode the local file `path` in the background, then point `message_ids`
+        at the result. `audio_path` is what they point at now, when not `path`.
+        Returns False when the file is not going to be transcoded.
+        """
+        if not path or not self.enabled or path.endswith(TRANSCODED_EXTENSION):
+            return False
+        job = self._pending.get(path)
+        if job is not None:
+            job.message_ids.update(message_ids)
+            return True
+        job = TranscodeJob(path=path, bitrate=bitrate, message_ids=set(message_ids), audio_path=audio_path)
+        self._pending[path] = job
+        if delay > 0:
+            self._timers[path] = asyncio.get_running_loop().call_later(delay, self._enqueue_delayed, job)
+        else:
+            self._enqueue(job)
+        return True
+
+    def _enqueue_delayed(self, job: TranscodeJob) -> None:
+        self._timers.pop(job.path, None)
+        self._enqueue(job)
+
+    def _enqueue(self, job: TranscodeJob) -> None:
+        try:
+            self._queue.put_nowait(job)
+            self.stats_counters["queued"] += 1
+        except asyncio.QueueFull:
+            # The file stays in its original format
+            self._pending.pop(job.path, None)
+            self.stats_counters["dropped"] += 1
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            self._pending.pop(job.path, None)
+            try:
+                await self.transcode(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats_counters["failed"] += 1
+                print(f"Transcoding of {job.path} failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def transcode(self, job: TranscodeJob) -> str:
+        """Encode `job.path` to Opus/Ogg, update its messages and delete the original; returns the new audio_path."""
+        target = os.path.splitext(job.path)[0] + TRANSCODED_EXTENSION
+        partial = target + ".part"
+        process = await asyncio.create_subprocess_exec(
+            self.ffmpeg, "-nostdin", "-loglevel", "error", "-y",
+            "-i", job.path, "-vn", "-ac", "1",
+            "-c:a", "libopus", "-b:a", job.bitrate, "-application", "voip",
+            "-f", "ogg", partial,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await process.communicate()
+        if process.returncode != 0:
+            await asyncio.to_thread(_remove, partial)
+            raise RuntimeError(stderr.decode(errors="replace").strip() or f"ffmpeg exited with {process.returncode}")
+
+        bytes_in, bytes_out = await asyncio.to_thread(_finalize, job.path, partial, target)
+        current = job.audio_path or job.path
+        new_path = target
+        if object_name(current) is not None and self.store is not None:
+            new_path = await self.store.publish(target)
+            await asyncio.to_thread(_remove, target)
+        if job.message_ids:
+            await repoint(current, new_path, job.message_ids)
+        # Only now nothing points at the original any more
+        await asyncio.to_thread(_remove, job.path)
+        if new_path != target:
+            await self.store.delete_if_unreferenced(current)
+
+        self.stats_counters["done"] += 1
+        self.stats_counters["bytes_in"] += bytes_in
+        self.stats_counters["bytes_out"] += bytes_out
+        return new_path
+
+    def stats(self) -> dict:
+        counters = self.stats_counters
+        return {
+            "enabled": self.enabled,
+            "workers": len(self._tasks),
+            "queue_depth": self._queue.qsize(),
+            "pending": len(self._pending),
+            **counters,
+            "compression_ratio": round(counters["bytes_in"] / counters["bytes_out"], 1) if counters["bytes_out"] else None,
+        }
+
+
+def _finalize(source: str, partial: str, target: str):
+    os.replace(partial, target)
+    return os.path.getsize(source), os.path.getsize(target)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -22,7 +22,7 @@ import {
     DialogFooter,
 } from "@/components/ui/dialog";
 import { Label } from "@/components/ui/label";
-import api from "@/lib/api";
+import api, { getAll } from "@/lib/api";
 import { Entity } from "@/types";
 
 export default function EntitiesPage() {
@@ -33,7 +33,7 @@ export default function EntitiesPage() {
 
     const fetchEntities = async () => {
         try {
-            const res = await api.get<Entity[]>("/entities");
+            const res = await getAll<Entity>("/entities");
             setEntities(res.data);
         } catch (error) {
             console.error("Failed to fetch entities", error);
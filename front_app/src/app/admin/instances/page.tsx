@@ -29,7 +29,7 @@ import {
 } from "@/components/ui/select";
 import { Label } from "@/components/ui/label";
 import { Badge } from "@/components/ui/badge";
-import api from "@/lib/api";
+import api, { getAll } from "@/lib/api";
 import { Entity, Instance } from "@/types";
 
 export default function InstancesPage() {
@@ -47,8 +47,8 @@ export default function InstancesPage() {
     const fetchData = async () => {
         try {
             const [instancesRes, entitiesRes] = await Promise.all([
-                api.get<Instance[]>("/instances"),
-                api.get<Entity[]>("/entities"),
+                getAll<Instance>("/instances"),
+                getAll<Entity>("/entities"),
             ]);
             setInstances(instancesRes.data);
             setEntities(entitiesRes.data);
@@ -3,7 +3,7 @@
 import { useEffect, useState } from "react";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Users, Server, MessageSquare, Activity } from "lucide-react";
-import api from "@/lib/api";
+import { getAll } from "@/lib/api";
 import { Entity, Instance } from "@/types";
 
 export default function AdminDashboard() {
@@ -17,8 +17,8 @@ export default function AdminDashboard() {
         const fetchStats = async () => {
             try {
                 const [entitiesRes, instancesRes] = await Promise.all([
-                    api.get<Entity[]>("/entities"),
-                    api.get<Instance[]>("/instances"),
+                    getAll<Entity>("/entities"),
+                    getAll<Instance>("/instances"),
                 ]);
 
                 // Mock active sessions for now as endpoint might not exist
@@ -4,7 +4,7 @@ import { useState, useEffect } from "react";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Badge } from "@/components/ui/badge";
 import { Calendar, Clock, Users, CheckCircle } from "lucide-react";
-import api from "@/lib/api";
+import { getAll } from "@/lib/api";
 import { Appointment, TimeSlot } from "@/types";
 
 export default function DoctorDashboard() {
@@ -27,8 +27,8 @@ export default function DoctorDashboard() {
         try {
             const today = new Date().toISOString().split("T")[0];
             const [apptRes, slotsRes] = await Promise.all([
-                api.get<Appointment[]>(`/appointments?doctor_id=${doctorId}&date=${today}`),
-                api.get<TimeSlot[]>(`/timeslots?doctor_id=${doctorId}`)
+                getAll<Appointment>(`/appointments?doctor_id=${doctorId}&date=${today}`),
+                getAll<TimeSlot>(`/timeslots?doctor_id=${doctorId}`)
             ]);
             setAppointments(apptRes.data || []);
             setTimeSlots(slotsRes.data || []);
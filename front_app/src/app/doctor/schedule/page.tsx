@@ -6,7 +6,7 @@ import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
 import { Label } from "@/components/ui/label";
 import { Plus, Trash2, Clock, Calendar as CalendarIcon, ChevronLeft, ChevronRight, AlertCircle, CheckCircle } from "lucide-react";
-import api from "@/lib/api";
+import api, { getAll } from "@/lib/api";
 import { TimeSlot } from "@/types";
 
 const DAYS_OF_WEEK = [
@@ -55,8 +55,8 @@ export default function DoctorSchedulePage() {
         setIsLoading(true);
         try {
             const [slotsRes, apptsRes] = await Promise.all([
-                api.get<TimeSlot[]>(`/timeslots?doctor_id=${doctorId}`),
-                api.get<Appointment[]>(`/appointments?doctor_id=${doctorId}`)
+                getAll<TimeSlot>(`/timeslots?doctor_id=${doctorId}`),
+                getAll<Appointment>(`/appointments?doctor_id=${doctorId}`)
             ]);
             setTimeSlots(slotsRes.data || []);
             setAppointments(apptsRes.data || []);
@@ -11,7 +11,7 @@ import {
     TableHeader,
     TableRow,
 } from "@/components/ui/table";
-import api from "@/lib/api";
+import { getAll } from "@/lib/api";
 import { Instance } from "@/types";
 
 export default function EntityInstancesPage() {
@@ -22,7 +22,7 @@ export default function EntityInstancesPage() {
     useEffect(() => {
         const fetchInstances = async () => {
             try {
-                const res = await api.get<Instance[]>("/instances");
+                const res = await getAll<Instance>("/instances");
                 // Filter client-side for now if backend doesn't support filtering by entity
                 const entityInstances = res.data.filter(i => i.entity_id === entityId);
                 setInstances(entityInstances);
@@ -10,7 +10,7 @@ import { UploadBox } from "@/components/UploadBox";
 import { Card, CardContent, CardHeader, CardTitle, CardDescription } from "@/components/ui/card";
 import { Badge } from "@/components/ui/badge";
 import { ScrollArea } from "@/components/ui/scroll-area";
-import api from "@/lib/api";
+import api, { getAll } from "@/lib/api";
 import { KBDocument } from "@/types";
 import { cn } from "@/lib/utils";
 
@@ -25,7 +25,7 @@ export default function KnowledgePage() {
 
     const fetchDocuments = useCallback(async () => {
         try {
-            const res = await api.get<KBDocument[]>(`/kb/documents/${entityId}`);
+            const res = await getAll<KBDocument>(`/kb/documents/${entityId}`);
             setDocuments(res.data);
         } catch (error) {
             console.error("Failed to fetch documents", error);
@@ -17,7 +17,7 @@ import { Card, CardContent, CardHeader, CardTitle, CardDescription } from "@/com
 import { Button } from "@/components/ui/button";
 import { Avatar, AvatarFallback, AvatarImage } from "@/components/ui/avatar";
 import { Badge } from "@/components/ui/badge";
-import api from "@/lib/api";
+import api, { getAll } from "@/lib/api";
 import { useAppStore } from "@/lib/store";
 import { Entity, Doctor, Instance, KBDocument } from "@/types";
 
@@ -52,10 +52,10 @@ export default function EntityHome() {
                 // Parallel fetching
                 const [entityRes, doctorsRes, kbRes, instancesRes, apptRes] = await Promise.all([
                     api.get<Entity>(`/entities/${entityId}`),
-                    api.get<Doctor[]>("/doctors/"),
-                    api.get<KBDocument[]>(`/kb/documents/${entityId}`),
-                    api.get<Instance[]>("/instances"),
-                    api.get<any[]>("/appointments") // Assuming this endpoint returns all appointments, we filter client side 
+                    getAll<Doctor>("/doctors/"),
+                    getAll<KBDocument>(`/kb/documents/${entityId}`),
+                    getAll<Instance>("/instances"),
+                    getAll<any>("/appointments") // Assuming this endpoint returns all appointments, we filter client side 
                     // Note: Real prod would use specific stats endpoints to avoid over-fetching
                 ]);
 
@@ -12,7 +12,7 @@ import {
     TableRow,
 } from "@/components/ui/table";
 import { Badge } from "@/components/ui/badge";
-import api from "@/lib/api";
+import { getAll } from "@/lib/api";
 import { Session } from "@/types";
 
 export default function EntitySessionsPage() {
@@ -23,7 +23,7 @@ export default function EntitySessionsPage() {
     useEffect(() => {
         const fetchSessions = async () => {
             try {
-                const res = await api.get<Session[]>(`/sessions?entity_id=${entityId}`);
+                const res = await getAll<Session>(`/sessions?entity_id=${entityId}`);
                 setSessions(res.data);
             } catch (error) {
                 console.error("Failed to fetch sessions", error);
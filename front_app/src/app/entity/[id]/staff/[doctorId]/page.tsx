@@ -9,7 +9,7 @@ import { Label } from "@/components/ui/label";
 import { Badge } from "@/components/ui/badge";
 import { ArrowLeft, Plus, Trash2, Calendar, Clock } from "lucide-react";
 import Link from "next/link";
-import api from "@/lib/api";
+import api, { getAll } from "@/lib/api";
 import { Doctor, TimeSlot, Appointment } from "@/types";
 
 import { Switch } from "@/components/ui/switch";
@@ -47,8 +47,8 @@ export default function DoctorSchedulePage() {
         try {
             const [doctorRes, slotsRes, apptRes] = await Promise.all([
                 api.get<Doctor>(`/doctors/${doctorId}`),
-                api.get<TimeSlot[]>(`/timeslots?doctor_id=${doctorId}`),
-                api.get<Appointment[]>(`/appointments?doctor_id=${doctorId}`)
+                getAll<TimeSlot>(`/timeslots?doctor_id=${doctorId}`),
+                getAll<Appointment>(`/appointments?doctor_id=${doctorId}`)
             ]);
             setDoctor(doctorRes.data);
             setTimeSlots(slotsRes.data || []);
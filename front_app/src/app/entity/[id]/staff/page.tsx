@@ -8,7 +8,7 @@ import { Input } from "@/components/ui/input";
 import { Label } from "@/components/ui/label";
 import { Badge } from "@/components/ui/badge";
 import { Plus, User, Mail, Phone, Clock, Copy, Check } from "lucide-react";
-import api from "@/lib/api";
+import api, { getAll } from "@/lib/api";
 import { Doctor, DoctorCredentials, Specialty } from "@/types";
 
 export default function StaffPage() {
@@ -40,8 +40,8 @@ export default function StaffPage() {
         setIsLoading(true);
         try {
             const [doctorsRes, specialtiesRes] = await Promise.all([
-                api.get<Doctor[]>(`/doctors/?entity_id=${entityId}`),
-                api.get<Specialty[]>("/specialties/")
+                getAll<Doctor>(`/doctors/?entity_id=${entityId}`),
+                getAll<Specialty>("/specialties/")
             ]);
             setDoctors(doctorsRes.data || []);
             setSpecialties(specialtiesRes.data || []);
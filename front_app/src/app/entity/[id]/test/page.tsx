@@ -10,7 +10,7 @@ import { Input } from "@/components/ui/input";
 import { Button } from "@/components/ui/button";
 import { Send, Bot, User as UserIcon, Loader2, Sparkles, MoreHorizontal } from "lucide-react";
 import { cn } from "@/lib/utils";
-import api from "@/lib/api";
+import api, { getAll } from "@/lib/api";
 import { Message, Instance } from "@/types";
 
 // --- Types ---
@@ -41,7 +41,7 @@ export default function TestChatbotPage() {
     useEffect(() => {
         const fetchInstance = async () => {
             try {
-                const res = await api.get<Instance[]>("/instances");
+                const res = await getAll<Instance>("/instances");
                 const target = (res.data || []).find((i: Instance) => i.entity_id === entityId);
                 if (target) setInstanceId(target.instance_id);
             } catch (e) {
@@ -56,10 +56,11 @@ export default function TestChatbotPage() {
         if (!sessionId) return;
         const fetchHistory = async () => {
             try {
-                const res = await api.get<Message[]>(`/sessions/${sessionId}/messages`);
+                const res = await getAll<Message>(`/sessions/${sessionId}/messages`);
                 const formatted = (res.data || []).map((m: Message) => ({
                     ...m,
-                    audio_path: m.audio_path && typeof m.audio_path === 'string' ? buildUploadsUrl(m.audio_path) : undefined
+                    // audio_url: URL MinIO/CDN, ou chemin local servi sous /uploads
+                    audio_path: m.audio_url ? buildUploadsUrl(m.audio_url) : undefined
                 }));
                 setMessages(formatted);
             } catch (e) {
@@ -149,10 +150,10 @@ export default function TestChatbotPage() {
         addMessage(tempMsg);
 
         try {
-            const res = await api.post("/chat/text", { instance_id: instanceId, text });
+            const res = await api.post("/chat/text", { instance_id: instanceId, text, session_id: sessionId });
             const data = res.data;
 
-            if (data.session_id && !sessionId) setSessionId(data.session_id);
+            if (data.session_id) setSessionId(data.session_id);
 
             const botMsg: Message = {
                 message_id: `bot-${Date.now()}`,
@@ -204,12 +205,13 @@ export default function TestChatbotPage() {
         const formData = new FormData();
         formData.append("audio_file", blob, "rec.wav");
         formData.append("instance_id", instanceId);
+        if (sessionId) formData.append("session_id", sessionId);
 
         try {
             const res = await api.post("/chat/messages", formData);
             const data = res.data;
 
-            if (data.session_id && !sessionId) setSessionId(data.session_id);
+            if (data.session_id) setSessionId(data.session_id);
 
             // Update user msg with transcription
             updateLastUserMessage(data.transcription, data.user_audio);
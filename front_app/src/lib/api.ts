@@ -31,4 +31,19 @@ api.interceptors.response.use(
     }
 );
 
-export default api;
\ No newline at end of file
+// List endpoints return one page at a time; the token for the next page comes
+// back in the X-Next-Cursor header. Follows it until the last page.
+const MAX_PAGE_SIZE = 200;
+
+export async function getAll<T>(url: string, params: Record<string, unknown> = {}): Promise<{ data: T[] }> {
+    const data: T[] = [];
+    let cursor: string | undefined;
+    do {
+        const res = await api.get<T[]>(url, { params: { ...params, limit: MAX_PAGE_SIZE, cursor } });
+        data.push(...res.data);
+        cursor = (res.headers['x-next-cursor'] as string | undefined) || undefined;
+    } while (cursor);
+    return { data };
+}
+
+export default api;
@@ -33,6 +33,7 @@ export interface Message {
   role: 'user' | 'assistant' | 'system';
   content: string;
   audio_path?: string | null;
+  audio_url?: string | null;
   created_at: string;
 }
 
@@ -47,6 +48,10 @@ export interface KnowledgeChunk {
   doc_id: string;
   chunk_index: number;
   content: string;
+  page_start?: number | null;
+  page_end?: number | null;
+  heading?: string | null;
+  token_count?: number | null;
   created_at: string;
 }
 
@@ -0,0 +1,46 @@
+"""Accent-insensitive trigram search on doctors and specialties
+
+Revision ID: 8c41d2f0a7b3
+Revises: 691003aa63c1
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41d2f0a7b3'
+down_revision: Union[str, None] = '691003aa63c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # unaccent() is only STABLE, so it cannot be used in an index expression directly.
+    # Pinning the dictionary makes the wrapper safe to declare IMMUTABLE.
+    op.execute(
+        "CREATE OR REPLACE FUNCTION immutable_unaccent(text) RETURNS text AS "
+        "$$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$ "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT"
+    )
+
+    op.execute(
+        'CREATE INDEX IF NOT EXISTS ix_specialties_name_trgm ON specialties '
+        'USING gin (immutable_unaccent(lower(name)) gin_trgm_ops)'
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_doctors_full_name_trgm ON doctors "
+        "USING gin (immutable_unaccent(lower(first_name || ' ' || last_name)) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS ix_doctors_full_name_trgm')
+    op.execute('DROP INDEX IF EXISTS ix_specialties_name_trgm')
+    op.execute('DROP FUNCTION IF EXISTS immutable_unaccent(text)')
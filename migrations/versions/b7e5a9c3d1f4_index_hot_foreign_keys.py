@@ -0,0 +1,53 @@
+"""Secondary indexes on hot foreign-key lookups
+
+Revision ID: b7e5a9c3d1f4
+Revises: 8c41d2f0a7b3
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e5a9c3d1f4'
+down_revision: Union[str, None] = '8c41d2f0a7b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns)
+INDEXES = [
+    ('ix_messages_session_created', 'messages', ['session_id', 'created_at', 'message_id']),
+    ('ix_sessions_entity_speaker_active', 'sessions', ['entity_id', 'speaker_id', 'is_active', 'created_at']),
+    ('ix_kb_chunks_doc_index', 'kb_chunks', ['doc_id', 'chunk_index']),
+    ('ix_kb_documents_entity_created', 'kb_documents', ['entity_id', 'created_at', 'doc_id']),
+    ('ix_appointments_doctor_date', 'appointments', ['doctor_id', 'date']),
+    ('ix_appointments_session_id', 'appointments', ['session_id']),
+    ('ix_time_slots_doctor_id', 'time_slots', ['doctor_id']),
+    ('ix_doctors_entity_specialty', 'doctors', ['entity_id', 'specialty_id']),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    # If a build fails it leaves an INVALID index behind: drop it and re-run the migration.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
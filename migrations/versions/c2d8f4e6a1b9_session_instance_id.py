@@ -0,0 +1,31 @@
+"""Per-kiosk chat sessions
+
+Revision ID: c2d8f4e6a1b9
+Revises: b7e5a9c3d1f4
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2d8f4e6a1b9'
+down_revision: Union[str, None] = 'b7e5a9c3d1f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('sessions', sa.Column('instance_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_foreign_key(
+        'sessions_instance_id_fkey', 'sessions', 'instances', ['instance_id'], ['instance_id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('sessions_instance_id_fkey', 'sessions', type_='foreignkey')
+    op.drop_column('sessions', 'instance_id')
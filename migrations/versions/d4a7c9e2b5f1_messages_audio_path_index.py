@@ -0,0 +1,40 @@
+"""Index on messages.audio_path for audio retention
+
+Revision ID: d4a7c9e2b5f1
+Revises: c2d8f4e6a1b9
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7c9e2b5f1'
+down_revision: Union[str, None] = 'c2d8f4e6a1b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # text_pattern_ops serves both `audio_path IN (...)` and the `LIKE 'minio://%'` prefix scan.
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_messages_audio_path', 'messages', ['audio_path'],
+            postgresql_ops={'audio_path': 'text_pattern_ops'},
+            postgresql_where=sa.text('audio_path IS NOT NULL'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_messages_audio_path', table_name='messages',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
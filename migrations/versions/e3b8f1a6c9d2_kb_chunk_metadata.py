@@ -0,0 +1,33 @@
+"""Page, heading and token count of knowledge chunks
+
+Revision ID: e3b8f1a6c9d2
+Revises: d4a7c9e2b5f1
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b8f1a6c9d2'
+down_revision: Union[str, None] = 'd4a7c9e2b5f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable without default: metadata-only, existing chunks are not rewritten
+    op.add_column('kb_chunks', sa.Column('page_start', sa.Integer(), nullable=True))
+    op.add_column('kb_chunks', sa.Column('page_end', sa.Integer(), nullable=True))
+    op.add_column('kb_chunks', sa.Column('heading', sa.Text(), nullable=True))
+    op.add_column('kb_chunks', sa.Column('token_count', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('kb_chunks', 'token_count')
+    op.drop_column('kb_chunks', 'heading')
+    op.drop_column('kb_chunks', 'page_end')
+    op.drop_column('kb_chunks', 'page_start')
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+"""
+Lance une passe de rétention des audios de UPLOAD_DIR (celle que l'API exécute
+toutes les AUDIO_RETENTION_INTERVAL_SECONDS): suppression des fichiers orphelins,
+archivage dans MinIO et expiration selon les réglages AUDIO_* du .env.
+
+Usage:
+    python scripts/audio_retention.py [--dry-run]
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.database import engine
+from app.services.audio_store import AudioStore
+from app.services.retention import AudioRetention
+from app.services.storage import build_storage
+
+
+async def main(dry_run: bool):
+    retention = AudioRetention(settings.UPLOAD_DIR, store=AudioStore(build_storage()))
+    print(f"🧹 Rétention de {settings.UPLOAD_DIR} {'(simulation)' if dry_run else ''}")
+    counts = await retention.run_once(dry_run=dry_run)
+    await engine.dispose()
+    if counts is None:
+        print("⏳ Une passe est déjà en cours sur un autre processus")
+        return
+    print(f"   Fichiers examinés: {counts['scanned']} ({counts['scanned_bytes'] / 1e6:.1f} Mo)")
+    print(f"   Orphelins supprimés: {counts['orphans']} ({counts['orphan_bytes'] / 1e6:.1f} Mo)")
+    print(f"   Archivés dans MinIO: {counts['archived']} ({counts['archived_bytes'] / 1e6:.1f} Mo)")
+    print(f"   Expirés: {counts['expired']} locaux, {counts['archive_expired']} archivés")
+    print(f"   Restant en local: {counts['local_bytes'] / 1e6:.1f} Mo")
+    if counts["errors"]:
+        print(f"⚠ {counts['errors']} fichier(s) en erreur")
+    print("✅ Terminé")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rétention des audios stockés")
+    parser.add_argument("--dry-run", action="store_true", help="Compter sans rien supprimer ni déplacer")
+    args = parser.parse_args()
+    asyncio.run(main(args.dry_run))
@@ -0,0 +1,614 @@
+#!/usr/bin/env python
+"""
+Benchmark de bout en bout des parcours chat, ingestion, disponibilités et réservation.
+
+1. Crée un hôpital synthétique à l'échelle demandée (entités, médecins, créneaux,
+   rendez-vous, chunks KB, messages), marqué par un identifiant de run.
+2. Lance l'application en process (transport ASGI, lifespan compris) avec les
+   providers "stub" à la place d'OpenAI : latence simulée fixe (STUB_LATENCY_MS),
+   donc les écarts mesurés viennent du code et de la base.
+3. Envoie --requests requêtes par étape avec --concurrency clients simultanés et
+   mesure p50/p95/p99 et le débit de chaque étape.
+4. Écrit le résultat en JSON (commit git, configuration, étapes, /system/metrics)
+   dans benchmarks/results/, et compare avec un run précédent via --compare.
+
+À lancer sur une base jetable : les données créées sont supprimées à la fin
+sauf avec --keep.
+
+Usage:
+    python scripts/benchmark.py [--entities 2] [--doctors 40] [--requests 200] [--concurrency 16]
+    python scripts/benchmark.py --stages chat,availability --compare benchmarks/results/base.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+import wave
+from datetime import date, datetime, time as dtime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add project root to path
+sys.path.append(ROOT)
+
+STAGES = ["chat", "voice", "ingestion", "availability", "booking"]
+
+SPECIALTIES = [
+    "Cardiologie", "Neurologie", "Pédiatrie", "Orthopédie", "Dermatologie",
+    "Gynécologie", "Ophtalmologie", "Psychiatrie", "ORL", "Urologie"
+]
+
+FIRST_NAMES = ["Amadou", "Fatou", "Moussa", "Awa", "Cheikh", "Mariama", "Oumar", "Aminata", "Ibrahima", "Seynabou"]
+LAST_NAMES = ["Diallo", "Sow", "Ndiaye", "Diop", "Fall", "Ba", "Ly", "Gueye", "Konaté", "Thiam"]
+
+REASONS = [
+    "Consultation de routine", "Douleurs persistantes", "Suivi traitement",
+    "Renouvellement ordonnance", "Check-up annuel", "Avis médical"
+]
+
+KB_SENTENCES = [
+    "Le service de {spec} est situé au bâtiment {building}, étage {floor}.",
+    "Les heures de visite en {spec} sont de {start}h à {end}h.",
+    "Une consultation de {spec} coûte {price} francs CFA.",
+    "Pour un rendez-vous en {spec}, présentez-vous à l'accueil avec votre carte d'identité.",
+    "Le secrétariat de {spec} est joignable au 33 {building}{floor} {price}.",
+    "Les urgences de {spec} sont ouvertes jour et nuit.",
+]
+
+QUESTIONS = [
+    "Où se trouve le service de {spec} ?",
+    "Quelles sont les heures de visite en {spec} ?",
+    "Combien coûte une consultation de {spec} ?",
+    "Je voudrais un rendez-vous en {spec} demain",
+    "Quels médecins consultent en {spec} ?",
+]
+
+# Recurring weekly schedule of every seeded doctor (Monday-Friday)
+SCHEDULE = [(dtime(8, 0), dtime(12, 0)), (dtime(14, 0), dtime(17, 0))]
+
+BATCH_SIZE = 1000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark de bout en bout (providers stub)")
+    scale = parser.add_argument_group("échelle du jeu de données")
+    scale.add_argument("--entities", type=int, default=2, help="Hôpitaux (une instance chacun)")
+    scale.add_argument("--doctors", type=int, default=40, help="Médecins par entité")
+    scale.add_argument("--days", type=int, default=14, help="Jours couverts par les rendez-vous existants")
+    scale.add_argument("--appointments", type=int, default=4, help="Rendez-vous par médecin et par jour ouvré")
+    scale.add_argument("--documents", type=int, default=10, help="Documents KB par entité")
+    scale.add_argument("--chunks", type=int, default=50, help="Chunks par document")
+    scale.add_argument("--sessions", type=int, default=50, help="Sessions historiques par entité")
+    scale.add_argument("--messages", type=int, default=20, help="Messages par session historique")
+
+    load = parser.add_argument_group("charge")
+    load.add_argument("--stages", default=",".join(STAGES), help=f"Étapes à mesurer parmi {','.join(STAGES)}")
+    load.add_argument("--requests", type=int, default=200, help="Requêtes mesurées par étape")
+    load.add_argument("--concurrency", type=int, default=16, help="Clients simultanés")
+    load.add_argument("--warmup", type=int, default=10, help="Requêtes non mesurées avant chaque étape")
+    load.add_argument("--turns", type=int, default=3, help="Tours par conversation (étapes chat et voice)")
+    load.add_argument("--seed", type=int, default=42, help="Graine du générateur aléatoire")
+    load.add_argument(
+        "--stub-latency", default=None,
+        help='Latence simulée en ms, JSON (ex. \'{"chat": 800, "embeddings": 30}\'), 0 pour tout désactiver'
+    )
+    load.add_argument(
+        "--real-providers", action="store_true",
+        help="Garder les providers du .env au lieu des stubs (appels OpenAI réels, facturés)"
+    )
+
+    out = parser.add_argument_group("résultats")
+    out.add_argument("--output", default=None, help="Fichier JSON (défaut: benchmarks/results/<date>-<commit>.json)")
+    out.add_argument("--compare", default=None, help="Résultat JSON de référence à comparer")
+    out.add_argument(
+        "--max-regression", type=float, default=None,
+        help="Échoue (code 1) si le p95 d'une étape se dégrade de plus de ce pourcentage"
+    )
+    out.add_argument("--keep", action="store_true", help="Ne pas supprimer les données seedées")
+    args = parser.parse_args()
+
+    args.stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"étapes inconnues: {', '.join(sorted(unknown))}")
+    return args
+
+
+def configure_providers(args) -> None:
+    """Must run before anything from `app` is imported: Settings is read once at import."""
+    if not args.real_providers:
+        for name in ("EMBEDDING_PROVIDER", "STT_PROVIDER", "TTS_PROVIDER", "LLM_PROVIDER"):
+            os.environ[name] = "stub"
+    if args.stub_latency is not None:
+        latency = args.stub_latency
+        if latency.strip() == "0":
+            latency = json.dumps({op: 0 for op in ("embeddings", "chat", "stt", "tts")})
+        os.environ["STUB_LATENCY_MS"] = latency
+
+
+# --- Seeding ---
+
+class Dataset:
+    """Identifiers of the seeded hospital, used to build requests and to clean up."""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.entity_ids = []
+        self.instance_ids = []
+        self.specialties = {}  # name -> specialty_id
+        self.doctors = []  # (entity_id, doctor_id, specialty_id)
+        self.counts = {}
+
+
+def kb_text(rng: random.Random, spec: str) -> str:
+    template = rng.choice(KB_SENTENCES)
+    return template.format(
+        spec=spec.lower(), building=rng.choice("ABCDEFG"), floor=rng.randint(0, 5),
+        start=rng.randint(8, 12), end=rng.randint(15, 20), price=rng.randint(5, 50) * 1000
+    )
+
+
+def working_days(start: date, days: int):
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        if day.weekday() < 5:
+            yield day
+
+
+async def insert_rows(db, model, rows) -> int:
+    from sqlalchemy import insert
+
+    for i in range(0, len(rows), BATCH_SIZE):
+        await db.execute(insert(model), rows[i:i + BATCH_SIZE])
+    return len(rows)
+
+
+async def seed(args, rng: random.Random) -> Dataset:
+    from sqlalchemy import select
+    from app.core.database import AsyncSessionLocal
+    from app.models.entity import Entity, Instance
+    from app.models.specialty import Specialty
+    from app.models.doctor import Doctor
+    from app.models.timeslot import TimeSlot
+    from app.models.appointment import Appointment, AppointmentStatus
+    from app.models.knowledge import KBDocument, KBChunk, KBEmbedding
+    from app.models.chat import Session, Message
+    from app.services.providers import StubEmbeddings
+
+    data = Dataset(run_id=uuid.uuid4().hex[:8])
+    today = date.today()
+    started = time.perf_counter()
+
+    async with AsyncSessionLocal() as db:
+        # Specialty names are unique: reuse the ones already there
+        existing = await db.execute(select(Specialty).where(Specialty.name.in_(SPECIALTIES)))
+        data.specialties = {s.name: s.specialty_id for s in existing.scalars()}
+        missing = [name for name in SPECIALTIES if name not in data.specialties]
+        for name in missing:
+            data.specialties[name] = uuid.uuid4()
+        await insert_rows(db, Specialty, [
+            {"specialty_id": data.specialties[name], "name": name} for name in missing
+        ])
+
+        entities, instances = [], []
+        for i in range(args.entities):
+            entity_id, instance_id = uuid.uuid4(), uuid.uuid4()
+            data.entity_ids.append(entity_id)
+            data.instance_ids.append(instance_id)
+            entities.append({
+                "entity_id": entity_id, "name": f"Hôpital Bench {data.run_id}-{i}",
+                "domain": "bench", "description": f"benchmark {data.run_id}"
+            })
+            instances.append({
+                "instance_id": instance_id, "entity_id": entity_id,
+                "name": f"Borne Bench {data.run_id}-{i}", "api_key": f"bench-{uuid.uuid4().hex}"
+            })
+        data.counts["entities"] = await insert_rows(db, Entity, entities)
+        await insert_rows(db, Instance, instances)
+
+        doctors, slots, appointments = [], [], []
+        for entity_id in data.entity_ids:
+            for _ in range(args.doctors):
+                doctor_id = uuid.uuid4()
+                specialty_id = data.specialties[rng.choice(SPECIALTIES)]
+                data.doctors.append((entity_id, doctor_id, specialty_id))
+                doctors.append({
+                    "doctor_id": doctor_id, "entity_id": entity_id, "specialty_id": specialty_id,
+                    "first_name": rng.choice(FIRST_NAMES), "last_name": rng.choice(LAST_NAMES),
+                    "email": f"bench-{doctor_id.hex}@example.com", "password_hash": "bench",
+                    "consultation_duration": 30, "is_active": True
+                })
+                for weekday in range(5):
+                    for start, end in SCHEDULE:
+                        slots.append({
+                            "slot_id": uuid.uuid4(), "doctor_id": doctor_id, "day_of_week": weekday,
+                            "start_time": start, "end_time": end, "is_recurring": True, "is_active": True
+                        })
+                # Distinct half-hour starts within the morning schedule
+                for day in working_days(today, args.days):
+                    for minutes in rng.sample(range(0, 240, 30), min(args.appointments, 8)):
+                        start = datetime.combine(day, SCHEDULE[0][0]) + timedelta(minutes=minutes)
+                        appointments.append({
+                            "appointment_id": uuid.uuid4(), "doctor_id": doctor_id,
+                            "patient_name": "Patient Bench", "patient_email": "patient@example.com",
+                            "reason": rng.choice(REASONS), "date": day, "start_time": start.time(),
+                            "end_time": (start + timedelta(minutes=30)).time(),
+                            "status": AppointmentStatus.CONFIRMED
+                        })
+        data.counts["doctors"] = await insert_rows(db, Doctor, doctors)
+        data.counts["time_slots"] = await insert_rows(db, TimeSlot, slots)
+        data.counts["appointments"] = await insert_rows(db, Appointment, appointments)
+        del doctors, slots, appointments
+
+        chunk_count = 0
+        for entity_id in data.entity_ids:
+            for d in range(args.documents):
+                doc_id = uuid.uuid4()
+                spec = SPECIALTIES[d % len(SPECIALTIES)]
+                await insert_rows(db, KBDocument, [{
+                    "doc_id": doc_id, "entity_id": entity_id, "title": f"Guide {spec} {d}", "source": None
+                }])
+                chunks, embeddings = [], []
+                for c in range(args.chunks):
+                    chunk_id = uuid.uuid4()
+                    content = " ".join(kb_text(rng, spec) for _ in range(rng.randint(3, 6)))
+                    chunks.append({"chunk_id": chunk_id, "doc_id": doc_id, "chunk_index": c, "content": content})
+                    embeddings.append({"chunk_id": chunk_id, "embedding": StubEmbeddings.vector(content)})
+                chunk_count += await insert_rows(db, KBChunk, chunks)
+                await insert_rows(db, KBEmbedding, embeddings)
+        data.counts["kb_chunks"] = chunk_count
+
+        session_count = message_count = 0
+        for entity_id, instance_id in zip(data.entity_ids, data.instance_ids):
+            sessions, messages = [], []
+            for _ in range(args.sessions):
+                session_id = uuid.uuid4()
+                opened = datetime.now(timezone.utc) - timedelta(days=rng.randint(1, 30))
+                sessions.append({
+                    "session_id": session_id, "entity_id": entity_id, "instance_id": instance_id,
+                    "is_active": False, "created_at": opened
+                })
+                for m in range(args.messages):
+                    spec = rng.choice(SPECIALTIES).lower()
+                    messages.append({
+                        "message_id": uuid.uuid4(), "session_id": session_id, "instance_id": instance_id,
+                        "role": "user" if m % 2 == 0 else "assistant",
+                        "content": rng.choice(QUESTIONS).format(spec=spec) if m % 2 == 0 else kb_text(rng, spec),
+                        "created_at": opened + timedelta(seconds=20 * m)
+                    })
+            session_count += await insert_rows(db, Session, sessions)
+            message_count += await insert_rows(db, Message, messages)
+        data.counts["sessions"] = session_count
+        data.counts["messages"] = message_count
+
+        await db.commit()
+
+    data.counts["seconds"] = round(time.perf_counter() - started, 2)
+    return data
+
+
+async def cleanup(data: Dataset) -> None:
+    from sqlalchemy import delete, select
+    from app.core.database import AsyncSessionLocal
+    from app.models.entity import Entity, Instance
+    from app.models.doctor import Doctor
+    from app.models.timeslot import TimeSlot
+    from app.models.appointment import Appointment
+    from app.models.knowledge import KBDocument, KBChunk, KBEmbedding
+    from app.models.chat import Session, Message
+
+    entities = data.entity_ids
+    sessions = select(Session.session_id).where(Session.entity_id.in_(entities))
+    doctors = select(Doctor.doctor_id).where(Doctor.entity_id.in_(entities))
+    documents = select(KBDocument.doc_id).where(KBDocument.entity_id.in_(entities))
+    chunks = select(KBChunk.chunk_id).where(KBChunk.doc_id.in_(documents))
+
+    async with AsyncSessionLocal() as db:
+        # Children first: the foreign keys have no ON DELETE CASCADE
+        await db.execute(delete(Message).where(Message.session_id.in_(sessions)))
+        await db.execute(delete(Appointment).where(Appointment.doctor_id.in_(doctors)))
+        await db.execute(delete(Appointment).where(Appointment.session_id.in_(sessions)))
+        await db.execute(delete(Session).where(Session.entity_id.in_(entities)))
+        await db.execute(delete(TimeSlot).where(TimeSlot.doctor_id.in_(doctors)))
+        await db.execute(delete(Doctor).where(Doctor.entity_id.in_(entities)))
+        await db.execute(delete(KBEmbedding).where(KBEmbedding.chunk_id.in_(chunks)))
+        await db.execute(delete(KBChunk).where(KBChunk.doc_id.in_(documents)))
+        await db.execute(delete(KBDocument).where(KBDocument.entity_id.in_(entities)))
+        await db.execute(delete(Instance).where(Instance.entity_id.in_(entities)))
+        await db.execute(delete(Entity).where(Entity.entity_id.in_(entities)))
+        await db.commit()
+
+
+# --- Load ---
+
+def speech_wav(seconds: float = 1.0, rate: int = 16000) -> bytes:
+    """
+    A clip the voice activity detector keeps: syllable-like bursts (200 Hz tone
+    modulated at 4 Hz) over light background noise. A silent clip would skip
+    STT and everything after it, leaving only the upload to measure.
+    """
+    noise = random.Random(0)
+    frames = bytearray()
+    for i in range(int(seconds * rate)):
+        t = i / rate
+        sample = 0.3 * math.sin(2 * math.pi * 200 * t) * max(math.sin(2 * math.pi * 4 * t), 0.0)
+        sample += noise.gauss(0, 0.01)
+        frames += int(max(-1.0, min(1.0, sample)) * 32767).to_bytes(2, "little", signed=True)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(bytes(frames))
+    return buffer.getvalue()
+
+
+class Workload:
+    """Builds the request of each stage; one call = one measured HTTP request."""
+
+    def __init__(self, data: Dataset, args, rng: random.Random):
+        self.data = data
+        self.args = args
+        self.rng = rng
+        self.audio = speech_wav()
+        self.conversations = {}  # worker -> (session_id, turns left)
+
+    def _question(self) -> str:
+        return self.rng.choice(QUESTIONS).format(spec=self.rng.choice(SPECIALTIES).lower())
+
+    def _session(self, worker: int):
+        """Each worker plays one kiosk user, starting a new conversation every --turns requests."""
+        session_id, left = self.conversations.get(worker, (None, 0))
+        if left <= 0:
+            session_id, left = None, self.args.turns
+        return session_id, left
+
+    def _remember(self, worker: int, response, left: int) -> None:
+        session_id = response.json().get("session_id") if response.status_code == 200 else None
+        self.conversations[worker] = (session_id, left - 1)
+
+    async def chat(self, client, worker: int):
+        session_id, left = self._session(worker)
+        response = await client.post("/api/v1/chat/text", json={
+            "instance_id": str(self.rng.choice(self.data.instance_ids)),
+            "text": self._question(),
+            "session_id": session_id
+        })
+        self._remember(worker, response, left)
+        return response
+
+    async def voice(self, client, worker: int):
+        session_id, left = self._session(worker)
+        form = {"instance_id": str(self.rng.choice(self.data.instance_ids))}
+        if session_id:
+            form["session_id"] = session_id
+        response = await client.post(
+            "/api/v1/chat/messages", data=form,
+            files={"audio_file": ("question.wav", self.audio, "audio/wav")}
+        )
+        self._remember(worker, response, left)
+        return response
+
+    async def ingestion(self, client, worker: int):
+        spec = self.rng.choice(SPECIALTIES)
+        content = " ".join(kb_text(self.rng, spec) for _ in range(self.rng.randint(20, 40)))
+        return await client.post("/api/v1/kb/text", data={
+            "title": f"Import bench {spec}",
+            "content": content,
+            "entity_id": str(self.rng.choice(self.data.entity_ids))
+        })
+
+    async def availability(self, client, worker: int):
+        entity_id, _, specialty_id = self.rng.choice(self.data.doctors)
+        start = date.today() + timedelta(days=self.rng.randint(0, 7))
+        params = {"entity_id": str(entity_id), "from": start.isoformat(), "to": (start + timedelta(days=7)).isoformat()}
+        if self.rng.random() < 0.5:
+            params["specialty_id"] = str(specialty_id)
+        return await client.get("/api/v1/appointments/available/range", params=params)
+
+    async def booking(self, client, worker: int):
+        entity_id, doctor_id, _ = self.rng.choice(self.data.doctors)
+        day = date.today() + timedelta(days=self.rng.randint(1, self.args.days))
+        while day.weekday() >= 5:
+            day += timedelta(days=1)
+        start = datetime.combine(day, SCHEDULE[1][0]) + timedelta(minutes=30 * self.rng.randint(0, 5))
+        # Conflicts are answered with success=false: they still exercise the whole path
+        return await client.post("/api/v1/appointments/book", json={
+            "entity_id": str(entity_id), "doctor_id": str(doctor_id),
+            "date": day.isoformat(), "start_time": start.time().isoformat(),
+            "patient_name": "Patient Bench", "patient_email": "patient@example.com",
+            "reason": self.rng.choice(REASONS)
+        })
+
+
+def percentile(sorted_values, p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(p / 100 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+async def run_stage(client, request, requests: int, concurrency: int, warmup: int) -> dict:
+    async def send(worker: int, measured: list, errors: dict):
+        started = time.perf_counter()
+        try:
+            response = await request(client, worker)
+            status = response.status_code
+        except Exception as e:
+            status = type(e).__name__
+        elapsed = (time.perf_counter() - started) * 1000
+        if measured is not None:
+            measured.append(elapsed)
+            if status != 200:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    async def worker_loop(worker: int, queue: asyncio.Queue, measured, errors):
+        while True:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await send(worker, measured, errors)
+
+    async def drive(count: int, measured, errors):
+        queue = asyncio.Queue()
+        for i in range(count):
+            queue.put_nowait(i)
+        await asyncio.gather(*(worker_loop(w, queue, measured, errors) for w in range(concurrency)))
+
+    await drive(warmup, None, None)
+
+    latencies, errors = [], {}
+    started = time.perf_counter()
+    await drive(requests, latencies, errors)
+    duration = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors.values()),
+        "error_statuses": errors,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(latencies) / duration, 2) if duration else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(latencies[-1], 2) if latencies else 0.0,
+        },
+    }
+
+
+# --- Results ---
+
+def git_revision() -> dict:
+    def git(*command):
+        return subprocess.run(
+            ["git", *command], cwd=ROOT, capture_output=True, text=True, check=False
+        ).stdout.strip()
+
+    return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def print_stage(name: str, stats: dict) -> None:
+    latency = stats["latency_ms"]
+    print(
+        f"  {name:<13} p50 {latency['p50']:>8.1f} ms | p95 {latency['p95']:>8.1f} ms | "
+        f"p99 {latency['p99']:>8.1f} ms | {stats['throughput_rps']:>7.1f} req/s | "
+        f"{stats['errors']} erreur(s)"
+    )
+
+
+def compare(current: dict, baseline_path: str, max_regression) -> bool:
+    """Print per-stage deltas against a previous result; False if a p95 regressed too much."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\n📊 Comparaison avec {baseline_path} (commit {str(baseline.get('git', {}).get('commit'))[:10]})")
+    ok = True
+    for name, stats in current["stages"].items():
+        before = baseline.get("stages", {}).get(name)
+        if not before:
+            print(f"  {name:<13} absent de la référence")
+            continue
+        deltas = []
+        for metric in ("p50", "p95", "p99"):
+            old, new = before["latency_ms"][metric], stats["latency_ms"][metric]
+            change = (new - old) / old * 100 if old else 0.0
+            deltas.append(f"{metric} {change:+6.1f}%")
+            if metric == "p95" and max_regression is not None and change > max_regression:
+                ok = False
+        old_rps = before["throughput_rps"]
+        rps_change = (stats["throughput_rps"] - old_rps) / old_rps * 100 if old_rps else 0.0
+        deltas.append(f"débit {rps_change:+6.1f}%")
+        print(f"  {name:<13} " + " | ".join(deltas))
+    return ok
+
+
+async def main(args) -> int:
+    import httpx
+    from app.core.config import settings
+    from app.core.database import engine
+    from app.main import app
+
+    rng = random.Random(args.seed)
+    print(
+        f"🏥 Seeding: {args.entities} entité(s) × {args.doctors} médecins, "
+        f"{args.documents}×{args.chunks} chunks, {args.sessions}×{args.messages} messages par entité..."
+    )
+    data = await seed(args, rng)
+    print(f"✅ Jeu de données {data.run_id} prêt en {data.counts['seconds']}s: {data.counts}")
+
+    providers = {
+        "embeddings": settings.EMBEDDING_PROVIDER, "stt": settings.STT_PROVIDER,
+        "tts": settings.TTS_PROVIDER, "chat": settings.LLM_PROVIDER,
+    }
+    result = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "config": {
+            "scale": {
+                "entities": args.entities, "doctors_per_entity": args.doctors, "days": args.days,
+                "appointments_per_doctor_day": args.appointments, "documents_per_entity": args.documents,
+                "chunks_per_document": args.chunks, "sessions_per_entity": args.sessions,
+                "messages_per_session": args.messages,
+            },
+            "seeded": data.counts,
+            "requests": args.requests, "concurrency": args.concurrency, "warmup": args.warmup,
+            "turns": args.turns, "seed": args.seed,
+            "providers": providers, "stub_latency_ms": settings.STUB_LATENCY_MS,
+        },
+        "stages": {},
+    }
+
+    workload = Workload(data, args, rng)
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+                print(f"🚀 {args.requests} requêtes par étape, {args.concurrency} clients simultanés")
+                for name in args.stages:
+                    stats = await run_stage(
+                        client, getattr(workload, name), args.requests, args.concurrency, args.warmup
+                    )
+                    result["stages"][name] = stats
+                    print_stage(name, stats)
+                result["system"] = (await client.get("/api/v1/system/metrics")).json()
+    finally:
+        if args.keep:
+            print(f"📦 Données conservées (run {data.run_id})")
+        else:
+            await cleanup(data)
+            print("🧹 Données du benchmark supprimées")
+        await engine.dispose()
+
+    output = args.output
+    if not output:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        commit = (result["git"]["commit"] or "nogit")[:10]
+        output = os.path.join(ROOT, "benchmarks", "results", f"{stamp}-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False, default=str)
+    print(f"💾 Résultats écrits dans {output}")
+
+    if args.compare and not compare(result, args.compare, args.max_regression):
+        print(f"❌ Régression du p95 au-delà de {args.max_regression}%")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    configure_providers(arguments)
+    sys.exit(asyncio.run(main(arguments)))
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+"""
+Vérifie les plans d'exécution des requêtes chaudes (chat, RAG, disponibilités).
+
+Lance EXPLAIN (ANALYZE, FORMAT JSON) sur chaque requête avec des identifiants
+pris dans la base, et échoue (code 1) si un Seq Scan apparaît sur une table
+de plus de --min-rows lignes. À lancer sur un jeu de données seedé à l'échelle
+(voir scripts/generate_dataset.py).
+
+Usage:
+    python scripts/check_query_plans.py [--min-rows 10000] [--analyze] [--verbose]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from app.core.database import AsyncSessionLocal, engine
+
+HOT_TABLES = [
+    "messages", "sessions", "kb_chunks", "kb_documents",
+    "appointments", "time_slots", "doctors",
+]
+
+# (name, sample query providing the parameters, query to explain)
+QUERIES = [
+    (
+        "chat history (messages by session)",
+        "SELECT session_id FROM messages LIMIT 1",
+        "SELECT * FROM messages WHERE session_id = :session_id "
+        "ORDER BY created_at DESC, message_id DESC LIMIT 15",
+    ),
+    (
+        "message page (keyset)",
+        "SELECT session_id, created_at, message_id FROM messages LIMIT 1",
+        "SELECT * FROM messages WHERE session_id = :session_id "
+        "AND (created_at, message_id) > (:created_at, :message_id) "
+        "ORDER BY created_at, message_id LIMIT 101",
+    ),
+    (
+        "active session lookup",
+        "SELECT entity_id, speaker_id FROM sessions WHERE speaker_id IS NOT NULL LIMIT 1",
+        "SELECT * FROM sessions WHERE entity_id = :entity_id AND speaker_id = :speaker_id "
+        "AND is_active = true ORDER BY created_at DESC LIMIT 1",
+    ),
+    (
+        "chunks by document",
+        "SELECT doc_id FROM kb_chunks LIMIT 1",
+        "SELECT * FROM kb_chunks WHERE doc_id = :doc_id ORDER BY chunk_index, chunk_id LIMIT 101",
+    ),
+    (
+        "documents by entity",
+        "SELECT entity_id FROM kb_documents LIMIT 1",
+        "SELECT * FROM kb_documents WHERE entity_id = :entity_id "
+        "ORDER BY created_at, doc_id LIMIT 101",
+    ),
+    (
+        "booked appointments (availability window)",
+        "SELECT doctor_id, date FROM appointments LIMIT 1",
+        "SELECT doctor_id, date, start_time, end_time FROM appointments "
+        "WHERE doctor_id = :doctor_id AND date >= :date AND date <= CAST(:date AS date) + 7 "
+        "AND status != 'CANCELLED'",
+    ),
+    (
+        "appointments by session",
+        "SELECT session_id FROM appointments WHERE session_id IS NOT NULL LIMIT 1",
+        "SELECT * FROM appointments WHERE session_id = :session_id",
+    ),
+    (
+        "time slots by doctor",
+        "SELECT doctor_id FROM time_slots LIMIT 1",
+        "SELECT * FROM time_slots WHERE doctor_id = :doctor_id AND is_active = true",
+    ),
+    (
+        "doctors by entity and specialty",
+        "SELECT entity_id, specialty_id FROM doctors WHERE specialty_id IS NOT NULL LIMIT 1",
+        "SELECT * FROM doctors WHERE entity_id = :entity_id AND specialty_id = :specialty_id "
+        "AND is_active = true",
+    ),
+]
+
+
+def find_seq_scans(plan: dict):
+    """Yield the relation names of every Seq Scan node of a JSON plan."""
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan.get("Relation Name")
+    for child in plan.get("Plans", []):
+        yield from find_seq_scans(child)
+
+
+async def check_plans(min_rows: int, analyze: bool, verbose: bool) -> int:
+    failures = 0
+    async with AsyncSessionLocal() as db:
+        if analyze:
+            print("📊 ANALYZE des tables chaudes...")
+            for table in HOT_TABLES:
+                await db.execute(text(f"ANALYZE {table}"))
+            await db.commit()
+
+        result = await db.execute(
+            text("SELECT relname, reltuples::bigint FROM pg_class WHERE relname = ANY(:tables)"),
+            {"tables": HOT_TABLES}
+        )
+        row_counts = dict(result.all())
+
+        for name, sample_sql, explain_sql in QUERIES:
+            sample = (await db.execute(text(sample_sql))).mappings().first()
+            if sample is None:
+                print(f"⚠ {name}: aucune donnée, requête ignorée")
+                continue
+
+            result = await db.execute(
+                text(f"EXPLAIN (ANALYZE, FORMAT JSON) {explain_sql}"), dict(sample)
+            )
+            raw = result.scalar()
+            plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+            if verbose:
+                print(json.dumps(plan["Plan"], indent=2))
+
+            seq_scans = list(find_seq_scans(plan["Plan"]))
+            blocking = [t for t in seq_scans if row_counts.get(t, 0) >= min_rows]
+            timing = f"{plan.get('Execution Time', 0):.2f} ms"
+
+            if blocking:
+                failures += 1
+                print(f"✗ {name}: Seq Scan sur {', '.join(blocking)} ({timing})")
+            elif seq_scans:
+                print(f"⚠ {name}: Seq Scan sur petite(s) table(s) {', '.join(seq_scans)} ({timing})")
+            else:
+                print(f"✓ {name} ({timing})")
+            # EXPLAIN ANALYZE executes the query: keep the check side-effect free
+            await db.rollback()
+
+    await engine.dispose()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-rows", type=int, default=10000,
+                        help="Tables plus petites que ça peuvent être lues en Seq Scan (défaut: 10000)")
+    parser.add_argument("--analyze", action="store_true", help="Lancer ANALYZE avant les EXPLAIN")
+    parser.add_argument("--verbose", action="store_true", help="Afficher les plans complets")
+    args = parser.parse_args()
+
+    failures = asyncio.run(check_plans(args.min_rows, args.analyze, args.verbose))
+    if failures:
+        print(f"\n❌ {failures} requête(s) avec Seq Scan sur une grande table.")
+        sys.exit(1)
+    print("\n✅ Aucun Seq Scan sur les tables chaudes.")
+
+
+if __name__ == "__main__":
+    main()
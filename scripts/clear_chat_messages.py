@@ -49,6 +49,7 @@ async def clear_messages():
             await session.commit()
             
             print(f"✓ {count} message(s) supprimé(s) avec succès!")
+            print("ℹ Les fichiers audio orphelins seront supprimés par la rétention (scripts/audio_retention.py)")
             
         except Exception as e:
             print(f"✗ Erreur: {e}")
@@ -0,0 +1,400 @@
+#!/usr/bin/env python
+"""
+Génère un jeu de données synthétique à l'échelle de la production.
+
+Des milliers de médecins, des millions de rendez-vous et de messages, des
+centaines de milliers de chunks KB avec leurs embeddings, chargés par COPY
+(format binaire asyncpg) lot par lot : la mémoire reste bornée par --batch-size,
+quel que soit le volume. Les tables sont analysées à la fin pour que les plans
+d'exécution (scripts/check_query_plans.py) reflètent les données.
+
+Les lignes sont ajoutées à la base configurée dans .env, sous de nouvelles
+entités "Hôpital Synthétique <run>-<n>" : à lancer sur une base jetable.
+
+Embeddings (--embeddings):
+    random  vecteurs gaussiens normalisés (le plus rapide)
+    stub    embeddings du provider stub, cohérents avec EMBEDDING_PROVIDER=stub
+    file    matrice .npy précalculée (N x 1536) passée avec --embeddings-file,
+            lue en mmap et réutilisée en boucle
+
+Usage:
+    python scripts/generate_dataset.py --doctors 5000 --appointments 2000000 \\
+        --messages 3000000 --chunks 500000 [--embeddings random] [--batch-size 10000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, time as dtime, timedelta, timezone
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncpg
+import numpy as np
+from pgvector.asyncpg import register_vector
+
+from app.core.config import settings
+from app.services.providers import EMBEDDING_DIMENSIONS, StubEmbeddings
+
+SPECIALTIES = [
+    "Cardiologie", "Neurologie", "Pédiatrie", "Orthopédie", "Dermatologie",
+    "Gynécologie", "Ophtalmologie", "Psychiatrie", "ORL", "Urologie",
+    "Médecine générale", "Radiologie", "Gastro-entérologie", "Pneumologie", "Rhumatologie"
+]
+
+FIRST_NAMES = [
+    "Amadou", "Fatou", "Moussa", "Awa", "Cheikh", "Mariama", "Oumar", "Aminata", "Ibrahima",
+    "Seynabou", "Abdoulaye", "Khady", "Mamadou", "Aissatou", "Babacar", "Ousmane", "Ndeye", "Malick"
+]
+LAST_NAMES = [
+    "Diallo", "Sow", "Ndiaye", "Diop", "Fall", "Ba", "Ly", "Gueye", "Konaté", "Thiam",
+    "Mbaye", "Cisse", "Faye", "Seck", "Sy", "Wade", "Dieng", "Ka", "Gaye", "Samb"
+]
+
+REASONS = [
+    "Consultation de routine", "Douleurs persistantes", "Suivi traitement",
+    "Renouvellement ordonnance", "Check-up annuel", "Avis médical"
+]
+
+KB_SENTENCES = [
+    "Le service de {spec} est situé au bâtiment {building}, étage {floor}.",
+    "Les heures de visite en {spec} sont de {start}h à {end}h.",
+    "Une consultation de {spec} coûte {price} francs CFA.",
+    "Pour un rendez-vous en {spec}, présentez-vous à l'accueil avec votre carte d'identité.",
+    "Les urgences de {spec} sont ouvertes jour et nuit.",
+    "Les résultats d'analyses de {spec} sont disponibles sous {floor} jours ouvrés.",
+]
+
+QUESTIONS = [
+    "Où se trouve le service de {spec} ?",
+    "Quelles sont les heures de visite en {spec} ?",
+    "Combien coûte une consultation de {spec} ?",
+    "Je voudrais un rendez-vous en {spec} demain",
+    "Quels médecins consultent en {spec} ?",
+]
+
+# Weekly schedule of every doctor (Monday-Friday), in 30 minute appointments
+SCHEDULE = [(dtime(8, 0), dtime(12, 0)), (dtime(14, 0), dtime(17, 0))]
+SLOT_MINUTES = 30
+SLOT_STARTS = [
+    (datetime.combine(date.min, start) + timedelta(minutes=m)).time()
+    for start, end in SCHEDULE
+    for m in range(0, (end.hour - start.hour) * 60, SLOT_MINUTES)
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Génère un jeu de données synthétique chargé par COPY")
+    parser.add_argument("--entities", type=int, default=5, help="Hôpitaux (une instance chacun)")
+    parser.add_argument("--doctors", type=int, default=2000, help="Médecins au total")
+    parser.add_argument("--appointments", type=int, default=1_000_000, help="Rendez-vous au total")
+    parser.add_argument("--days", type=int, default=365, help="Fenêtre des rendez-vous (jours, centrée sur aujourd'hui)")
+    parser.add_argument("--speakers", type=int, default=10_000, help="Orateurs distincts")
+    parser.add_argument("--sessions", type=int, default=200_000, help="Sessions de chat au total")
+    parser.add_argument("--messages", type=int, default=2_000_000, help="Messages au total")
+    parser.add_argument("--documents", type=int, default=5_000, help="Documents KB au total")
+    parser.add_argument("--chunks", type=int, default=500_000, help="Chunks KB au total (un embedding chacun)")
+    parser.add_argument("--embeddings", choices=["random", "stub", "file"], default="random")
+    parser.add_argument("--embeddings-file", default=None, help="Matrice .npy (N x 1536) pour --embeddings file")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Lignes par COPY (borne la mémoire)")
+    parser.add_argument("--seed", type=int, default=42, help="Graine du générateur aléatoire")
+    parser.add_argument("--no-analyze", action="store_true", help="Ne pas lancer ANALYZE à la fin")
+    args = parser.parse_args()
+
+    if args.embeddings == "file" and not args.embeddings_file:
+        parser.error("--embeddings file nécessite --embeddings-file")
+    if args.entities < 1 or args.doctors < args.entities:
+        parser.error("il faut au moins une entité et un médecin par entité")
+    return args
+
+
+def batched(rows, size: int):
+    """Group a row generator into lists of at most `size` rows."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class EmbeddingSource:
+    """Embedding vectors for a batch of chunk contents, per --embeddings."""
+
+    def __init__(self, mode: str, path: str, seed: int):
+        self.mode = mode
+        self.rng = np.random.default_rng(seed)
+        self.matrix = None
+        self.position = 0
+        if mode == "file":
+            self.matrix = np.load(path, mmap_mode="r")
+            if self.matrix.ndim != 2 or self.matrix.shape[1] != EMBEDDING_DIMENSIONS:
+                raise ValueError(f"{path}: attendu (N, {EMBEDDING_DIMENSIONS}), trouvé {self.matrix.shape}")
+
+    def vectors(self, contents):
+        if self.mode == "stub":
+            return [StubEmbeddings.vector(content) for content in contents]
+        if self.mode == "file":
+            rows = []
+            for _ in contents:
+                rows.append(np.asarray(self.matrix[self.position], dtype=np.float32))
+                self.position = (self.position + 1) % len(self.matrix)
+            return rows
+        vectors = self.rng.standard_normal((len(contents), EMBEDDING_DIMENSIONS), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return list(vectors)
+
+
+class Generator:
+    def __init__(self, conn: asyncpg.Connection, args):
+        self.conn = conn
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.run_id = uuid.uuid4().hex[:8]
+        self.now = datetime.now(timezone.utc)
+        self.totals = {}
+        self.started = {}
+
+    async def copy(self, table: str, columns, rows) -> None:
+        """COPY a row generator into `table`, one batch at a time."""
+        for batch in batched(rows, self.args.batch_size):
+            await self.copy_batch(table, columns, batch)
+        self.report(table)
+
+    async def copy_batch(self, table: str, columns, batch: list) -> None:
+        self.started.setdefault(table, time.perf_counter())
+        await self.conn.copy_records_to_table(table, records=batch, columns=list(columns))
+        self.totals[table] = self.totals.get(table, 0) + len(batch)
+        print(f"\r   {table}: {self.totals[table]:,} lignes", end="", flush=True)
+
+    def report(self, table: str) -> None:
+        if table not in self.totals:
+            return
+        elapsed = time.perf_counter() - self.started[table]
+        rate = self.totals[table] / elapsed if elapsed else 0
+        print(f"\r✅ {table}: {self.totals[table]:,} lignes en {elapsed:.1f}s ({rate:,.0f} lignes/s)")
+
+    def kb_sentence(self, spec: str) -> str:
+        rng = self.rng
+        return rng.choice(KB_SENTENCES).format(
+            spec=spec.lower(), building=rng.choice("ABCDEFG"), floor=rng.randint(1, 5),
+            start=rng.randint(8, 12), end=rng.randint(15, 20), price=rng.randint(5, 50) * 1000
+        )
+
+    # --- Reference data (kept in memory: a few thousand ids) ---
+
+    async def specialties(self) -> list:
+        existing = await self.conn.fetch(
+            "SELECT name, specialty_id FROM specialties WHERE name = ANY($1::text[])", SPECIALTIES
+        )
+        ids = {row["name"]: row["specialty_id"] for row in existing}
+        missing = [(uuid.uuid4(), name) for name in SPECIALTIES if name not in ids]
+        if missing:
+            await self.copy("specialties", ("specialty_id", "name"), iter(missing))
+            ids.update({name: specialty_id for specialty_id, name in missing})
+        return list(ids.values())
+
+    async def entities(self) -> list:
+        entities = [(uuid.uuid4(), uuid.uuid4()) for _ in range(self.args.entities)]
+        await self.copy("entities", ("entity_id", "name", "domain", "description"), (
+            (entity_id, f"Hôpital Synthétique {self.run_id}-{i}", "synthetic", f"generate_dataset {self.run_id}")
+            for i, (entity_id, _) in enumerate(entities)
+        ))
+        await self.copy("instances", ("instance_id", "entity_id", "name", "api_key"), (
+            (instance_id, entity_id, f"Borne {self.run_id}-{i}", f"synthetic-{uuid.uuid4().hex}")
+            for i, (entity_id, instance_id) in enumerate(entities)
+        ))
+        return entities
+
+    async def doctors(self, entities: list, specialty_ids: list) -> list:
+        doctors = [
+            (uuid.uuid4(), entities[i % len(entities)][0], self.rng.choice(specialty_ids))
+            for i in range(self.args.doctors)
+        ]
+        await self.copy(
+            "doctors",
+            ("doctor_id", "entity_id", "specialty_id", "first_name", "last_name", "email",
+             "password_hash", "consultation_duration", "is_active"),
+            (
+                (doctor_id, entity_id, specialty_id, self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES),
+                 f"dr-{doctor_id.hex}@synthetic.example", "synthetic", SLOT_MINUTES, True)
+                for doctor_id, entity_id, specialty_id in doctors
+            )
+        )
+        await self.copy(
+            "time_slots",
+            ("slot_id", "doctor_id", "day_of_week", "start_time", "end_time", "is_recurring", "is_active"),
+            (
+                (uuid.uuid4(), doctor_id, weekday, start, end, True, True)
+                for doctor_id, _, _ in doctors
+                for weekday in range(5)
+                for start, end in SCHEDULE
+            )
+        )
+        return doctors
+
+    # --- Bulk data (streamed) ---
+
+    def appointment_rows(self, doctors: list):
+        args, rng = self.args, self.rng
+        today = date.today()
+        first = today - timedelta(days=args.days // 2)
+        days = [first + timedelta(days=d) for d in range(args.days)]
+        days = [day for day in days if day.weekday() < 5]
+        capacity = len(days) * len(SLOT_STARTS)
+        per_doctor, extra = divmod(args.appointments, len(doctors))
+        if per_doctor + 1 > capacity:
+            print(f"⚠ {per_doctor + 1} rendez-vous par médecin pour {capacity} créneaux: des créneaux seront doublés")
+
+        for index, (doctor_id, _, _) in enumerate(doctors):
+            count = per_doctor + (1 if index < extra else 0)
+            # Distinct (day, start) pairs per doctor, like real bookings
+            picks = rng.sample(range(capacity), min(count, capacity))
+            picks += [rng.randrange(capacity) for _ in range(count - len(picks))]
+            for pick in picks:
+                day = days[pick // len(SLOT_STARTS)]
+                start = SLOT_STARTS[pick % len(SLOT_STARTS)]
+                end = (datetime.combine(day, start) + timedelta(minutes=SLOT_MINUTES)).time()
+                if day < today:
+                    status = "COMPLETED" if rng.random() < 0.85 else "CANCELLED"
+                else:
+                    status = "CONFIRMED" if rng.random() < 0.7 else "PENDING"
+                booked = datetime.combine(day, start, tzinfo=timezone.utc) - timedelta(days=rng.randint(1, 30))
+                yield (
+                    uuid.uuid4(), doctor_id, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    "patient@synthetic.example", rng.choice(REASONS), day, start, end, status, booked
+                )
+
+    def chat_rows(self, entities: list, speaker_ids: list):
+        """Sessions and their messages, interleaved: ("session", row) / ("message", row)."""
+        args, rng = self.args, self.rng
+        per_session, extra = divmod(args.messages, args.sessions)
+        for index in range(args.sessions):
+            entity_id, instance_id = entities[index % len(entities)]
+            session_id = uuid.uuid4()
+            opened = self.now - timedelta(seconds=rng.randint(60, args.days * 86400))
+            # Only the most recent sessions are still open
+            active = opened > self.now - timedelta(hours=1)
+            yield "session", (session_id, entity_id, rng.choice(speaker_ids), instance_id, active, opened)
+            for m in range(per_session + (1 if index < extra else 0)):
+                spec = rng.choice(SPECIALTIES)
+                if m % 2 == 0:
+                    role, content = "user", rng.choice(QUESTIONS).format(spec=spec.lower())
+                else:
+                    role, content = "assistant", self.kb_sentence(spec)
+                yield "message", (
+                    uuid.uuid4(), session_id, instance_id, role, content, opened + timedelta(seconds=15 * m)
+                )
+
+    async def chat(self, entities: list) -> None:
+        speaker_ids = [uuid.uuid4() for _ in range(self.args.speakers)]
+        await self.copy("speakers", ("speaker_id", "fingerprint_hash"), (
+            (speaker_id, f"synthetic-{speaker_id.hex}") for speaker_id in speaker_ids
+        ))
+        if not self.args.sessions:
+            return
+
+        # Sessions must exist before their messages: flush them first in every batch
+        sessions, messages = [], []
+
+        async def flush():
+            if sessions:
+                await self.copy_batch(
+                    "sessions",
+                    ("session_id", "entity_id", "speaker_id", "instance_id", "is_active", "created_at"),
+                    sessions
+                )
+            if messages:
+                await self.copy_batch(
+                    "messages",
+                    ("message_id", "session_id", "instance_id", "role", "content", "created_at"),
+                    messages
+                )
+            sessions.clear()
+            messages.clear()
+
+        for kind, row in self.chat_rows(entities, speaker_ids):
+            (sessions if kind == "session" else messages).append(row)
+            if len(sessions) + len(messages) >= self.args.batch_size:
+                await flush()
+        await flush()
+        self.report("sessions")
+        self.report("messages")
+
+    async def knowledge(self, entities: list) -> None:
+        args, rng = self.args, self.rng
+        if not args.documents:
+            return
+        embeddings = EmbeddingSource(args.embeddings, args.embeddings_file, args.seed)
+        documents = [
+            (uuid.uuid4(), entities[i % len(entities)][0], SPECIALTIES[i % len(SPECIALTIES)])
+            for i in range(args.documents)
+        ]
+        await self.copy("kb_documents", ("doc_id", "entity_id", "title", "source"), (
+            (doc_id, entity_id, f"Guide {spec} {i}", None) for i, (doc_id, entity_id, spec) in enumerate(documents)
+        ))
+
+        def chunk_rows():
+            per_document, extra = divmod(args.chunks, len(documents))
+            for index, (doc_id, _, spec) in enumerate(documents):
+                for chunk_index in range(per_document + (1 if index < extra else 0)):
+                    content = " ".join(self.kb_sentence(spec) for _ in range(rng.randint(3, 8)))
+                    yield uuid.uuid4(), doc_id, chunk_index, content
+
+        # One batch = its chunks, then their embeddings (foreign key on chunk_id)
+        for batch in batched(chunk_rows(), args.batch_size):
+            await self.copy_batch("kb_chunks", ("chunk_id", "doc_id", "chunk_index", "content"), batch)
+            vectors = embeddings.vectors([content for _, _, _, content in batch])
+            await self.copy_batch(
+                "kb_embeddings", ("chunk_id", "embedding"),
+                [(chunk_id, vector) for (chunk_id, _, _, _), vector in zip(batch, vectors)]
+            )
+        self.report("kb_chunks")
+        self.report("kb_embeddings")
+
+
+async def main():
+    args = parse_args()
+    dsn = str(settings.SQLALCHEMY_DATABASE_URI).replace("postgresql+asyncpg://", "postgresql://")
+    conn = await asyncpg.connect(dsn)
+    await register_vector(conn)
+    started = time.perf_counter()
+    try:
+        generator = Generator(conn, args)
+        print(f"🏭 Génération du jeu de données {generator.run_id} (lots de {args.batch_size:,} lignes)")
+        # Every COPY commits on its own (an interrupted run keeps what was loaded);
+        # durability of each commit does not matter for a throwaway dataset
+        await conn.execute("SET synchronous_commit TO off")
+
+        specialty_ids = await generator.specialties()
+        entities = await generator.entities()
+        doctors = await generator.doctors(entities, specialty_ids)
+        await generator.copy(
+            "appointments",
+            ("appointment_id", "doctor_id", "patient_name", "patient_email", "reason",
+             "date", "start_time", "end_time", "status", "created_at"),
+            generator.appointment_rows(doctors)
+        )
+        await generator.chat(entities)
+        await generator.knowledge(entities)
+
+        if not args.no_analyze:
+            print("📈 ANALYZE...")
+            for table in generator.totals:
+                await conn.execute(f"ANALYZE {table}")
+    finally:
+        await conn.close()
+
+    print(f"\n🎉 Terminé en {time.perf_counter() - started:.1f}s (run {generator.run_id})")
+    for table, count in generator.totals.items():
+        print(f"   {table:<14} {count:>12,}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -16,6 +16,15 @@ async def init_db():
     async with engine.begin() as conn:
         # Create pgvector extension if not exists
         await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+
+        # Extensions and helper used by the doctor search trigram indexes
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent"))
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.execute(text(
+            "CREATE OR REPLACE FUNCTION immutable_unaccent(text) RETURNS text AS "
+            "$$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$ "
+            "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT"
+        ))
         
         # Create all tables
         await conn.run_sync(Base.metadata.drop_all)
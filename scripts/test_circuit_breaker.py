@@ -0,0 +1,56 @@
+"""
+Test script pour vérifier le circuit breaker des appels OpenAI (app/services/openai_client.py)
+
+Un appel annulé pendant qu'il attend une place dans le limiteur (client
+déconnecté) ne doit pas garder pour lui la sonde du circuit semi-ouvert:
+l'appel suivant doit pouvoir sonder l'API et refermer le circuit.
+
+Usage:
+    python scripts/test_circuit_breaker.py
+"""
+import asyncio
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.circuit_breaker import CircuitBreaker
+from app.services import openai_client
+
+
+async def upstream():
+    return "ok"
+
+
+async def cancel_while_queued() -> bool:
+    breaker = openai_client.breakers["chat"]
+    limiter = openai_client.limiters["chat"]
+
+    # Circuit ouvert dont le délai de reprise est écoulé: le prochain appel sera la sonde
+    breaker.state = CircuitBreaker.OPEN
+    breaker.failures = breaker.failure_threshold
+    breaker._opened_at = breaker._clock() - breaker.recovery_timeout - 1
+    limiter.pause(0.5)
+
+    call = asyncio.create_task(openai_client.call("chat", upstream))
+    await asyncio.sleep(0.05)
+    queued = breaker.snapshot()["state"] == CircuitBreaker.HALF_OPEN and breaker._probe_in_flight
+    call.cancel()
+    try:
+        await call
+    except asyncio.CancelledError:
+        pass
+    released = not breaker._probe_in_flight
+    print(f"{'✅' if queued else '❌'} sonde prise pendant l'attente du limiteur")
+    print(f"{'✅' if released else '❌'} sonde libérée après l'annulation")
+
+    # Une fois la pause finie, l'appel suivant sonde l'API et referme le circuit
+    result = await openai_client.call("chat", upstream)
+    closed = result == "ok" and breaker.state == CircuitBreaker.CLOSED
+    print(f"{'✅' if closed else '❌'} appel suivant: circuit {breaker.state}")
+    return queued and released and closed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(cancel_while_queued()) else 1)
@@ -0,0 +1,54 @@
+"""
+Test script pour vérifier la détection de voix avant transcription (app/services/audio_processing.py)
+
+Clips synthétiques à 16 kHz: un clip muet et un clip de bruit de fond seul
+ne doivent pas être transcrits; une "parole" (rafales au-dessus du bruit)
+doit être gardée, silences de début et de fin coupés.
+
+Usage:
+    python scripts/test_vad.py
+"""
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.services.audio_processing import STT_SAMPLE_RATE, VADConfig, encode_wav, prepare_for_stt
+
+RATE = STT_SAMPLE_RATE
+rng = np.random.default_rng(0)
+
+
+def noise(seconds: float, rms: float) -> np.ndarray:
+    return (rng.standard_normal(int(seconds * RATE)) * rms).astype(np.float32)
+
+
+def speech(seconds: float) -> np.ndarray:
+    """Syllable-like bursts: a 200 Hz tone modulated at 4 Hz."""
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (0.3 * np.sin(2 * np.pi * 200 * t) * np.clip(np.sin(2 * np.pi * 4 * t), 0, None)).astype(np.float32)
+
+
+def check(name: str, samples: np.ndarray, expect_speech: bool) -> bool:
+    prepared = prepare_for_stt(encode_wav(samples), VADConfig())
+    has_speech = prepared.samples is not None
+    ok = has_speech == expect_speech
+    print(f"{'✅' if ok else '❌'} {name}: {prepared.input_seconds:.2f} s -> {prepared.output_seconds:.2f} s gardées")
+    return ok
+
+
+if __name__ == "__main__":
+    background = 0.01  # ~-40 dBFS, hall d'hôpital / ventilation
+    results = [
+        check("silence", np.zeros(5 * RATE, dtype=np.float32), expect_speech=False),
+        check("bruit de fond seul", noise(5, background), expect_speech=False),
+        check(
+            "parole dans le bruit",
+            np.concatenate([noise(2, background), speech(2) + noise(2, background), noise(2, background)]),
+            expect_speech=True,
+        ),
+    ]
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Convertit en Opus/Ogg les audios déjà stockés (enregistrements et réponses TTS).
+
+Parcourt les messages dont l'audio n'est pas encore en .ogg, par lots, et les
+passe par le même transcodeur que l'API (ffmpeg requis): le fichier est
+ré-encodé, le message pointe vers le nouveau fichier, l'original est supprimé.
+Seuls les fichiers locaux (UPLOAD_DIR) sont concernés, pas les audios déjà
+dans MinIO.
+
+Usage:
+    python scripts/transcode_audio.py [--batch-size 500] [--workers 4] [--dry-run]
+"""
+import argparse
+import asyncio
+import os
+import sys
+from collections import defaultdict
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.models.chat import Message
+from app.services.audio_store import OBJECT_AUDIO_PREFIX
+from app.services.transcoder import TRANSCODED_EXTENSION, AudioTranscoder, TranscodeJob
+
+
+async def point_to_existing(paths: dict) -> int:
+    """Messages whose original is gone but whose .ogg exists (shared TTS file already converted)."""
+    updated = 0
+    async with AsyncSessionLocal() as db:
+        for path, ids in paths.items():
+            target = os.path.splitext(path)[0] + TRANSCODED_EXTENSION
+            result = await db.execute(
+                update(Message).where(Message.message_id.in_(ids)).values(audio_path=target)
+            )
+            updated += result.rowcount
+        await db.commit()
+    return updated
+
+
+async def main(batch_size: int, workers: int, dry_run: bool):
+    transcoder = AudioTranscoder(workers=workers)
+    if not transcoder.enabled:
+        print(f"❌ ffmpeg introuvable ('{settings.FFMPEG_PATH}') ou TRANSCODE_ENABLED=false")
+        return
+
+    semaphore = asyncio.Semaphore(workers)
+    counts = defaultdict(int)
+
+    async def convert(job: TranscodeJob):
+        async with semaphore:
+            try:
+                await transcoder.transcode(job)
+                counts["converted"] += 1
+            except Exception as e:
+                counts["failed"] += 1
+                print(f"⚠ {job.path}: {e}")
+
+    last_id = None
+    while True:
+        query = (
+            select(Message.message_id, Message.role, Message.audio_path)
+            .where(
+                Message.audio_path.isnot(None),
+                Message.audio_path.notlike(f"%{TRANSCODED_EXTENSION}"),
+                Message.audio_path.notlike(f"{OBJECT_AUDIO_PREFIX}%"),
+            )
+            .order_by(Message.message_id)
+            .limit(batch_size)
+        )
+        if last_id is not None:
+            query = query.where(Message.message_id > last_id)
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(query)).all()
+        if not rows:
+            break
+        last_id = rows[-1].message_id
+
+        # One job per file: identical TTS answers share a file
+        jobs, converted_already = {}, defaultdict(list)
+        for message_id, role, path in rows:
+            if not os.path.exists(path):
+                if os.path.exists(os.path.splitext(path)[0] + TRANSCODED_EXTENSION):
+                    converted_already[path].append(message_id)
+                else:
+                    counts["missing"] += 1
+                continue
+            bitrate = settings.TTS_BITRATE if role == "assistant" else settings.AUDIO_STORAGE_BITRATE
+            jobs.setdefault(path, TranscodeJob(path=path, bitrate=bitrate)).message_ids.add(message_id)
+
+        if dry_run:
+            counts["to_convert"] += len(jobs)
+            continue
+        await asyncio.gather(*(convert(job) for job in jobs.values()))
+        if converted_already:
+            counts["relinked"] += await point_to_existing(converted_already)
+        print(f"   ... {dict(counts)}")
+
+    await engine.dispose()
+    stats = transcoder.stats()
+    print(f"✅ Terminé: {dict(counts)}")
+    if stats["bytes_out"]:
+        print(f"💾 {stats['bytes_in'] / 1e6:.1f} Mo -> {stats['bytes_out'] / 1e6:.1f} Mo (x{stats['compression_ratio']})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Transcode les audios stockés en Opus/Ogg")
+    parser.add_argument("--batch-size", type=int, default=500, help="Messages lus par requête")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Encodages ffmpeg simultanés")
+    parser.add_argument("--dry-run", action="store_true", help="Compter les fichiers à convertir sans rien modifier")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.workers, args.dry_run))